@@ -0,0 +1,199 @@
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+
+class IVFIndex:
+    """
+    Saf NumPy ile yazılmış inverted-file (IVF) yaklaşık en yakın komşu indeksi.
+
+    Vektörler k-means ile 'nlist' kümeye ayrılır; her küme bellekte bitişik
+    bir blok olarak tutulur. Sorguda sadece sorguya en yakın 'nprobe' küme
+    taranır. 'nprobe' büyüdükçe recall artar, gecikme de artar;
+    nprobe == nlist tam (exact) aramaya eşittir.
+
+    Vektörlerin L2-normalize edilmiş olduğu varsayılır, skor iç çarpımdır (kosinüs).
+    """
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, appids: np.ndarray,
+                 vectors: np.ndarray, version: Optional[int] = None):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.appids = np.asarray(appids, dtype=np.int64)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.version = version
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.appids)
+
+    @classmethod
+    def build(cls, appids: np.ndarray, vectors: np.ndarray, nlist: Optional[int] = None,
+              n_iter: int = 20, sample_size: int = 100_000, seed: int = 0,
+              version: Optional[int] = None) -> "IVFIndex":
+        """
+        Normalize edilmiş vektörlerden indeksi kurar.
+
+        Args:
+            appids: Her satırın appid'si.
+            vectors: (n, dim) L2-normalize float32 matris.
+            nlist: Küme sayısı. Verilmezse ~4 * sqrt(n) seçilir.
+            n_iter: k-means iterasyon sayısı.
+            sample_size: k-means eğitimi için kullanılacak en fazla örnek sayısı.
+            seed: Tekrarlanabilirlik için rastgelelik tohumu.
+            version: İndeksin kurulduğu katalog sürümü.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+
+        if nlist is None:
+            nlist = int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        centroids = spherical_kmeans(vectors, nlist, n_iter=n_iter, sample_size=sample_size, seed=seed)
+        assignments = assign_to_centroids(vectors, centroids)
+
+        # Aynı kümedeki vektörleri yan yana dizip her kümenin başlangıç/bitiş ofsetini tutuyoruz.
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return cls(centroids, offsets, np.asarray(appids)[order], vectors[order], version=version)
+
+    def search(self, query: np.ndarray, top_n: int = 20, nprobe: int = 8,
+               exclude_appid: Optional[int] = None, allowed: Optional[np.ndarray] = None) -> tuple[list[int], list[float]]:
+        """
+        Sorguya en yakın 'nprobe' kümeyi tarayıp en benzer 'top_n' appid'yi ve skorlarını döndürür.
+        'allowed' verilirse (indeks sırasında bool dizi) sadece izin verilen vektörler döner.
+        """
+        nprobe = max(1, min(nprobe, self.nlist))
+
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        candidate_rows = []
+        candidate_scores = []
+
+        for list_id in probe:
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == end:
+                continue
+            candidate_rows.append(np.arange(start, end))
+            candidate_scores.append(self.vectors[start:end] @ query)
+
+        if not candidate_rows:
+            return [], []
+
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+
+        if exclude_appid is not None:
+            scores[self.appids[rows] == exclude_appid] = -np.inf
+        if allowed is not None:
+            scores[~allowed[rows]] = -np.inf
+
+        k = min(top_n, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return [], []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return self.appids[rows[top]].tolist(), scores[top].tolist()
+
+    def patched(self, removed_appids: np.ndarray, new_appids: np.ndarray, new_vectors: np.ndarray,
+                version: Optional[int] = None) -> "IVFIndex":
+        """
+        Merkezleri yeniden eğitmeden 'removed_appids'i çıkarıp yeni vektörleri en yakın
+        kümelerine ekleyen yeni bir indeks döndürür. Küçük katalog güncellemeleri için;
+        çok sayıda değişiklikten sonra indeksi baştan kurmak recall'u korur.
+        """
+        list_of = np.repeat(np.arange(self.nlist), np.diff(self.offsets))
+        keep = ~np.isin(self.appids, removed_appids)
+
+        list_ids = np.concatenate([list_of[keep], assign_to_centroids(new_vectors, self.centroids)])
+        appids = np.concatenate([self.appids[keep], new_appids])
+        vectors = np.concatenate([self.vectors[keep], new_vectors])
+
+        order = np.argsort(list_ids, kind="stable")
+        counts = np.bincount(list_ids, minlength=self.nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return IVFIndex(self.centroids, offsets, appids[order], vectors[order], version=version)
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            appids=self.appids,
+            vectors=self.vectors,
+            version=np.int64(-1 if self.version is None else self.version),
+        )
+
+    @classmethod
+    def load(cls, path) -> "IVFIndex":
+        with np.load(path) as data:
+            version = int(data["version"])
+            return cls(
+                data["centroids"],
+                data["offsets"],
+                data["appids"],
+                data["vectors"],
+                version=None if version < 0 else version,
+            )
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 16_384) -> np.ndarray:
+    """
+    Her vektörü iç çarpımı en yüksek merkeze atar. Bellek kullanımını sınırlamak için parça parça çalışır.
+    """
+    assignments = np.empty(len(vectors), dtype=np.int64)
+
+    for start in range(0, len(vectors), chunk_size):
+        block = vectors[start:start + chunk_size]
+        assignments[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+
+    return assignments
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, n_iter: int = 20,
+                     sample_size: int = 100_000, seed: int = 0) -> np.ndarray:
+    """
+    Birim küre üzerinde k-means (kosinüs benzerliği ile). Normalize merkezler döndürür.
+    """
+    rng = np.random.default_rng(seed)
+
+    if len(vectors) > sample_size:
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    else:
+        sample = vectors
+
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(sample, centroids)
+
+        counts = np.bincount(assignments, minlength=k)
+        order = np.argsort(assignments, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        non_empty = counts > 0
+
+        sums = np.zeros_like(centroids)
+        sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+
+        # Boş kalan kümeleri rastgele bir örnekle yeniden başlatıyoruz.
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
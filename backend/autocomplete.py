@@ -0,0 +1,336 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+from database.tables import Game
+from backend.embedding_store import get_catalog_version, get_catalog_changes
+
+
+# NFKD ile ayrışmayan harfler için elle eşleme (ı -> i, ø -> o, ...)
+_EXTRA_FOLDS = str.maketrans({"ı": "i", "ø": "o", "ł": "l", "đ": "d", "æ": "ae", "œ": "oe", "þ": "th"})
+_NON_ALNUM = re.compile(r"[\W_]+")
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize_name(text: str) -> str:
+    """
+    Aramada kullanılacak normalize ad: küçük harf, aksan/diakritik işaretsiz,
+    noktalama yerine tek boşluk. 'The Witcher® 3: Wild Hunt' -> 'the witcher 3 wild hunt'
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold().translate(_EXTRA_FOLDS)
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def _deletes(token: str) -> set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _log_popularity(values) -> np.ndarray:
+    popularity = np.array([value if value is not None else 0.0 for value in values], dtype=np.float64)
+    return np.log1p(np.maximum(np.nan_to_num(popularity, nan=0.0), 0.0))
+
+
+# Oyun skorundaki popülerlik ağırlığı; normalize log-popülerlik [0, 1] olduğundan skor [0, 2] aralığındadır.
+POPULARITY_WEIGHT = 2.0
+# Sorgunun adın başıyla eşleşmesine verilen pay. Popülerlik aralığından küçük tutulur: benzer
+# popülerlikteki oyunlarda baştan eşleşen öne geçer, ama 'witcher' aramasında az bilinen
+# 'Witchery' çok daha popüler 'The Witcher 3'ün önüne geçemez.
+NAME_START_BONUS = 0.5
+
+
+def _game_scores(popularity: np.ndarray, names: list[str]) -> np.ndarray:
+    # Sıralama skoru: popülerlik baskın, kısa ad sadece eşitliği bozar.
+    name_lengths = np.fromiter((len(name) for name in names), dtype=np.float64, count=len(names))
+    return POPULARITY_WEIGHT * popularity + 1e-3 / (1.0 + name_lengths)
+
+
+class AutocompleteIndex:
+    """
+    /search/ için bellekte tutulan otomatik tamamlama indeksi.
+
+    Her oyun adı için normalize adın kendisi ve her kelimeden başlayan son ekleri
+    ('the witcher 3', 'witcher 3', '3') sıralı bir listeye konur. Önek araması
+    iki bisect ile bulunan bir aralıktır; böylece hem 'the wit' hem 'witcher'
+    aramaları 'The Witcher 3'ü bulur. Sonuçlar popülerliğe göre sıralanır; adın
+    başıyla eşleşenler küçük bir pay (NAME_START_BONUS) alır, eşitlikte kısa ad öne geçer.
+
+    'fuzzy' açıksa ve hiç sonuç yoksa, tek harf eksik/fazla/yanlış kelimeler
+    (symmetric delete yöntemiyle) sözlükteki en sık kelimeyle düzeltilip tekrar aranır.
+    """
+
+    # Yazım hatası düzeltmesinin uygulanacağı kelime uzunlukları
+    FUZZY_MIN_LENGTH = 4
+    FUZZY_MAX_LENGTH = 12
+
+    def __init__(self, fuzzy: bool = True):
+        self.fuzzy = fuzzy
+        self.version = None
+        self._lock = threading.Lock()
+        self._data = None
+
+    def __len__(self) -> int:
+        return 0 if self._data is None else len(self._data["game_of"])
+
+    def ensure_fresh(self, db: Session) -> None:
+        version = get_catalog_version(db)
+        if version == self.version:
+            return
+
+        with self._lock:
+            if version == self.version:
+                return
+
+            changes = get_catalog_changes(db, self.version, version)
+            if changes is None or self._data is None:
+                self.load(db, version)
+            else:
+                # Sadece özellikleri değişen oyunların adı veya popülerliği de değişmiş olabilir.
+                upserted, deleted, metadata_only = changes
+                self.apply_changes(db, version, upserted | metadata_only, deleted)
+
+    def load(self, db: Session, version: Optional[int] = None) -> None:
+        if version is None:
+            version = get_catalog_version(db)
+
+        rows = db.query(Game.appid, Game.name, Game.header_image, Game.popularity).all()
+        self.build(rows)
+        self.version = version
+
+    def build(self, rows) -> None:
+        """
+        rows: (appid, ad, header_image, popülerlik) dörtlüleri.
+        """
+        appids, names, images, popularity = [], [], [], []
+        suffix_entries = []
+        token_counts = Counter()
+
+        for appid, name, header_image, game_popularity in rows:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+
+            game = len(names)
+            appids.append(appid)
+            names.append(name)
+            images.append(header_image)
+            popularity.append(game_popularity)
+
+            token_counts.update(normalized.split(" "))
+            suffix_entries.extend(self._suffixes(normalized, game))
+
+        suffix_entries.sort()
+
+        popularity = _log_popularity(popularity)
+        pop_scale = float(popularity.max()) if len(popularity) and popularity.max() > 0 else 1.0
+
+        data = {
+            "appids": appids,
+            "names": names,
+            "images": images,
+            "game_of": {appid: game for game, appid in enumerate(appids)},
+            "pop_scale": pop_scale,
+            "game_score": _game_scores(popularity / pop_scale, names),
+            "keys": [key for key, _, _ in suffix_entries],
+            "key_game": np.fromiter((game for _, game, _ in suffix_entries), dtype=np.int64, count=len(suffix_entries)),
+            "key_full": np.fromiter((full for _, _, full in suffix_entries), dtype=bool, count=len(suffix_entries)),
+            "vocabulary": sorted(token_counts),
+            "token_counts": token_counts,
+            "deletes": {},
+        }
+        if self.fuzzy:
+            self._add_deletes(data["deletes"], token_counts)
+        self._data = data
+
+    def apply_changes(self, db: Session, version: int, upserted: set[int], deleted: set[int]) -> None:
+        """
+        Sadece değişen oyunları günceller: eski son ekleri çıkarır, yenilerini sıralı
+        listeye birleştirir. Okuyucular yamalanmış kopyayı tek seferde görür.
+        """
+        old = self._data
+        appids, names, images = list(old["appids"]), list(old["names"]), list(old["images"])
+        game_of = dict(old["game_of"])
+        token_counts = Counter(old["token_counts"])
+
+        removed_games = []
+        for appid in upserted | deleted:
+            game = game_of.get(appid)
+            if game is None:
+                continue
+            removed_games.append(game)
+            token_counts.subtract(normalize_name(names[game]).split(" "))
+            if appid in deleted:
+                del game_of[appid]
+                names[game] = images[game] = None
+
+        rows = []
+        upserted = sorted(upserted)
+        for start in range(0, len(upserted), 500):
+            rows += db.query(Game.appid, Game.name, Game.header_image, Game.popularity) \
+                      .filter(Game.appid.in_(upserted[start:start + 500])) \
+                      .all()
+
+        new_entries, new_games, new_popularity = [], [], []
+        for appid, name, header_image, game_popularity in rows:
+            normalized = normalize_name(name)
+            game = game_of.get(appid)
+
+            if not normalized:
+                if game is not None:
+                    del game_of[appid]
+                    names[game] = images[game] = None
+                continue
+
+            if game is None:
+                game = len(names)
+                game_of[appid] = game
+                appids.append(appid)
+                names.append(name)
+                images.append(header_image)
+            else:
+                names[game] = name
+                images[game] = header_image
+
+            new_games.append(game)
+            new_popularity.append(game_popularity)
+            token_counts.update(normalized.split(" "))
+            new_entries.extend(self._suffixes(normalized, game))
+
+        game_score = np.zeros(len(names), dtype=np.float64)
+        game_score[:len(old["game_score"])] = old["game_score"]
+        if new_games:
+            popularity = np.minimum(_log_popularity(new_popularity) / old["pop_scale"], 1.0)
+            game_score[new_games] = _game_scores(popularity, [names[game] for game in new_games])
+
+        keep = ~np.isin(old["key_game"], removed_games)
+        new_entries.sort()
+
+        keys = list(compress(old["keys"], keep.tolist())) + [key for key, _, _ in new_entries]
+        key_game = np.concatenate([old["key_game"][keep], np.array([game for _, game, _ in new_entries], dtype=np.int64)])
+        key_full = np.concatenate([old["key_full"][keep], np.array([full for _, _, full in new_entries], dtype=bool)])
+
+        # İki sıralı parçanın birleşimi; Timsort bunu neredeyse doğrusal zamanda sıralar.
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        new_tokens = set(token_counts) - set(old["token_counts"])
+        token_counts = +token_counts
+
+        deletes = old["deletes"]
+        if self.fuzzy and new_tokens:
+            # Sadece ekleme yapılıyor; eski okuyucular için zararsız.
+            self._add_deletes(deletes, {token: 1 for token in new_tokens})
+
+        self._data = {
+            "appids": appids,
+            "names": names,
+            "images": images,
+            "game_of": game_of,
+            "pop_scale": old["pop_scale"],
+            "game_score": game_score,
+            "keys": [keys[i] for i in order],
+            "key_game": key_game[order],
+            "key_full": key_full[order],
+            "vocabulary": sorted(token_counts),
+            "token_counts": token_counts,
+            "deletes": deletes,
+        }
+        self.version = version
+
+    @staticmethod
+    def _suffixes(normalized: str, game: int) -> list[tuple[str, int, bool]]:
+        # Kelime başlangıçlarından oluşan son ekler; ilki adın tamamı.
+        entries = []
+        position = 0
+        for i, token in enumerate(normalized.split(" ")):
+            entries.append((normalized[position:], game, i == 0))
+            position += len(token) + 1
+        return entries
+
+    def _add_deletes(self, deletes: dict[str, list[str]], tokens) -> None:
+        for token in tokens:
+            if self.FUZZY_MIN_LENGTH <= len(token) <= self.FUZZY_MAX_LENGTH and not token.isdigit():
+                for variant in _deletes(token):
+                    deletes.setdefault(variant, []).append(token)
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        data = self._data
+        normalized = normalize_name(query)
+
+        if data is None or not normalized:
+            return []
+
+        lo, hi = self._prefix_range(data["keys"], normalized)
+
+        if lo == hi and self.fuzzy:
+            corrected = self._correct(data, normalized)
+            if corrected is not None:
+                lo, hi = self._prefix_range(data["keys"], corrected)
+
+        if lo == hi:
+            return []
+
+        return [
+            {"name": data["names"][game], "header_image": data["images"][game]}
+            for game in self._rank(data, lo, hi, limit)
+        ]
+
+    @staticmethod
+    def _prefix_range(keys: list[str], prefix: str) -> tuple[int, int]:
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + _PREFIX_END)
+
+    @staticmethod
+    def _rank(data: dict, lo: int, hi: int, limit: int) -> list[int]:
+        games = data["key_game"][lo:hi]
+        scores = data["key_full"][lo:hi] * NAME_START_BONUS + data["game_score"][games]
+
+        # Aynı oyun birden fazla son ekle eşleşebilir; tekilleştirme payı bırakıyoruz.
+        take = min(len(games), limit * 4)
+        if take < len(games):
+            top = np.argpartition(-scores, take - 1)[:take]
+        else:
+            top = np.arange(len(games))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        ranked = []
+        seen = set()
+        for game in games[top].tolist():
+            if game not in seen:
+                seen.add(game)
+                ranked.append(game)
+                if len(ranked) == limit:
+                    break
+        return ranked
+
+    def _correct(self, data: dict, normalized: str) -> Optional[str]:
+        """
+        Sözlükte öneki olmayan kelimeleri tek düzenleme mesafesindeki en sık kelimeyle değiştirir.
+        """
+        vocabulary, token_counts, deletes = data["vocabulary"], data["token_counts"], data["deletes"]
+        tokens = normalized.split(" ")
+        changed = False
+
+        for i, token in enumerate(tokens):
+            lo, hi = self._prefix_range(vocabulary, token)
+            if lo != hi or not (self.FUZZY_MIN_LENGTH <= len(token) <= self.FUZZY_MAX_LENGTH):
+                continue
+
+            # Eksik harf: token, sözlükteki kelimenin bir silme varyantı.
+            candidates = set(deletes.get(token, ()))
+            for variant in _deletes(token):
+                # Fazla harf: silme varyantı sözlükte var.
+                if variant in token_counts:
+                    candidates.add(variant)
+                # Yanlış harf / yer değiştirme: iki tarafın silme varyantı ortak.
+                candidates.update(deletes.get(variant, ()))
+
+            if candidates:
+                tokens[i] = max(candidates, key=lambda candidate: (token_counts[candidate], candidate))
+                changed = True
+
+        return " ".join(tokens) if changed else None
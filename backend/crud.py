@@ -1,123 +1,442 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from database.tables import Game # Game modelini import ettiğinden emin ol
-from sklearn.metrics.pairwise import cosine_similarity
+from database.tables import Game, GameText, User, CatalogVersion, CatalogChange, GameNeighbors # Game modelini import ettiğinden emin ol
+from backend.embedding_store import EmbeddingStore, get_catalog_changes
+from backend.autocomplete import AutocompleteIndex
+from backend.prompt_builder import compact_candidate
+from backend.fallback_ranker import rank_fallback
+from backend.metrics import registry, span
+from datetime import datetime
+from typing import Optional
+import hashlib
+import json
 import numpy as np
+import os
+import threading
 
 
 EMBEDDING_DIM = 384
 EMBEDDING_DTYPE = np.float32
 
+# ANN indeksi (data_load_to_db/build_ann_index.py ile kurulur). Dosya yoksa veya
+# katalogdan eskiyse tam arama yapılır. NPROBE recall/gecikme dengesini ayarlar.
+ANN_INDEX_PATH = os.getenv("NEXTGAME_ANN_INDEX_PATH", "./database/ann_index.npz")
+ANN_NPROBE = int(os.getenv("NEXTGAME_ANN_NPROBE", "8"))
+
+# data_load_to_db/export_vectors.py ile üretilen, tüm worker'ların mmap ile
+# paylaştığı vektör dosyası. Yoksa veya eskiyse vektörler veritabanından okunur.
+VECTOR_FILE_PATH = os.getenv("NEXTGAME_VECTOR_FILE", "./database/embeddings.npy")
+VECTOR_FILE_VERIFY = os.getenv("NEXTGAME_VECTOR_FILE_VERIFY", "0") == "1"
+
+# Tam taramada kullanılacak sıkıştırılmış vektörler: none (varsayılan), int8 veya pq.
+# İlk aşama sıkıştırılmış kopyayı tarar, kısa liste float32 ile yeniden sıralanır;
+# VECTOR_RERANK kısa listenin alt sınırıdır (k ve katalogla birlikte büyür).
+# PQ kod kitapları data_load_to_db/build_pq_codes.py ile PQ_CODES_PATH'e yazılır.
+VECTOR_QUANTIZATION = os.getenv("NEXTGAME_VECTOR_QUANTIZATION", "none")
+VECTOR_RERANK = int(os.getenv("NEXTGAME_VECTOR_RERANK", "100"))
+PQ_CODES_PATH = os.getenv("NEXTGAME_PQ_CODES_PATH", "./database/pq_codes.npz")
+
+# Süreç boyunca paylaşılan embedding deposu. İlk istekte (veya uygulama açılışında)
+# yüklenir, katalog sürümü değiştikçe kendini yeniler. Filtreler için oyun özellikleri
+# de matrisle aynı sırada bellekte tutulur.
+embedding_store = EmbeddingStore(
+    dim=EMBEDDING_DIM,
+    dtype=EMBEDDING_DTYPE,
+    index_path=ANN_INDEX_PATH,
+    nprobe=ANN_NPROBE,
+    vector_file=VECTOR_FILE_PATH,
+    verify_checksum=VECTOR_FILE_VERIFY,
+    attributes=True,
+    quantization=VECTOR_QUANTIZATION,
+    rerank=VECTOR_RERANK,
+    pq_path=PQ_CODES_PATH,
+)
+
+# /search/ için bellekteki otomatik tamamlama indeksi. Yazım hatası toleransı
+# ek bellek kullandığı için kapatılabilir.
+AUTOCOMPLETE_FUZZY = os.getenv("NEXTGAME_AUTOCOMPLETE_FUZZY", "1") == "1"
+autocomplete_index = AutocompleteIndex(fuzzy=AUTOCOMPLETE_FUZZY)
+
+# data_load_to_db/build_neighbors.py ile önceden hesaplanan komşu tablosu. Satırı hâlâ
+# doğruysa /recommend/ benzerlik hesaplamaz, tek satır okur.
+USE_NEIGHBOR_TABLE = os.getenv("NEXTGAME_USE_NEIGHBOR_TABLE", "1") == "1"
+# Tablo kurulduktan sonra değişen oyun sayısı bunu aşarsa satırlar doğrulanmaz, tablo
+# yeniden kurulana kadar canlı arama yapılır.
+NEIGHBOR_MAX_CHANGES = int(os.getenv("NEXTGAME_NEIGHBOR_MAX_CHANGES", "20000"))
+# Komşu skorları float16 saklandığı için karşılaştırmalarda bırakılan pay.
+NEIGHBOR_SCORE_TOLERANCE = 2e-3
+
+# Toplu öneride kullanıcı kütüphanesinden alınacak en fazla tohum oyun sayısı
+# (oynama süresi en yüksek olanlar).
+LIBRARY_MAX_SEEDS = int(os.getenv("NEXTGAME_LIBRARY_MAX_SEEDS", "50"))
+
+def _store_bytes(stats: dict) -> dict:
+    return {("float32",): stats["matrix_bytes"], ("codes",): stats["codes_bytes"]}
+
+
+# /metrics için bellekteki indekslerin durumu (okuma anında hesaplanır).
+registry.collected("nextgame_embedding_store_games", "Games in the in-memory embedding store.", "gauge",
+                   lambda: {(): len(embedding_store)})
+registry.collected("nextgame_embedding_store_bytes", "Memory of the float32 matrix and of its compressed copy.", "gauge",
+                   lambda: _store_bytes(embedding_store.memory_stats()), labelnames=["part"])
+registry.collected("nextgame_catalog_version", "Catalogue version the embedding store was loaded from.", "gauge",
+                   lambda: {(): embedding_store.version or 0})
+registry.collected("nextgame_autocomplete_games", "Games in the in-memory autocomplete index.", "gauge",
+                   lambda: {(): len(autocomplete_index)})
+
+
+def bump_catalog_version(db: Session, upserted=None, deleted=None, metadata_only=None) -> int:
+    """
+    Katalog sürümünü bir artırır. Oyun tablosuna yazan her işlem commit'ten
+    önce bunu çağırmalı ki çalışan sunucular bellekteki kopyalarını yenilesin.
+    Commit işlemi çağırana bırakılır.
+
+    'upserted' / 'deleted' appid listeleri verilirse değişiklikler catalog_changes
+    tablosuna yazılır ve sunucular sadece bu oyunları günceller. 'metadata_only'
+    metni (dolayısıyla embedding'i) değişmeyen oyunlardır; sunucular onların sadece
+    özelliklerini ve adını yeniler. Hiçbiri verilmezse sürüm tam yeniden yükleme
+    olarak işaretlenir.
+    """
+    row = db.query(CatalogVersion).filter(CatalogVersion.id == 1).first()
+
+    if row is None:
+        row = CatalogVersion(id=1, version=0)
+        db.add(row)
+
+    row.version = (row.version or 0) + 1
+    row.updated_at = datetime.now()
+
+    if upserted is None and deleted is None and metadata_only is None:
+        # Tam yeniden yüklemeden önceki kayıtlara artık kimse ihtiyaç duymaz.
+        db.query(CatalogChange).filter(CatalogChange.version < row.version).delete()
+        db.add(CatalogChange(version=row.version, appid=None, deleted=False, metadata_only=False))
+    else:
+        changes = [{"version": row.version, "appid": int(appid), "deleted": False, "metadata_only": False} for appid in (upserted or [])]
+        changes += [{"version": row.version, "appid": int(appid), "deleted": True, "metadata_only": False} for appid in (deleted or [])]
+        changes += [{"version": row.version, "appid": int(appid), "deleted": False, "metadata_only": True} for appid in (metadata_only or [])]
+        if changes:
+            db.execute(insert(CatalogChange), changes)
+
+    return row.version
+
+
+def content_hash(text: str) -> str:
+    """
+    text_for_embedding'in sha256 özeti. Metni değişmeyen oyunlar yeniden embed edilmez.
+    """
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
 
 def search_games_by_name(db: Session, query: str, limit: int = 10):
     """
-    Oyun adlarına göre case-insensitive (büyük/küçük harf duyarsız) 
-    'ile başlar' araması yapar.
+    Oyun adlarına göre büyük/küçük harf ve aksan duyarsız otomatik tamamlama yapar.
+    Adın başıyla ('the wit') veya herhangi bir kelimesinin başıyla ('witcher')
+    eşleşen oyunları popülerliğe göre sıralı döndürür.
+
+    Sorgu veritabanına gitmez: SQLite'ın ILIKE karşılığı (lower(name) LIKE) indeksi
+    kullanamadığı için her tuşta tablo taraması yapıyordu. Bunun yerine bellekteki
+    AutocompleteIndex kullanılır; katalog değişirse indeks kendini yeniler.
     """
     
-    # arama sorgusunu oluşturuyoruz. 'Witch' -> 'Witch%'
-    # '%' karakteri SQL'de "gerisi ne olursa olsun" anlamına gelen bir wildcard'dır.
-    search_query = f"{query}%"
-    
-    # .ilike() komutu, case-insensitive LIKE sorgusu atar.
-    # Bu, 'witch' yazsan da 'Witcher'ı bulur.
-    search_results = db.query(Game.name, Game.header_image) \
-                       .filter(Game.name.ilike(search_query)) \
-                       .limit(limit) \
-                       .all()
-    
-    # Sonuçlar [('Oyun Adı 1',), ('Oyun Adı 2',)] şeklinde bir tuple listesi olarak gelir.
-    # Bunu ['Oyun Adı 1', 'Oyun Adı 2'] şeklinde temiz bir listeye çevirelim.
-    games_list = [
-        {"name" : name, "header_image": header_image}
-        for (name, header_image) in search_results
-    ]
-    
-    return games_list
+    with span("autocomplete.refresh"):
+        autocomplete_index.ensure_fresh(db)
+
+    # Sonuçlar [{'name': ..., 'header_image': ...}, ...] şeklinde döner.
+    with span("autocomplete.search"):
+        return autocomplete_index.search(query, limit=limit)
 
-def get_similar_game_embeddings_and_texts(db : Session, target_game_name : str, top_n : int = 20) -> list[str]:
+def get_similar_game_embeddings_and_texts(db : Session, target_game_name : str, top_n : int = 20, filters : Optional[dict] = None) -> list[str]:
     """
         Verilen oyun adına göre veritabanındaki embedding vektörlerini kullanarak
-        en benzer 'top_n' adet oyunun 'text_for_embedding' metinlerini döndürür.
+        en benzer 'top_n' adet oyunun LLM'e gidecek kısa aday kayıtlarını döndürür.
 
         Args:
             db: SQLAlchemy database session.
             target_game_name: Benzerleri bulunacak oyunun adı.
             top_n: Döndürülecek en benzer oyun sayısı.
+            filters: GameAttributes.mask parametreleri (max_price, platforms, genres, ...).
+                Arama sırasında uygulanır; sadece filtreye uyan oyunlar döner.
 
         Returns:
-            En benzer 'top_n' oyunun text_for_embedding metinlerinin listesi.
+            En benzer 'top_n' oyunun aday kayıtları (bkz. get_candidate_records_in_order).
             Oyun bulunamazsa veya hata olursa boş liste döner.
         """
-    
-    target_game = db.query(Game.appid, Game.embedding).filter(Game.name == target_game_name).first()
 
-    if not target_game:
+    similar_appids_ordered = find_similar_appids(db, target_game_name, top_n=top_n, filters=filters)
+
+    if not similar_appids_ordered:
         return []
-    
-    target_appid, target_embedding_blob = target_game
 
-    try:
-        target_vector = np.frombuffer(target_embedding_blob, dtype=EMBEDDING_DTYPE).reshape(1, -1)
-        if target_vector.shape != (1, EMBEDDING_DIM):
-            raise ValueError(f"Beklenmeyen vektör boyutu: {target_vector.shape}")
-    except Exception as e:
-        print(f"Hata hedef oyun embedding vektörü okunamadı. Appid : {target_appid}, Hata : {e}")
+    return get_candidate_records_in_order(db, similar_appids_ordered)
+
+
+def find_similar_appids(db: Session, target_game_name: str, top_n: int = 20, filters: Optional[dict] = None) -> list[int]:
+    """
+    Verilen oyuna en benzer 'top_n' oyunun appid'lerini benzerlik sırasıyla döndürür.
+    Güncel komşu tablosu varsa (ve filtre yoksa) oradan okur, yoksa canlı arar.
+    Oyun bulunamazsa boş liste döner.
+    """
+    with span("similarity.resolve"):
+        target_game = db.query(Game.appid).filter(Game.name == target_game_name).first()
+
+    if not target_game:
         return []
     
-    all_games_data = db.query(Game.appid, Game.embedding).all()
+    target_appid = target_game[0]
+
+    with span("catalog.refresh"):
+        embedding_store.ensure_fresh(db)
 
-    if not all_games_data:
-        print("Hata veri tabanında oyun verisi çekilemedi")
+    if USE_NEIGHBOR_TABLE and not filters:
+        with span("similarity.neighbors"):
+            precomputed = get_precomputed_neighbors(db, target_appid, embedding_store.version, top_n)
+        if precomputed is not None:
+            return precomputed
+
+    if embedding_store.get_vector(target_appid) is None:
+        print(f"Hata hedef oyun embedding vektörü okunamadı. Appid : {target_appid}")
         return []
 
-    all_appids = []
-    all_embedding_list = []
-    valid_indices = []
+    with span("similarity.search"):
+        similar_appids_ordered, _ = embedding_store.most_similar(target_appid, top_n=top_n, filters=filters)
+
+    if not similar_appids_ordered:
+        print("Hiç benzer oyun bulunamadı.")
+
+    return similar_appids_ordered
+
+
+def get_precomputed_neighbors(db: Session, appid: int, version: int, top_n: int = 20) -> Optional[list[int]]:
+    """
+    game_neighbors tablosundan oyunun en benzer 'top_n' komşusunu (appid) birincil anahtarla okur.
+    Satır eski bir katalog sürümüyle hesaplanmışsa, o sürümden beri yapılan değişiklikler
+    listeyi bozmadıysa (bkz. _neighbors_still_exact) yine kullanılır.
+    Satır yoksa, yeterince komşu yoksa veya liste artık doğru olmayabilirse None döner.
+    """
+    row = db.query(GameNeighbors.version, GameNeighbors.neighbors, GameNeighbors.scores) \
+        .filter(GameNeighbors.appid == appid).first()
+
+    if row is None:
+        return None
+
+    neighbors = np.frombuffer(row[1], dtype=np.int32)[:top_n]
+    if len(neighbors) < top_n:
+        return None
 
-    for i, (appid, embedding_blob) in enumerate(all_games_data):
-        all_appids.append(appid)
+    if row[0] != version:
+        scores = np.frombuffer(row[2], dtype=np.float16)[:top_n].astype(np.float32)
+        if not _neighbors_still_exact(db, appid, neighbors, scores, row[0], version):
+            return None
 
-        try:
-            vector = np.frombuffer(embedding_blob, dtype=EMBEDDING_DTYPE)
+    return neighbors.tolist()
 
-            if vector.shape == (EMBEDDING_DIM,):
-                all_embedding_list.append(vector)
-                valid_indices.append(i)
-            else:
-                print(f"Uyarı: AppID {appid} için geçersiz vektör boyutu: {vector.shape}")
-        except Exception as e:
-            print(f"Uyarı: AppID {appid} için embedding okunamadı. Hata: {e}")
-            continue
 
-    if not all_embedding_list:
-        print("Hata: Hiç geçerli embedding vektörü bulunamadı.")
+def _neighbors_still_exact(db: Session, appid: int, neighbors: np.ndarray, scores: np.ndarray,
+                           built_version: int, version: int) -> bool:
+    """
+    'built_version'da hesaplanan komşu listesi 'version'da hâlâ doğru mu:
+      - oyunun kendisi o sürümden beri değişmemiş olmalı,
+      - listedeki komşular hâlâ katalogda olmalı ve güncel skorları saklananlarla aynı kalmalı,
+      - o sürümden beri eklenen/güncellenen hiçbir oyun listenin son skoruna ulaşmamalı.
+    """
+    changes = _changes_since(db, built_version, version)
+    if changes is None:
+        return False
+
+    upserted, changed_appids, changed_matrix = changes
+    if appid in upserted:
+        return False
+
+    target = embedding_store.get_vector(appid)
+    neighbor_vectors = [embedding_store.get_vector(neighbor) for neighbor in neighbors]
+    if target is None or any(vector is None for vector in neighbor_vectors):
+        return False
+
+    if np.abs(np.stack(neighbor_vectors) @ target - scores).max() > NEIGHBOR_SCORE_TOLERANCE:
+        return False
+
+    outside = ~np.isin(changed_appids, neighbors)
+    if outside.any() and (changed_matrix[outside] @ target).max() >= scores[-1] - NEIGHBOR_SCORE_TOLERANCE:
+        return False
+
+    return True
+
+
+# (kurulum sürümü, güncel sürüm) -> değişenler; tablo tek sürümle kurulduğundan birkaç kayıt yeter.
+# İstek thread'leri aynı sözlüğü paylaştığı için kontrol-temizle-ekle adımları kilit altında yapılır.
+_neighbor_changes: dict = {}
+_neighbor_changes_lock = threading.Lock()
+
+
+def _changes_since(db: Session, since: int, until: int) -> Optional[tuple]:
+    """
+    'since' sürümünden beri eklenen/güncellenen oyunlar: (appid kümesi, bellekteki appid'leri,
+    vektörleri). Sadece özellikleri değişen oyunların vektörü aynı kaldığı için dahil değildir. Aradaki sürümlerden biri tam yükleme ise, kayıt eksikse veya
+    NEIGHBOR_MAX_CHANGES aşıldıysa None döner.
+    """
+    key = (since, until)
+    with _neighbor_changes_lock:
+        if key in _neighbor_changes:
+            return _neighbor_changes[key]
+
+    # Sorgu kilit dışında yapılır; iki thread aynı anahtarı birlikte hesaplarsa sonuç aynıdır.
+    changes = get_catalog_changes(db, since, until)
+
+    if changes is None or len(changes[0]) + len(changes[1]) > NEIGHBOR_MAX_CHANGES:
+        value = None
+    else:
+        vectors = {appid: embedding_store.get_vector(appid) for appid in changes[0]}
+        present = [appid for appid, vector in vectors.items() if vector is not None]
+        matrix = np.stack([vectors[appid] for appid in present]) if present \
+            else np.empty((0, EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+        value = (frozenset(changes[0]), np.array(present, dtype=np.int64), matrix)
+
+    with _neighbor_changes_lock:
+        if len(_neighbor_changes) >= 8:
+            _neighbor_changes.clear()
+        _neighbor_changes[key] = value
+
+    return value
+
+
+def get_candidate_records_in_order(db: Session, appids: list[int]) -> list[str]:
+    """
+    Verilen appid'lerin LLM'e gidecek tek satırlık aday kayıtlarını (ad | türler |
+    önemli etiketler | kısaltılmış açıklama) aynı sırayla döndürür.
+    Tam text_for_embedding yerine bu kayıtlar gönderilir; prompt birkaç kat kısalır.
+    Veritabanında bulunmayanlar atlanır.
+    """
+    return [game["candidate"] for game in get_games_in_order(db, appids)]
+
+
+@span("candidates.fetch")
+def get_games_in_order(db: Session, appids: list[int]) -> list[dict]:
+    """
+    Verilen appid'lerin adını, header_image'ını ve LLM aday kaydını aynı sırayla döndürür.
+    """
+    rows = db.query(Game.appid, Game.name, Game.header_image, Game.genres, Game.tags, GameText.text_for_embedding) \
+        .outerjoin(GameText, GameText.appid == Game.appid) \
+        .filter(Game.appid.in_(appids)).all()
+
+    games_dict = {
+        appid : {
+            "appid" : appid,
+            "name" : name,
+            "header_image" : str(header_image) if header_image else None,
+            "candidate" : compact_candidate(name, genres, tags, text),
+        }
+        for appid, name, header_image, genres, tags, text in rows
+    }
+
+    return [games_dict[appid] for appid in appids if appid in games_dict]
+
+
+def resolve_game_appids(db: Session, game_names: list[str]) -> dict[str, int]:
+    """
+    Oyun adlarını appid'lere çevirir. Bulunamayan adlar sözlükte yer almaz.
+    """
+    names = list(dict.fromkeys(game_names))
+    found = {}
+
+    for start in range(0, len(names), 500):
+        for appid, name in db.query(Game.appid, Game.name).filter(Game.name.in_(names[start:start + 500])).all():
+            found.setdefault(name, appid)
+
+    return found
+
+
+def get_user_library_appids(db: Session, user_id: int, limit: int = LIBRARY_MAX_SEEDS) -> list[int]:
+    """
+    User.game_info'daki kütüphaneden tohum appid'lerini döndürür. Steam GetOwnedGames
+    yanıtı ({"games": [{"appid": ..., "playtime_forever": ...}]}), oyun sözlükleri listesi
+    veya düz appid listesi kabul edilir. Oynama süresi olan oyunlar önce gelir.
+    """
+    user = db.query(User.game_info).filter(User.id == user_id).first()
+
+    if not user or not user[0]:
         return []
-    
-    embedding_matrix = np.array(all_embedding_list)
 
-    cosine_scores = cosine_similarity(target_vector, embedding_matrix)[0]
+    try:
+        library = json.loads(user[0])
+    except json.JSONDecodeError as e:
+        print(f"Hata: Kullanıcı {user_id} için game_info okunamadı. Hata: {e}")
+        return []
+
+    if isinstance(library, dict):
+        library = library.get("games", [])
 
-    most_similar_indicies = cosine_scores.argsort()[- (top_n + 1) :][::-1]
+    games = []
+    for item in library:
+        if isinstance(item, dict) and item.get("appid") is not None:
+            games.append((int(item["appid"]), item.get("playtime_forever") or 0))
+        elif isinstance(item, (int, str)) and str(item).isdigit():
+            games.append((int(item), 0))
 
-    similar_appids_ordered = []
+    games.sort(key=lambda game: game[1], reverse=True)
+    return [appid for appid, _ in games[:limit]]
 
-    for index in most_similar_indicies:
-        retrieved_appid = all_appids[index] 
 
-        if retrieved_appid != target_appid: 
-            similar_appids_ordered.append(retrieved_appid)
+def find_similar_appids_for_seeds(db: Session, seed_appids: list[int], top_n: int = 20, method: str = "rrf",
+                                  filters: Optional[dict] = None) -> list[int]:
+    """
+    Birden fazla tohum oyun için tek bir aday listesi üretir: benzerlikler tek
+    seferde hesaplanıp 'method' ('rrf' veya 'mean') ile birleştirilir.
+    Tohum oyunların kendileri aday listesine girmez.
+
+    Returns:
+        Birleşik sıralamadaki ilk 'top_n' oyunun appid'leri.
+        Tohumların hiçbiri bulunamazsa boş liste döner.
+    """
+    with span("catalog.refresh"):
+        embedding_store.ensure_fresh(db)
 
-        if len(similar_appids_ordered) == top_n:
-            break
+    with span("similarity.search_many"):
+        similar_appids_ordered, _ = embedding_store.most_similar_to_many(seed_appids, top_n=top_n, method=method, filters=filters)
 
     if not similar_appids_ordered:
         print("Hiç benzer oyun bulunamadı.")
+
+    return similar_appids_ordered
+
+
+@span("fallback.rank")
+def get_fallback_recommendations(db: Session, candidate_appids: list[int], seed_appids: list[int], language: str = "en") -> list[dict]:
+    """
+    LLM kullanılamadığında aynı aday listesinden yerel, deterministik öneriler üretir
+    (2 Similar + 1 Alternative, bkz. fallback_ranker.rank_fallback). Sorgu vektörü
+    tohum oyunların ortalamasıdır; vektörler bellekteki embedding deposundan okunur.
+    """
+    rows = db.query(Game.appid, Game.name, Game.genres, Game.tags) \
+        .filter(Game.appid.in_(list(candidate_appids) + list(seed_appids))).all()
+    by_appid = {appid : (name, genres, tags) for appid, name, genres, tags in rows}
+
+    candidates = [appid for appid in candidate_appids if appid in by_appid]
+    if not candidates:
         return []
 
-    similar_game_texts_unordered = db.query(Game.appid, Game.text_for_embedding).filter(Game.appid.in_(similar_appids_ordered)).all()
+    vectors = [embedding_store.get_vector(appid) for appid in candidates]
+    seed_vectors = [vector for vector in (embedding_store.get_vector(appid) for appid in seed_appids) if vector is not None]
 
-    texts_dict = {appid : text for appid, text, in similar_game_texts_unordered}
+    query = None
+    if seed_vectors and all(vector is not None for vector in vectors):
+        query = np.mean(np.asarray(seed_vectors, dtype=np.float32), axis=0)
+        query /= np.linalg.norm(query) or 1.0
+        vectors = np.asarray(vectors, dtype=np.float32)
+    else:
+        vectors = np.empty((0, 0), dtype=np.float32)
 
-    ordered_texts = [texts_dict.get(appid, "") for appid in similar_appids_ordered if appid in texts_dict]
+    seed_labels = set()
+    for appid in seed_appids:
+        if appid in by_appid:
+            _, genres, tags = by_appid[appid]
+            seed_labels.update(label.strip().casefold() for label in f"{genres or ''},{tags or ''}".split(",") if label.strip())
 
-    return ordered_texts
+    return rank_fallback(
+        names=[by_appid[appid][0] for appid in candidates],
+        genres=[by_appid[appid][1] for appid in candidates],
+        tags=[by_appid[appid][2] for appid in candidates],
+        vectors=vectors,
+        query=query,
+        seed_labels=seed_labels,
+        language=language,
+    )
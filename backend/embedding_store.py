@@ -0,0 +1,606 @@
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+from pathlib import Path
+from sqlalchemy.orm import Session
+from database.tables import GameEmbedding, CatalogVersion, CatalogChange
+from backend.ann_index import IVFIndex
+from backend.vector_file import open_vector_file, read_manifest, write_vector_file, writer_lock
+from backend.game_attributes import GameAttributes
+from backend.quantization import PQVectors, QuantizedVectors, quantize
+
+
+def get_catalog_version(db: Session) -> int:
+    """
+    Katalogun güncel sürüm numarasını döndürür. Tablo boşsa 0 kabul edilir.
+    """
+    row = db.query(CatalogVersion.version).filter(CatalogVersion.id == 1).first()
+    return row[0] if row else 0
+
+
+def get_catalog_changes(db: Session, since: int, until: int) -> Optional[tuple[set[int], set[int], set[int]]]:
+    """
+    'since' sürümünden 'until' sürümüne kadar değişen appid'leri (güncellenen/eklenen, silinen,
+    sadece özellikleri değişen) olarak döndürür. Üçüncü kümedeki oyunların vektörü değişmemiştir;
+    embedding ve komşu kontrolleri onları atlar. Aradaki sürümlerden biri tam yeniden yükleme
+    ise veya değişiklik kaydı eksikse None döner; bu durumda çağıran her şeyi baştan yüklemelidir.
+    """
+    if since is None or until <= since:
+        return None
+
+    rows = db.query(CatalogChange.version, CatalogChange.appid, CatalogChange.deleted, CatalogChange.metadata_only) \
+             .filter(CatalogChange.version > since, CatalogChange.version <= until) \
+             .order_by(CatalogChange.version, CatalogChange.id) \
+             .all()
+
+    if len({version for version, _, _, _ in rows}) != until - since:
+        return None
+
+    upserted, deleted, metadata_only = set(), set(), set()
+    for _, appid, is_deleted, is_metadata_only in rows:
+        if appid is None:
+            return None
+        # Sürümler sırayla uygulanır; en son işlem geçerlidir. Vektörü bu aralıkta
+        # değişmiş bir oyun sonradan sadece özellik değişikliği görse de 'upserted'ta kalır.
+        if is_deleted:
+            upserted.discard(appid)
+            metadata_only.discard(appid)
+            deleted.add(appid)
+        elif is_metadata_only:
+            if appid not in upserted:
+                metadata_only.add(appid)
+        else:
+            deleted.discard(appid)
+            metadata_only.discard(appid)
+            upserted.add(appid)
+
+    return upserted, deleted, metadata_only
+
+
+class StoreSnapshot(NamedTuple):
+    version: Optional[int]
+    appids: np.ndarray
+    matrix: np.ndarray                       # normalize matris
+    row_of: dict                             # appid -> satır
+    index: Optional[IVFIndex]
+    index_rows: Optional[np.ndarray]         # indeksteki her vektörün matris satırı (yoksa -1)
+    attributes: Optional[GameAttributes]     # filtreler için matrisle aynı sırada özellikler
+    codes: Optional[QuantizedVectors]        # tam taramanın ilk aşaması için sıkıştırılmış kopya
+
+
+class EmbeddingStore:
+    """
+    Tüm oyun embedding'lerini süreç boyunca bellekte tutan depo.
+
+    Vektörler tek bir bitişik (contiguous), L2-normalize edilmiş float32
+    matriste saklanır; böylece kosinüs benzerliği tek bir matris-vektör
+    çarpımına indirgenir. Katalog sürümü değiştiğinde depo kendini yeniden yükler.
+
+    'index_path' verilirse ve oradaki ANN indeksi güncel katalog sürümüyle
+    kurulmuşsa, aramalar tam tarama yerine indeks üzerinden 'nprobe' kümeyle yapılır.
+
+    'vector_file' verilirse ve güncel katalog sürümüyle dışa aktarılmışsa matris
+    veritabanından okunmaz, dosya salt-okunur np.memmap olarak açılır.
+
+    'attributes' açıksa fiyat, çıkış tarihi, platform, yaş sınırı, tür ve etiketler
+    matrisle aynı satır sırasında GameAttributes olarak tutulur; aramalara verilen
+    'filters' bunlardan bir satır maskesi üretir ve maske aramanın içinde uygulanır.
+
+    'quantization' ("int8" veya "pq") verilirse tam taramalar iki aşamalı olur: önce
+    matrisin sıkıştırılmış kopyası taranır, kısa listedeki adaylar float32 matrisle
+    yeniden skorlanır (bkz. _rerank_size). Taranan bellek 4-32 kat küçülür; float32 matris
+    sadece kısa liste için okunur, bu yüzden asıl bellek kazancı vektör dosyası (mmap)
+    ile birlikte gelir. PQ kod kitapları 'pq_path' dosyasından okunur, depo onları eğitmez.
+    """
+
+    # most_similar_to_many'de tek seferde çarpılan tohum sayısı; (SEED_BLOCK x oyun sayısı) float32 bellek tutar.
+    SEED_BLOCK = 64
+
+    # Sıkıştırılmış taramada yeniden skorlanan kısa liste en az 'rerank' aday, istenen sonuç
+    # başına RERANK_PER_RESULT aday ve katalogun RERANK_FRACTION kadarıdır. Sabit bir kısa
+    # liste k ve katalog büyüdükçe recall kaybettiriyor (PQ'da 50 bin oyunda 100 aday: 0,75).
+    RERANK_PER_RESULT = 10
+    RERANK_FRACTION = 0.005
+
+    def __init__(self, dim: int, dtype=np.float32, index_path=None, nprobe: int = 8,
+                 vector_file=None, verify_checksum: bool = False, attributes: bool = False,
+                 quantization: Optional[str] = None, rerank: int = 100, pq_path=None):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.index_path = Path(index_path) if index_path else None
+        self.nprobe = nprobe
+        self.vector_file = Path(vector_file) if vector_file else None
+        self.verify_checksum = verify_checksum
+        self.load_attributes = attributes
+        self.quantization = None if quantization in (None, "", "none") else quantization
+        self.rerank = rerank
+        self.pq_path = Path(pq_path) if pq_path else None
+        self._lock = threading.Lock()
+        # Okuyucular anlık görüntüyü tek seferde alır, yükleme sırasında kilit gerekmez.
+        self._snapshot = StoreSnapshot(None, np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32),
+                                       {}, None, None, GameAttributes.empty() if attributes else None, None)
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    @property
+    def index(self) -> Optional[IVFIndex]:
+        return self._snapshot.index
+
+    @property
+    def attributes(self) -> Optional[GameAttributes]:
+        return self._snapshot.attributes
+
+    def __len__(self) -> int:
+        return len(self._snapshot.appids)
+
+    def memory_stats(self) -> dict:
+        """
+        Matrisin ve (varsa) sıkıştırılmış kopyanın bayt cinsinden boyutu.
+        """
+        snapshot = self._snapshot
+        return {
+            "matrix_bytes": snapshot.matrix.nbytes,
+            "matrix_mapped": isinstance(snapshot.matrix, np.memmap),
+            "quantization": snapshot.codes.kind if snapshot.codes is not None else None,
+            "codes_bytes": snapshot.codes.nbytes if snapshot.codes is not None else 0,
+        }
+
+    def load(self, db: Session, version: Optional[int] = None) -> None:
+        """
+        Matrisi baştan kurar: güncel bir vektör dosyası varsa onu mmap ile açar,
+        yoksa bütün embedding'leri veritabanından okur.
+        """
+        if version is None:
+            version = get_catalog_version(db)
+
+        mapped = None
+        if self.vector_file is not None:
+            mapped = open_vector_file(self.vector_file, expected_version=version, dim=self.dim,
+                                      verify_checksum=self.verify_checksum)
+
+        if mapped is not None:
+            appid_array, matrix = mapped
+            source = f"memmap ({self.vector_file})"
+        else:
+            appid_array, matrix = self.read_from_db(db)
+            source = "veritabanı"
+
+        index = self._load_index(version)
+        attributes = GameAttributes.load(db, appid_array) if self.load_attributes else None
+        codes = self._load_codes(appid_array, matrix, version)
+
+        self._snapshot = self._make_snapshot(version, appid_array, matrix, index, attributes, codes)
+        print(f"Embedding deposu yüklendi: {len(appid_array)} oyun, sürüm {version}, kaynak: {source}."
+              + (f" Sıkıştırılmış kopya ({codes.kind}): {codes.nbytes / 2**20:.1f} MB." if codes is not None else ""))
+
+    def load_arrays(self, appids: np.ndarray, matrix: np.ndarray, version: Optional[int] = None) -> None:
+        """
+        Depoyu veritabanı yerine verilen vektörlerle kurar (ANN indeksi ve özellikler olmadan);
+        benchmark'lar ve deneyler için. Sıkıştırma açıksa kopya burada da oluşturulur.
+        """
+        appids = np.asarray(appids, dtype=np.int64)
+        matrix = normalize_rows(matrix)
+        codes = self._load_codes(appids, matrix, version)
+        self._snapshot = self._make_snapshot(version, appids, matrix, None, None, codes)
+
+    def apply_changes(self, db: Session, version: int, upserted: set[int], deleted: set[int],
+                      metadata_only: set[int] = frozenset()) -> None:
+        """
+        Sadece değişen oyunların vektörlerini veritabanından okuyup bellekteki matrisi
+        (ve varsa ANN indeksini) yamalar. Tüm BLOB'ları yeniden çözmekten çok daha ucuzdur.
+        Matris vektör dosyasından mmap ile açılmışsa yamalı matris dosyaya yazılıp yeniden
+        açılır (bkz. _remap); worker'lar page cache'teki tek kopyayı paylaşmaya devam eder.
+        'metadata_only' oyunlarının vektörüne dokunulmaz, sadece özellikleri yeniden okunur.
+        """
+        snapshot = self._snapshot
+        appids, matrix, index, attributes, codes = snapshot.appids, snapshot.matrix, snapshot.index, snapshot.attributes, snapshot.codes
+
+        if not upserted and not deleted:
+            if isinstance(matrix, np.memmap) and self.vector_file is not None:
+                # Veri dosyaları aynı kalır (adları içerik özetidir); sadece manifest yeni sürüme geçer.
+                matrix = self._remap(appids, matrix, version)
+            attributes = self._refresh_attributes(db, attributes, appids, metadata_only)
+            self._snapshot = snapshot._replace(version=version, matrix=matrix, attributes=attributes)
+            print(f"Embedding deposu güncellendi: {len(metadata_only)} oyunun sadece özellikleri değişti, sürüm {version}.")
+            return
+
+        new_appids, new_matrix = self.read_from_db(db, appids=upserted) if upserted else \
+            (np.empty(0, dtype=np.int64), np.empty((0, self.dim), dtype=np.float32))
+
+        removed = np.fromiter(upserted | deleted, dtype=np.int64)
+        keep = ~np.isin(appids, removed)
+
+        was_mapped = isinstance(matrix, np.memmap)
+        appid_array = np.concatenate([appids[keep], new_appids])
+        # memmap salt-okunur olduğu için yeni bir (süreç içi) matris oluşur.
+        matrix = np.concatenate([matrix[keep], new_matrix])
+        if was_mapped and self.vector_file is not None:
+            matrix = self._remap(appid_array, matrix, version)
+
+        if index is not None:
+            index = index.patched(removed, new_appids, new_matrix, version=version)
+
+        if attributes is not None:
+            new_attributes = GameAttributes.load(db, new_appids, attributes.genre_vocab, attributes.tag_vocab)
+            attributes = attributes.select(keep).concatenate(new_attributes)
+        attributes = self._refresh_attributes(db, attributes, appid_array, metadata_only)
+
+        if codes is not None:
+            codes = codes.patched(keep, new_matrix)
+        elif self.quantization:
+            # Boş katalogla açıldıysa kopya ilk eklenen oyunlarla oluşturulur.
+            codes = self._load_codes(appid_array, matrix, version)
+
+        self._snapshot = self._make_snapshot(version, appid_array, matrix, index, attributes, codes)
+        print(f"Embedding deposu güncellendi: {len(new_appids)} eklendi/güncellendi, {len(deleted)} silindi, sürüm {version}.")
+
+    @staticmethod
+    def _refresh_attributes(db: Session, attributes: Optional[GameAttributes], appids: np.ndarray,
+                            refreshed: set[int]) -> Optional[GameAttributes]:
+        """'refreshed' oyunlarının özelliklerini veritabanından yeniden okuyup kendi satırlarına yazar."""
+        if attributes is None or not refreshed:
+            return attributes
+
+        rows = np.flatnonzero(np.isin(appids, np.fromiter(refreshed, dtype=np.int64)))
+        new_attributes = GameAttributes.load(db, appids[rows], attributes.genre_vocab, attributes.tag_vocab)
+        return attributes.updated(rows, new_attributes)
+
+    def _remap(self, appids: np.ndarray, matrix: np.ndarray, version: int) -> np.ndarray:
+        """
+        Yamalı matrisi 'version' sürümüyle vektör dosyasına yayınlar ve mmap ile açılmış halini
+        döndürür. Dosyayı tek bir worker yazar: writer_lock'u alan sürüm hâlâ eskiyse yazar;
+        kilidi bekleyen diğerleri, kilit bırakıldığında sürümü güncel bulup sadece dosyayı açar.
+        Dosya yazılamazsa veya satır sırası tutmazsa süreç içi kopya kalır; paylaşım bir
+        sonraki tam yüklemede (export_vectors sonrası veya yeniden başlatınca) geri gelir.
+        """
+        def is_current():
+            manifest = read_manifest(self.vector_file)
+            return manifest is not None and manifest.get("catalog_version") == version
+
+        if not is_current():
+            try:
+                with writer_lock(self.vector_file):
+                    if not is_current():
+                        write_vector_file(self.vector_file, appids, matrix, catalog_version=version)
+            except OSError as e:
+                print(f"Uyarı: {self.vector_file} yazılamadı, matris süreç içinde tutuluyor. Hata: {e}")
+                return matrix
+
+        mapped = open_vector_file(self.vector_file, expected_version=version, dim=self.dim)
+        if mapped is None or not np.array_equal(mapped[0], appids):
+            print(f"Uyarı: {self.vector_file} bu sürecin satır sırasıyla uyuşmuyor, matris süreç içinde tutuluyor.")
+            return matrix
+
+        return mapped[1]
+
+    def read_from_db(self, db: Session, appids=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        game_embeddings tablosundaki BLOB'ları okuyup (appid dizisi, normalize matris) döndürür.
+        'appids' verilirse sadece o oyunlar okunur. Boyutu hatalı olan kayıtlar atlanır.
+        """
+        expected_size = self.dim * self.dtype.itemsize
+        appids_found = []
+        blobs = []
+
+        if appids is None:
+            rows = db.query(GameEmbedding.appid, GameEmbedding.embedding).yield_per(5000)
+        else:
+            appids = sorted(appids)
+            # SQLite'ın parametre sınırına takılmamak için parça parça sorguluyoruz.
+            rows = (
+                row
+                for start in range(0, len(appids), 500)
+                for row in db.query(GameEmbedding.appid, GameEmbedding.embedding).filter(GameEmbedding.appid.in_(appids[start:start + 500])).all()
+            )
+
+        for appid, embedding_blob in rows:
+            if embedding_blob is None or len(embedding_blob) != expected_size:
+                print(f"Uyarı: AppID {appid} için geçersiz embedding boyutu, atlanıyor.")
+                continue
+            appids_found.append(appid)
+            blobs.append(embedding_blob)
+
+        # BLOB'ları tek tek çözmek yerine hepsini birleştirip tek seferde okuyoruz.
+        matrix = np.frombuffer(b"".join(blobs), dtype=self.dtype).reshape(-1, self.dim)
+        matrix = normalize_rows(matrix)
+
+        return np.asarray(appids_found, dtype=np.int64), matrix
+
+    @staticmethod
+    def _row_index(appids: np.ndarray) -> dict[int, int]:
+        return {appid: row for row, appid in enumerate(appids.tolist())}
+
+    @classmethod
+    def _make_snapshot(cls, version, appids, matrix, index, attributes, codes=None) -> StoreSnapshot:
+        index_rows = None
+        if index is not None and len(appids):
+            # İndeks kendi sırasında tutar; filtre maskesini oraya taşımak için satır eşlemesi.
+            order = np.argsort(appids)
+            positions = np.minimum(np.searchsorted(appids[order], index.appids), len(appids) - 1)
+            index_rows = order[positions]
+            index_rows[appids[index_rows] != index.appids] = -1
+
+        return StoreSnapshot(version, appids, matrix, cls._row_index(appids), index, index_rows, attributes, codes)
+
+    def _load_index(self, version: int) -> Optional[IVFIndex]:
+        if self.index_path is None or not self.index_path.exists():
+            return None
+
+        try:
+            index = IVFIndex.load(self.index_path)
+        except Exception as e:
+            print(f"Uyarı: ANN indeksi okunamadı, tam arama kullanılacak. Hata: {e}")
+            return None
+
+        if index.version != version:
+            print(f"Uyarı: ANN indeksi eski (indeks sürümü {index.version}, katalog sürümü {version}). "
+                  f"Tam arama kullanılacak, indeksi yeniden kurun.")
+            return None
+
+        return index
+
+    def _load_codes(self, appids: np.ndarray, matrix: np.ndarray, version: Optional[int]) -> Optional[QuantizedVectors]:
+        """
+        Tam yüklemede sıkıştırılmış kopyayı hazırlar. int8 tek geçişte hesaplanır. PQ kod
+        kitapları build_pq_codes'un yazdığı dosyadan okunur: dosya bu sürüm ve satır
+        sırası için yazılmışsa kodlar olduğu gibi kullanılır, değilse vektörler aynı kod
+        kitaplarıyla yeniden kodlanır. k-means burada (kilit altında) hiç çalışmaz.
+        """
+        if self.quantization != "pq":
+            return quantize(matrix, self.quantization)
+
+        if self.pq_path is None or not self.pq_path.exists():
+            print(f"Uyarı: PQ kod kitabı dosyası yok ({self.pq_path}), sıkıştırılmış kopya olmadan tam arama "
+                  f"kullanılacak. Dosyayı build_pq_codes ile oluşturun.")
+            return None
+
+        try:
+            codes, code_appids, code_version = PQVectors.load(self.pq_path)
+        except Exception as e:
+            print(f"Uyarı: PQ kod kitabı dosyası okunamadı, sıkıştırılmış kopya kullanılmayacak. Hata: {e}")
+            return None
+
+        if codes.codebooks.shape[0] * codes.codebooks.shape[2] != self.dim:
+            print(f"Uyarı: PQ kod kitapları {self.dim} boyut için değil, sıkıştırılmış kopya kullanılmayacak.")
+            return None
+
+        if code_version == version and np.array_equal(code_appids, appids):
+            return codes
+
+        return quantize(matrix, self.quantization, codes)
+
+    def _rerank_size(self, top_n: int, candidates: int) -> int:
+        """Sıkıştırılmış taramadan sonra float32 ile yeniden skorlanacak aday sayısı."""
+        size = max(self.rerank, top_n, self.RERANK_PER_RESULT * top_n, int(self.RERANK_FRACTION * len(self)))
+        return min(size, candidates)
+
+    def ensure_fresh(self, db: Session) -> None:
+        """
+        Katalog sürümü bellekteki sürümden farklıysa depoyu günceller: değişiklik
+        kaydı varsa sadece değişen oyunları yamalar, yoksa baştan yükler.
+        """
+        version = get_catalog_version(db)
+        if version == self.version:
+            return
+
+        with self._lock:
+            # Kilidi beklerken başka bir thread yüklemiş olabilir.
+            if version == self.version:
+                return
+
+            changes = get_catalog_changes(db, self.version, version)
+            if changes is None:
+                self.load(db, version)
+            else:
+                self.apply_changes(db, version, *changes)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Bellekteki (appid dizisi, normalize matris) ikilisini döndürür.
+        """
+        snapshot = self._snapshot
+        return snapshot.appids, snapshot.matrix
+
+    def get_vector(self, appid: int) -> Optional[np.ndarray]:
+        snapshot = self._snapshot
+        row = snapshot.row_of.get(int(appid))
+        return None if row is None else snapshot.matrix[row]
+
+    def most_similar(self, appid: int, top_n: int = 20, filters: Optional[dict] = None) -> tuple[list[int], list[float]]:
+        """
+        Verilen oyuna en benzer 'top_n' oyunun appid'lerini ve kosinüs
+        skorlarını, skora göre azalan sırada döndürür. Oyunun kendisi hariç tutulur.
+        'filters' GameAttributes.mask parametreleridir; sadece onlara uyan oyunlar döner.
+        """
+        snapshot = self._snapshot
+        row = snapshot.row_of.get(int(appid))
+
+        if row is None:
+            return [], []
+
+        mask = self._filter_mask(snapshot, filters)
+        excluded = np.array([row])
+
+        if snapshot.index is not None:
+            found = self._index_search(snapshot, snapshot.matrix[row], top_n, mask, excluded)
+            if found is not None:
+                return found
+
+        return self._scan(snapshot, snapshot.matrix[row], top_n, mask, excluded)
+
+    def most_similar_to_many(self, seed_appids, top_n: int = 20, method: str = "rrf",
+                             per_seed: Optional[int] = None, rrf_k: int = 60,
+                             filters: Optional[dict] = None) -> tuple[list[int], list[float]]:
+        """
+        Birden fazla tohum oyuna birlikte en benzer 'top_n' oyunu döndürür. Tohumlar hariç tutulur.
+
+        'mean': tohum vektörlerinin normalize ortalamasına en yakın oyunlar (tek matris-vektör çarpımı).
+        'rrf':  her tohumun sıralaması matris-matris çarpımıyla (SEED_BLOCK'luk bloklar halinde)
+                bulunur, ilk 'per_seed' sıra 1 / (rrf_k + sıra) ile toplanır (reciprocal rank fusion).
+                Tek bir tohuma çok benzeyen oyunlar kadar hepsine orta derecede benzeyenler de öne çıkar.
+        """
+        snapshot = self._snapshot
+        appids, matrix, row_of = snapshot.appids, snapshot.matrix, snapshot.row_of
+        rows = sorted({row_of[appid] for appid in map(int, seed_appids) if appid in row_of})
+
+        if not rows:
+            return [], []
+
+        seeds = matrix[rows]
+        mask = self._filter_mask(snapshot, filters)
+        excluded = np.array(rows)
+
+        if method == "mean":
+            query = normalize_rows(seeds.mean(axis=0, keepdims=True))[0]
+
+            if snapshot.index is not None:
+                found = self._index_search(snapshot, query, top_n, mask, excluded)
+                if found is not None:
+                    return found
+
+            return self._scan(snapshot, query, top_n, mask, excluded)
+
+        if method != "rrf":
+            raise ValueError(f"Bilinmeyen birleştirme yöntemi: {method}")
+
+        eligible = len(appids) - len(rows) if mask is None else int(mask.sum()) - int(mask[rows].sum())
+        k = min(per_seed or max(5 * top_n, 100), eligible)
+        if k <= 0:
+            return [], []
+
+        fused = np.zeros(len(appids), dtype=np.float64)
+        rank_weights = 1.0 / (rrf_k + np.arange(1, k + 1))
+
+        codes = snapshot.codes
+        # Sıkıştırılmış kopya varsa her tohum için _rerank_size kadar aday yaklaşık skorla
+        # seçilir, ilk k tam hassasiyetli skorlarla belirlenir.
+        shortlist = k if codes is None else self._rerank_size(k, eligible)
+
+        for start in range(0, len(rows), self.SEED_BLOCK):
+            seed_block = seeds[start:start + self.SEED_BLOCK]
+            block = seed_block @ matrix.T if codes is None else codes.scores(seed_block)
+            block[:, rows] = -np.inf
+            if mask is not None:
+                block[:, ~mask] = -np.inf
+
+            top = np.argpartition(-block, shortlist - 1, axis=1)[:, :shortlist]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            if codes is not None:
+                # Tohum tohum skorlanır; (blok x kısa liste x dim) bir ara dizi çok büyük olurdu.
+                exact = np.stack([matrix[candidates] @ seed for candidates, seed in zip(top, seed_block)])
+                top_scores = np.where(np.isfinite(top_scores), exact, -np.inf)
+
+            order = np.argsort(-top_scores, axis=1)[:, :k]
+            top = np.take_along_axis(top, order, axis=1)
+
+            np.add.at(fused, top.ravel(), np.tile(rank_weights, len(top)))
+
+        # Hiçbir tohumun ilk k'sına girmeyen oyunlar aday değildir.
+        fused[fused == 0] = -np.inf
+        return self._top_k(appids, fused, top_n)
+
+    def search(self, query_vector: np.ndarray, top_n: int = 20, filters: Optional[dict] = None) -> tuple[list[int], list[float]]:
+        """
+        Rastgele bir sorgu vektörüne en yakın 'top_n' oyunu döndürür.
+        """
+        snapshot = self._snapshot
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        mask = self._filter_mask(snapshot, filters)
+
+        excluded = np.empty(0, dtype=np.int64)
+
+        if snapshot.index is not None:
+            found = self._index_search(snapshot, query, top_n, mask, excluded)
+            if found is not None:
+                return found
+
+        return self._scan(snapshot, query, top_n, mask, excluded)
+
+    def _scan(self, snapshot: StoreSnapshot, query: np.ndarray, top_n: int,
+              mask: Optional[np.ndarray], excluded_rows: np.ndarray) -> tuple[list[int], list[float]]:
+        """
+        Tam tarama. Sıkıştırılmış kopya varsa iki aşamalıdır: yaklaşık skorlarla en iyi
+        _rerank_size satır seçilir, bunlar float32 matrisle yeniden skorlanıp sıralanır.
+        """
+        codes = snapshot.codes
+        scores = snapshot.matrix @ query if codes is None else codes.scores(query)
+        scores[excluded_rows] = -np.inf
+        if mask is not None:
+            scores[~mask] = -np.inf
+
+        if codes is None:
+            return self._top_k(snapshot.appids, scores, top_n)
+
+        k = self._rerank_size(top_n, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return [], []
+
+        shortlist = np.argpartition(-scores, k - 1)[:k]
+        return self._top_k(snapshot.appids[shortlist], snapshot.matrix[shortlist] @ query, top_n)
+
+    @staticmethod
+    def _filter_mask(snapshot: StoreSnapshot, filters: Optional[dict]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        if snapshot.attributes is None:
+            raise RuntimeError("Filtreli arama için depo attributes=True ile oluşturulmalı.")
+        return snapshot.attributes.mask(**filters)
+
+    def _index_search(self, snapshot: StoreSnapshot, query: np.ndarray, top_n: int,
+                      mask: Optional[np.ndarray], excluded_rows: np.ndarray) -> Optional[tuple[list[int], list[float]]]:
+        """
+        ANN indeksiyle arar; hariç tutulan satırlar ve filtre maskesi indeks sırasına taşınıp
+        taranan kümelerin içinde uygulanır. Seçici bir filtre yüzünden taranan kümelerde
+        'top_n' uygun oyun yoksa None döner, çağıran tam (maskeli) taramaya geçer.
+        """
+        index, index_rows = snapshot.index, snapshot.index_rows
+
+        if index_rows is None:
+            return None
+
+        if mask is None and len(excluded_rows) <= 1:
+            # Filtresiz tek oyun sorgusu: maske kurmaya gerek yok.
+            exclude_appid = int(snapshot.appids[excluded_rows[0]]) if len(excluded_rows) else None
+            return index.search(query, top_n=top_n, nprobe=self.nprobe, exclude_appid=exclude_appid)
+
+        allowed = np.ones(len(snapshot.appids), dtype=bool) if mask is None else mask.copy()
+        allowed[excluded_rows] = False
+
+        eligible = int(allowed.sum())
+        if eligible * min(self.nprobe, index.nlist) / index.nlist < top_n and eligible > top_n:
+            # Taranan kümelerde beklenen uygun oyun sayısı top_n'den az; doğrudan tam tarama.
+            return None
+
+        allowed_in_index = np.zeros(len(index), dtype=bool)
+        valid = index_rows >= 0
+        allowed_in_index[valid] = allowed[index_rows[valid]]
+
+        found, scores = index.search(query, top_n=top_n, nprobe=self.nprobe, allowed=allowed_in_index)
+
+        if len(found) < top_n and len(found) < eligible:
+            return None
+        return found, scores
+
+    @staticmethod
+    def _top_k(appids: np.ndarray, scores: np.ndarray, top_n: int) -> tuple[list[int], list[float]]:
+        k = min(top_n, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return [], []
+
+        # Tam sıralama yerine O(n) argpartition ile ilk k'yı seçip sadece onları sıralıyoruz.
+        top_indices = np.argpartition(-scores, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-scores[top_indices])]
+
+        return appids[top_indices].tolist(), scores[top_indices].tolist()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Satırları L2 normuna böler. Sıfır vektörler olduğu gibi bırakılır.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from backend.prompt_builder import estimate_tokens
+
+
+# '3. "Oyun Adı" | türler | etiketler | açıklama' aday satırları (bkz. prompt_builder.compact_candidate)
+_CANDIDATE_LINE = re.compile(r'^\s*\d+\.\s+("(?:[^"\\]|\\.)*")\s+\|', re.MULTILINE)
+
+
+class FakeGeminiModel:
+    """
+    Testler ve yük denemeleri için genai.GenerativeModel yerine geçen yerel model.
+    API anahtarı ve ağ gerektirmez (NEXTGAME_LLM_FAKE=1).
+
+    Prompt'taki aday listesinden deterministik olarak ilk iki adayı "Similar",
+    sonuncusunu "Alternative" seçer. Gecikme, yavaş kuyruk (slow_rate oranında
+    slow_latency), hata oranı, asılı kalma ve bozuk JSON ayarlanabilir; böylece zaman
+    aşımı, yeniden deneme ve yedek sıralayıcı yolları gerçek Gemini olmadan denenebilir.
+    Akışlı (stream=True) çağrıyı da destekler.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, hang: bool = False,
+                 malformed: bool = False, stream_chunks: int = 12, seed: int = 0,
+                 slow_rate: float = 0.0, slow_latency: float = 20.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.hang = hang
+        self.malformed = malformed
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _answer(self, prompt: str) -> str:
+        names = [json.loads(name) for name in _CANDIDATE_LINE.findall(prompt)]
+        picks = [(name, "Similar") for name in names[:2]]
+        if len(names) > 2:
+            picks.append((names[-1], "Alternative"))
+
+        text = json.dumps({"recommendations": [
+            {"game_name": name, "type": kind, "match_reason": "Fake model answer.", "user_note": "-"}
+            for name, kind in picks
+        ]}, ensure_ascii=False)
+        return text[:len(text) // 2] if self.malformed else text
+
+    def _response(self, prompt: str, text: str):
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt), cached_content_token_count=0,
+                                candidates_token_count=estimate_tokens(text))
+        return SimpleNamespace(text=text, usage_metadata=usage, prompt_feedback=None, candidates=[])
+
+    def _maybe_fail(self) -> float:
+        """
+        Çağrıyı sayar, ayarlanan oranda hata fırlatır ve bu çağrının gecikmesini döndürür.
+        """
+        self.calls += 1
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("Fake Gemini: simulated API error")
+        if self.hang:
+            return 3600.0
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            return self.slow_latency
+        return self.latency
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self._maybe_fail())
+        return self._response(prompt, self._answer(prompt))
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        latency = self._maybe_fail()
+        text = self._answer(prompt)
+
+        if stream:
+            return self._stream(prompt, text, latency)
+
+        await asyncio.sleep(latency)
+        return self._response(prompt, text)
+
+    async def _stream(self, prompt: str, text: str, latency: float):
+        size = max(1, len(text) // self.stream_chunks)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        for piece in pieces:
+            await asyncio.sleep(latency / len(pieces))
+            yield self._response(prompt, piece)
@@ -0,0 +1,96 @@
+from typing import Optional
+
+import numpy as np
+
+
+# MMR dengesi: 1'e yakın değerler benzerliği, 0'a yakın değerler çeşitliliği öne çıkarır.
+SIMILAR_LAMBDA = 0.7
+ALTERNATIVE_LAMBDA = 0.4
+
+TEXTS = {
+    "en": {
+        "similar_tags": "One of the closest matches to your game, sharing {labels}.",
+        "similar": "One of the closest matches to your game by description.",
+        "alternative_tags": "Close to your taste but takes a different direction with {labels}.",
+        "alternative": "Close to your taste but takes a different direction.",
+        "note": "Picked automatically from similarity scores while our curator is unavailable.",
+    },
+    "tr": {
+        "similar_tags": "Oyununa en yakın oyunlardan biri; ortak yönleri: {labels}.",
+        "similar": "Açıklamasına göre oyununa en yakın oyunlardan biri.",
+        "alternative_tags": "Zevkine yakın ama {labels} ile farklı bir yön sunuyor.",
+        "alternative": "Zevkine yakın ama farklı bir yön sunuyor.",
+        "note": "Küratörümüz şu an yanıt veremediği için benzerlik puanlarına göre otomatik seçildi.",
+    },
+}
+
+
+def _labels(text: Optional[str]) -> list[str]:
+    return [label.strip() for label in (text or "").split(",") if label.strip()]
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def mmr_pick(relevance: np.ndarray, redundancy, count: int, lam: float, selected: list[int]) -> list[int]:
+    """
+    Maximal Marginal Relevance: her adımda lam * alaka - (1 - lam) * (seçilenlere en yüksek
+    benzerlik) değeri en büyük adayı 'selected'a ekler. redundancy(i, j) iki aday arasındaki
+    benzerliktir. Eşitlikte listede önce gelen (benzerlik sırası daha yüksek) aday seçilir.
+    """
+    selected = list(selected)
+    for _ in range(count):
+        remaining = [i for i in range(len(relevance)) if i not in selected]
+        if not remaining:
+            break
+        best = max(remaining, key=lambda i: lam * relevance[i] - (1 - lam) * max((redundancy(i, j) for j in selected), default=0.0))
+        selected.append(best)
+    return selected
+
+
+def rank_fallback(names: list[str], genres: list[Optional[str]], tags: list[Optional[str]], vectors: np.ndarray,
+                  query: Optional[np.ndarray], seed_labels: set[str], language: str = "en") -> list[dict]:
+    """
+    LLM yanıt vermediğinde aday listesinden deterministik olarak 2 "Similar" + 1 "Alternative" seçer.
+
+    - Similar: embedding benzerliğiyle MMR; en yakın aday ve ona çok benzemeyen en yakın ikinci aday.
+    - Alternative: alaka ile etiket/tür yeniliğinin (tohum oyunlar ve seçilenlerin etiketlerine
+      Jaccard uzaklığı) dengesi; benzer ama farklı bir yön.
+    Adaylar benzerlik sırasıyla verilmelidir. 'query' yoksa alaka bu sıradan türetilir.
+    Çıktı LLM yanıtıyla aynı şemadadır (game_name, type, match_reason, user_note).
+    """
+    if not names:
+        return []
+
+    texts = TEXTS.get(language, TEXTS["en"])
+    labels = [_labels(genre) + _labels(tag) for genre, tag in zip(genres, tags)]
+    label_sets = [{label.casefold() for label in game_labels} for game_labels in labels]
+
+    if query is not None and len(vectors) == len(names):
+        relevance = vectors @ query
+        pairwise = vectors @ vectors.T
+        similar = mmr_pick(relevance, lambda i, j: pairwise[i, j], 2, SIMILAR_LAMBDA, [])
+    else:
+        relevance = 1.0 - np.arange(len(names)) / len(names)
+        similar = list(range(min(2, len(names))))
+
+    # Alternatif hem tohum oyunların hem seçilen benzerlerin etiketlerinden uzaklaşmalı.
+    seen = set(seed_labels).union(*(label_sets[i] for i in similar))
+    novelty = np.array([1.0 - _jaccard(label_set, seen) for label_set in label_sets])
+    score = ALTERNATIVE_LAMBDA * relevance + (1 - ALTERNATIVE_LAMBDA) * novelty
+    remaining = [i for i in range(len(names)) if i not in similar]
+    alternative = [max(remaining, key=lambda i: score[i])] if remaining else []
+
+    recommendations = []
+    for i in similar:
+        shared = [label for label in labels[i] if label.casefold() in seed_labels][:3]
+        reason = texts["similar_tags"].format(labels=", ".join(shared)) if shared else texts["similar"]
+        recommendations.append({"game_name": names[i], "type": "Similar", "match_reason": reason, "user_note": texts["note"]})
+
+    for i in alternative:
+        new = [label for label in labels[i] if label.casefold() not in seen][:3]
+        reason = texts["alternative_tags"].format(labels=", ".join(new)) if new else texts["alternative"]
+        recommendations.append({"game_name": names[i], "type": "Alternative", "match_reason": reason, "user_note": texts["note"]})
+
+    return recommendations
@@ -0,0 +1,223 @@
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+from database.tables import Game
+
+
+PLATFORMS = ("windows", "mac", "linux")
+
+
+def _split_labels(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return [label.strip().casefold() for label in text.split(",") if label.strip()]
+
+
+def _bitset(label_lists: list[list[str]], vocabulary: dict[str, int]) -> np.ndarray:
+    """
+    Her satırın etiketlerini (n, kelime) boyutlu uint64 bit kümesine çevirir.
+    Sözlükte olmayan etiketler sözlüğe eklenir (sözlük yerinde güncellenir).
+    """
+    for labels in label_lists:
+        for label in labels:
+            vocabulary.setdefault(label, len(vocabulary))
+
+    words = max(1, (len(vocabulary) + 63) // 64)
+    bits = np.zeros((len(label_lists), words), dtype=np.uint64)
+
+    rows, positions = [], []
+    for row, labels in enumerate(label_lists):
+        for label in labels:
+            rows.append(row)
+            positions.append(vocabulary[label])
+
+    if rows:
+        positions = np.asarray(positions, dtype=np.uint64)
+        np.bitwise_or.at(bits, (np.asarray(rows), (positions // 64).astype(np.int64)), np.uint64(1) << (positions % 64))
+
+    return bits
+
+
+def _pad_words(bits: np.ndarray, words: int) -> np.ndarray:
+    if bits.shape[1] >= words:
+        return bits
+    return np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
+
+
+class GameAttributes:
+    """
+    Filtrelenebilir oyun özelliklerinin sütun bazlı, embedding matrisiyle aynı
+    satır sırasında tutulan kopyası.
+
+    Sayısal özellikler NumPy dizilerinde, türler ve etiketler ise uint64 bit
+    kümelerinde (her etiket bir bit) tutulur. Bir filtre birkaç vektörel
+    karşılaştırmayla satır maskesine dönüşür; maske benzerlik aramasının içinde
+    uygulanır, böylece filtreli top-k filtresiz kadar sürer ve sonuçlar
+    sonradan elenip azalmaz.
+    """
+
+    def __init__(self, price, release_date, required_age, platforms, genre_bits, tag_bits, genre_vocab, tag_vocab):
+        self.price = price                  # float32, bilinmiyorsa NaN
+        self.release_date = release_date    # datetime64[D], bilinmiyorsa NaT
+        self.required_age = required_age    # int16
+        self.platforms = platforms          # platform adı -> bool dizisi
+        self.genre_bits = genre_bits        # (n, kelime) uint64
+        self.tag_bits = tag_bits
+        self.genre_vocab = genre_vocab      # etiket -> bit numarası
+        self.tag_vocab = tag_vocab
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    @classmethod
+    def empty(cls) -> "GameAttributes":
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows, genre_vocab: Optional[dict] = None, tag_vocab: Optional[dict] = None) -> "GameAttributes":
+        """
+        rows: (price, release_date, required_age, windows, mac, linux, genres, tags) satırları.
+        Verilen sözlükler kopyalanıp genişletilir; mevcut etiketlerin bit numaraları değişmez.
+        """
+        genre_vocab = dict(genre_vocab or {})
+        tag_vocab = dict(tag_vocab or {})
+        columns = list(zip(*rows)) if rows else [()] * 8
+        price, release_date, required_age, windows, mac, linux, genres, tags = columns
+
+        return cls(
+            price=np.array([np.nan if value is None else value for value in price], dtype=np.float32),
+            release_date=np.array([value if value is not None else "NaT" for value in release_date], dtype="datetime64[D]"),
+            required_age=np.array([value or 0 for value in required_age], dtype=np.int16),
+            platforms={
+                name: np.array([bool(value) for value in values], dtype=bool)
+                for name, values in zip(PLATFORMS, (windows, mac, linux))
+            },
+            genre_bits=_bitset([_split_labels(text) for text in genres], genre_vocab),
+            tag_bits=_bitset([_split_labels(text) for text in tags], tag_vocab),
+            genre_vocab=genre_vocab,
+            tag_vocab=tag_vocab,
+        )
+
+    @classmethod
+    def load(cls, db: Session, appids: np.ndarray, genre_vocab: Optional[dict] = None,
+             tag_vocab: Optional[dict] = None) -> "GameAttributes":
+        """
+        'appids' sırasıyla hizalanmış özellikleri veritabanından okur.
+        """
+        columns = (Game.appid, Game.price, Game.release_date, Game.required_age,
+                   Game.windows, Game.mac, Game.linux, Game.genres, Game.tags)
+        wanted = appids.tolist()
+
+        if len(wanted) > 5000:
+            query = db.query(*columns).yield_per(5000)
+        else:
+            # SQLite'ın parametre sınırına takılmamak için parça parça sorguluyoruz.
+            query = (
+                row
+                for start in range(0, len(wanted), 500)
+                for row in db.query(*columns).filter(Game.appid.in_(wanted[start:start + 500])).all()
+            )
+
+        by_appid = {row[0]: row[1:] for row in query}
+        missing = (None, None, None, None, None, None, None, None)
+
+        return cls.from_rows([by_appid.get(appid, missing) for appid in wanted], genre_vocab, tag_vocab)
+
+    def select(self, keep: np.ndarray) -> "GameAttributes":
+        return GameAttributes(
+            self.price[keep], self.release_date[keep], self.required_age[keep],
+            {name: values[keep] for name, values in self.platforms.items()},
+            self.genre_bits[keep], self.tag_bits[keep], self.genre_vocab, self.tag_vocab,
+        )
+
+    def concatenate(self, other: "GameAttributes") -> "GameAttributes":
+        """
+        'other' bu nesnenin sözlükleriyle (from_rows/load ile) oluşturulmuş olmalı,
+        böylece ortak etiketlerin bit numaraları aynıdır.
+        """
+        genre_words = max(self.genre_bits.shape[1], other.genre_bits.shape[1])
+        tag_words = max(self.tag_bits.shape[1], other.tag_bits.shape[1])
+
+        return GameAttributes(
+            np.concatenate([self.price, other.price]),
+            np.concatenate([self.release_date, other.release_date]),
+            np.concatenate([self.required_age, other.required_age]),
+            {name: np.concatenate([self.platforms[name], other.platforms[name]]) for name in PLATFORMS},
+            np.concatenate([_pad_words(self.genre_bits, genre_words), _pad_words(other.genre_bits, genre_words)]),
+            np.concatenate([_pad_words(self.tag_bits, tag_words), _pad_words(other.tag_bits, tag_words)]),
+            other.genre_vocab,
+            other.tag_vocab,
+        )
+
+    def updated(self, rows: np.ndarray, other: "GameAttributes") -> "GameAttributes":
+        """
+        'rows' satırları 'other'ın satırlarıyla (aynı sırada) değiştirilmiş yeni bir kopya
+        döndürür. 'other' concatenate'teki gibi bu nesnenin sözlükleriyle oluşturulmuş olmalı.
+        """
+        genre_words = max(self.genre_bits.shape[1], other.genre_bits.shape[1])
+        tag_words = max(self.tag_bits.shape[1], other.tag_bits.shape[1])
+
+        def replace(values, new_values):
+            values = values.copy()
+            values[rows] = new_values
+            return values
+
+        return GameAttributes(
+            replace(self.price, other.price),
+            replace(self.release_date, other.release_date),
+            replace(self.required_age, other.required_age),
+            {name: replace(self.platforms[name], other.platforms[name]) for name in PLATFORMS},
+            replace(_pad_words(self.genre_bits, genre_words), _pad_words(other.genre_bits, genre_words)),
+            replace(_pad_words(self.tag_bits, tag_words), _pad_words(other.tag_bits, tag_words)),
+            other.genre_vocab,
+            other.tag_vocab,
+        )
+
+    def mask(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+             released_after: Optional[date] = None, released_before: Optional[date] = None,
+             platforms=(), max_required_age: Optional[int] = None, genres=(), tags=()) -> np.ndarray:
+        """
+        Tüm koşulları sağlayan satırlar için True olan maske. Fiyatı veya çıkış tarihi
+        bilinmeyen oyunlar ilgili filtre verilince elenir. Birden fazla tür/etiket/platform
+        verilirse hepsi aranır (VE).
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        # NaN ve NaT karşılaştırmaları False döner, bilinmeyen değerler kendiliğinden elenir.
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if released_after is not None:
+            mask &= self.release_date >= np.datetime64(released_after, "D")
+        if released_before is not None:
+            mask &= self.release_date <= np.datetime64(released_before, "D")
+        if max_required_age is not None:
+            mask &= self.required_age <= max_required_age
+
+        for platform in platforms:
+            if platform not in self.platforms:
+                raise ValueError(f"Bilinmeyen platform: {platform}")
+            mask &= self.platforms[platform]
+
+        for bits, vocabulary, labels in ((self.genre_bits, self.genre_vocab, genres), (self.tag_bits, self.tag_vocab, tags)):
+            if labels:
+                mask &= self._has_all(bits, vocabulary, labels)
+
+        return mask
+
+    @staticmethod
+    def _has_all(bits: np.ndarray, vocabulary: dict[str, int], labels) -> np.ndarray:
+        required = np.zeros(bits.shape[1], dtype=np.uint64)
+
+        for label in labels:
+            position = vocabulary.get(label.strip().casefold())
+            if position is None:
+                # Katalogda hiç geçmeyen bir etiket hiçbir oyunla eşleşmez.
+                return np.zeros(len(bits), dtype=bool)
+            required[position // 64] |= np.uint64(1) << np.uint64(position % 64)
+
+        words = np.flatnonzero(required)
+        return np.all((bits[:, words] & required[words]) == required[words], axis=1)
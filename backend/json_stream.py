@@ -0,0 +1,61 @@
+import json
+
+
+class RecommendationStreamParser:
+    """
+    LLM'den parça parça gelen {"recommendations": [ {...}, {...} ]} metnini okuyup
+    dizideki her nesneyi kapanış parantezi gelir gelmez döndüren artımlı ayrıştırıcı.
+
+    Metin sadece bir kez taranır: karakterler gelirken açık kapların yığını ve
+    string/kaçış durumu tutulur. Üst seviye nesnenin içindeki bir dizinin
+    doğrudan elemanı olan nesne kapandığında o dilim json.loads ile çözülür.
+    Baştaki ```json gibi ekler ilk '{' karakterine kadar yok sayılır.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._position = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+
+    def feed(self, chunk: str) -> list[dict]:
+        """
+        Yeni gelen metni ekler ve bu parçayla tamamlanan öneri nesnelerini döndürür.
+        """
+        self.text += chunk
+        completed = []
+
+        for position in range(self._position, len(self.text)):
+            char = self.text[position]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self._stack and char != "{":
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack == ["{", "["]:
+                    self._object_start = position
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._stack == ["{", "["] and self._object_start is not None:
+                    item = json.loads(self.text[self._object_start:position + 1])
+                    self._object_start = None
+                    if isinstance(item, dict):
+                        completed.append(item)
+
+        self._position = len(self.text)
+        return completed
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import bindparam, update
+from database.db import SessionLocal
+from database.tables import LLMCacheEntry
+
+
+class RecommendationCache:
+    """
+    Gemini öneri yanıtları için iki katmanlı önbellek.
+
+    1. Katman: süreç içi LRU (OrderedDict), en fazla 'max_entries' kayıt.
+    2. Katman: SQLite'taki 'llm_cache' tablosu, 'ttl_seconds' sonra geçersiz olur.
+       Sunucu yeniden başlasa veya başka bir worker aynı isteği alsa bile yanıt tekrar kullanılır.
+
+    Anahtar; aday metinleri, dil, model adı ve prompt sürümünün sha256 özetidir.
+    Aynı oyun + dil her zaman aynı 20 adayı ürettiği için LLM çağrısı tekrarlanmaz.
+
+    Hit sayaçları (most_requested / önceden ısıtma için) okuma yolunda diske yazılmaz:
+    bellekte biriktirilir, yeni bir yanıt yazılırken veya FLUSH_EVERY hit birikince arka
+    plan thread'inde tek bir toplu UPDATE ile yazılır.
+    """
+
+    FLUSH_EVERY = 256
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 7 * 24 * 3600, persistent: bool = True):
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.persistent = persistent
+        self._memory = OrderedDict()  # key -> (expires_at, recommendations)
+        self._lock = threading.Lock()
+        self._pending_hits = Counter()
+        self._pending_count = 0
+        self._flushing = False
+        self.counters = Counter(memory_hits=0, db_hits=0, misses=0, stores=0, errors=0)
+
+    @staticmethod
+    def make_key(candidate_games: list[str], language: str, model_name: str, prompt_version: str) -> str:
+        payload = json.dumps(
+            {"candidates": candidate_games, "language": language, "model": model_name, "prompt": prompt_version},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[list[dict]]:
+        now = datetime.now()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, recommendations = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    self._count_hit(key)
+                    return recommendations
+                del self._memory[key]
+
+        if self.persistent:
+            recommendations = self._get_from_db(key, now)
+            if recommendations is not None:
+                self.counters["db_hits"] += 1
+                return recommendations
+
+        self.counters["misses"] += 1
+        return None
+
+    def set(self, key: str, recommendations: list[dict], candidate_games: list[str], language: str) -> None:
+        now = datetime.now()
+        expires_at = now + self.ttl
+
+        self._remember(key, expires_at, recommendations)
+        self.counters["stores"] += 1
+
+        if not self.persistent:
+            return
+
+        db = SessionLocal()
+        try:
+            entry = db.get(LLMCacheEntry, key)
+            if entry is None:
+                entry = LLMCacheEntry(key=key, hits=0)
+                db.add(entry)
+            entry.language = language
+            entry.candidates = json.dumps(candidate_games, ensure_ascii=False)
+            entry.response = json.dumps(recommendations, ensure_ascii=False)
+            entry.created_at = now
+            entry.expires_at = expires_at
+            db.commit()
+            # LLM çağrısı zaten pahalı; bekleyen hit sayaçlarını bu fırsatta diske yazıyoruz.
+            self._flush_hits(db)
+        except Exception as e:
+            db.rollback()
+            self.counters["errors"] += 1
+            print(f"Uyarı: LLM önbelleğine yazılamadı. Hata: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        lookups = self.counters["memory_hits"] + self.counters["db_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["db_hits"]
+        return {
+            **self.counters,
+            "memory_entries": len(self._memory),
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    def most_requested(self, limit: int = 50) -> list[dict]:
+        """
+        En çok kullanılan kalıcı kayıtların aday listesi, dili ve hit sayısını döndürür (önceden ısıtma için).
+        """
+        db = SessionLocal()
+        try:
+            self._flush_hits(db)
+            rows = db.query(LLMCacheEntry.candidates, LLMCacheEntry.language, LLMCacheEntry.hits) \
+                     .order_by(LLMCacheEntry.hits.desc()) \
+                     .limit(limit) \
+                     .all()
+            return [
+                {"candidates": json.loads(candidates), "language": language, "hits": hits}
+                for (candidates, language, hits) in rows
+            ]
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        now = datetime.now()
+
+        with self._lock:
+            for key in [key for key, (expires_at, _) in self._memory.items() if expires_at <= now]:
+                del self._memory[key]
+
+        if not self.persistent:
+            return 0
+
+        db = SessionLocal()
+        try:
+            deleted = db.query(LLMCacheEntry).filter(LLMCacheEntry.expires_at <= now).delete()
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key: str, expires_at: datetime, recommendations: list[dict]) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, recommendations)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _get_from_db(self, key: str, now: datetime) -> Optional[list[dict]]:
+        db = SessionLocal()
+        try:
+            entry = db.get(LLMCacheEntry, key)
+            if entry is None or entry.expires_at <= now:
+                return None
+
+            recommendations = json.loads(entry.response)
+            expires_at = entry.expires_at
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"Uyarı: LLM önbelleği okunamadı. Hata: {e}")
+            return None
+        finally:
+            db.close()
+
+        # Bir sonraki istekte diske gitmemek için bellek katmanına da alıyoruz.
+        self._remember(key, expires_at, recommendations)
+        with self._lock:
+            self._count_hit(key)
+        return recommendations
+
+    def _count_hit(self, key: str) -> None:
+        """self._lock tutulurken çağrılır. Yeterince hit biriktiyse yazmayı arka plana bırakır."""
+        self._pending_hits[key] += 1
+        self._pending_count += 1
+        if self.persistent and not self._flushing and self._pending_count >= self.FLUSH_EVERY:
+            self._flushing = True
+            threading.Thread(target=self._flush_in_background, daemon=True).start()
+
+    def _flush_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            self._flush_hits(db)
+        finally:
+            db.close()
+            with self._lock:
+                self._flushing = False
+
+    def _flush_hits(self, db) -> None:
+        with self._lock:
+            pending, self._pending_hits, self._pending_count = self._pending_hits, Counter(), 0
+
+        if not pending:
+            return
+
+        table = LLMCacheEntry.__table__
+        statement = update(table).where(table.c.key == bindparam("b_key")).values(hits=table.c.hits + bindparam("b_count"))
+
+        try:
+            db.execute(statement, [{"b_key": key, "b_count": count} for key, count in pending.items()])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Uyarı: LLM önbelleği sayaçları yazılamadı. Hata: {e}")
@@ -0,0 +1,167 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(Exception):
+    """
+    LLM süresi içinde (yeniden denemeler dahil) geçerli yanıt veremedi veya devre açık.
+    """
+
+
+class CircuitBreaker:
+    """
+    Ardışık 'failure_threshold' hatadan sonra devreyi açar; 'reset_seconds' boyunca
+    çağrılar LLM'e hiç gitmeden reddedilir (istek hemen yedek sıralayıcıya düşer).
+    Süre dolunca tek bir deneme çağrısına izin verilir (yarı açık): başarılı olursa
+    devre kapanır, başarısız olursa tekrar açılır, sonuçsuz kalırsa (iptal) deneme
+    hakkı release_probe() ile bir sonraki çağrıya bırakılır.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_seconds or self._probing:
+                return False
+            # Yarı açık: sonucu gelene kadar sadece bu çağrı geçer.
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """
+        Sonucu belli olmadan biten (iptal edilen) çağrı için: devrenin durumu değişmez,
+        yarı açık deneme hakkı boşa çıkar. Çağrılmazsa devre sürekli yarı açık kalıp
+        bütün çağrıları reddeder.
+        """
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures}
+
+
+async def _hedged(attempt: Callable[[], Awaitable[T]], hedge_after: Optional[float]) -> T:
+    """
+    'attempt'i çalıştırır; 'hedge_after' saniyede bitmezse aynı isteğin ikinci bir
+    kopyasını başlatır ve önce başarıyla biteni döndürür, diğerini iptal eder.
+    """
+    if not hedge_after:
+        return await attempt()
+
+    tasks = {asyncio.ensure_future(attempt())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.add(asyncio.ensure_future(attempt()))
+
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error  # type: ignore[misc]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def call_with_resilience(attempt: Callable[[], Awaitable[T]], deadline: float, retries: int = 1,
+                               backoff: float = 0.25, hedge_after: Optional[float] = None,
+                               breaker: Optional[CircuitBreaker] = None) -> T:
+    """
+    'attempt'i toplam 'deadline' saniyelik bir süre içinde çağırır:
+      - her deneme kalan süreyle sınırlanır, süre dolunca iptal edilir,
+      - hata olursa en fazla 'retries' kez, üstel ve tam rastgele (full jitter) beklemeyle tekrar denenir,
+      - 'hedge_after' verilirse yavaş kalan denemeye paralel ikinci bir kopya gönderilir,
+      - 'breaker' açıksa hiç denenmez.
+    Başarısızlıkta LLMUnavailable fırlatır; böylece çağıran taraf en geç 'deadline'
+    sonunda yedek yanıta geçebilir.
+    """
+    if breaker is not None and not breaker.allow():
+        raise LLMUnavailable("Devre açık, LLM çağrısı atlandı.")
+
+    try:
+        result = await _retry_within_deadline(attempt, deadline, retries, backoff, hedge_after)
+    except LLMUnavailable:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # İptal (istemci bağlantıyı kapattı, dış zaman aşımı) LLM'in hatası sayılmaz;
+        # ama yarı açık deneme hakkı bırakılmazsa devre bir daha kapanmaz.
+        if breaker is not None:
+            breaker.release_probe()
+        raise
+
+    if breaker is not None:
+        breaker.record_success()
+    return result
+
+
+async def _retry_within_deadline(attempt: Callable[[], Awaitable[T]], deadline: float, retries: int,
+                                 backoff: float, hedge_after: Optional[float]) -> T:
+    loop = asyncio.get_running_loop()
+    ends_at = loop.time() + deadline
+    last_error: Optional[BaseException] = None
+
+    for attempt_number in range(retries + 1):
+        remaining = ends_at - loop.time()
+        if remaining <= 0:
+            break
+
+        try:
+            return await asyncio.wait_for(_hedged(attempt, hedge_after), timeout=remaining)
+        except asyncio.TimeoutError:
+            last_error = TimeoutError(f"LLM {deadline:.1f} saniyede yanıt vermedi.")
+            break
+        except Exception as e:
+            last_error = e
+
+        delay = random.uniform(0, backoff * (2 ** attempt_number))
+        if loop.time() + delay >= ends_at:
+            break
+        await asyncio.sleep(delay)
+
+    raise LLMUnavailable(str(last_error) if last_error else "LLM süresi doldu.") from last_error
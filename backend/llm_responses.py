@@ -1,23 +1,78 @@
-import google.generativeai as genai
+import asyncio
 import os
 import json
-from dotenv import load_dotenv
+import threading
+import time
+from datetime import timedelta
+from dotenv import load_dotenv, find_dotenv
+from backend.llm_cache import RecommendationCache
+from backend.json_stream import RecommendationStreamParser
+from backend.llm_client import CircuitBreaker, LLMUnavailable, call_with_resilience
+from backend.fake_llm import FakeGeminiModel
+from backend.metrics import registry, span
+from types import SimpleNamespace
 
-DOT_ENV_PATH = "C:\\Projects\\game\\backend\\.env"
+# Varsayılan olarak backend/ klasöründen yukarı doğru ilk bulunan .env (backend/.env veya
+# proje kökündeki .env) okunur; ortam değişkenleri önceliklidir.
+DOT_ENV_PATH = os.getenv("NEXTGAME_DOTENV_PATH") or find_dotenv()
 
 load_dotenv(DOT_ENV_PATH)
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY ortam değişkeni bulunamadı. Lütfen ayarlayın.")
+# Gemini yerine yerel sahte model (backend/fake_llm.py); testler ve yük denemeleri için, anahtar gerekmez.
+LLM_FAKE = os.getenv("NEXTGAME_LLM_FAKE", "0") == "1"
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    # client = ai.Client(api_key=GEMINI_API_KEY, project="projects/854704284169")
-    MODEL_NAME = "gemini-2.5-flash"
-except:
-    raise ValueError("API Bağlantısı sağlanamadı. Lütfen kontrol edin!")
+MODEL_NAME = "gemini-2.5-flash"
+
+# Her Gemini isteğinin token sayılarını stdout'a yazar (hata ayıklama için). Sayılar her
+# durumda /llm/usage/ ve /metrics üzerinden okunabilir.
+LLM_LOG_USAGE = os.getenv("NEXTGAME_LLM_LOG_USAGE", "0") == "1"
+
+# Aynı anda Gemini'ye gönderilebilecek en fazla istek sayısı (async yol için).
+LLM_MAX_CONCURRENCY = int(os.getenv("NEXTGAME_LLM_MAX_CONCURRENCY", "8"))
+_llm_semaphore = None
+
+# /recommend/ için LLM bütçesi: yeniden denemeler dahil en fazla bu kadar beklenir, sonra
+# istek yedek sıralayıcıya düşer. HEDGE_AFTER saniyede yanıt gelmezse aynı istek bir kez
+# daha gönderilir (0: kapalı). Ardışık hatalarda devre kesici Gemini'yi bir süre hiç denemez.
+LLM_DEADLINE_SECONDS = float(os.getenv("NEXTGAME_LLM_DEADLINE", "10"))
+LLM_RETRIES = int(os.getenv("NEXTGAME_LLM_RETRIES", "1"))
+LLM_RETRY_BACKOFF = float(os.getenv("NEXTGAME_LLM_RETRY_BACKOFF", "0.25"))
+LLM_HEDGE_AFTER = float(os.getenv("NEXTGAME_LLM_HEDGE_AFTER", "5"))
+
+llm_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("NEXTGAME_LLM_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("NEXTGAME_LLM_BREAKER_RESET", "30")),
+)
+
+# Prompt veya sistem talimatı değiştiğinde artırılmalı; önbellekteki eski yanıtlar böylece kullanılmaz.
+PROMPT_VERSION = "3"
+
+# Sabit sistem talimatını Gemini tarafında önbelleğe al (context caching). Varsayılan kapalı:
+# önbellek ücretli bir kaynaktır ve talimat modelin asgari önbellek boyutunun altında kalabilir.
+LLM_CONTEXT_CACHE = os.getenv("NEXTGAME_LLM_CONTEXT_CACHE", "0") == "1"
+LLM_CONTEXT_CACHE_TTL = int(os.getenv("NEXTGAME_LLM_CONTEXT_CACHE_TTL", "3600"))
+_cached_model = None
+_cached_model_expires_at = 0.0
+_context_cache_failed = False
+_context_cache_lock = threading.Lock()
+
+# Gemini yanıtlarının usage_metadata alanından toplanan token sayaçları (/llm/usage/).
+llm_usage = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "unavailable": 0}
+_usage_lock = threading.Lock()
+
+# /metrics'teki tahmini maliyet için 1M token başına USD fiyatları (gemini-2.5-flash liste fiyatı).
+# Önbellekten gelen girdi token'ları ayrı, indirimli fiyattan sayılır.
+LLM_PRICE_INPUT = float(os.getenv("NEXTGAME_LLM_PRICE_INPUT", "0.30"))
+LLM_PRICE_CACHED = float(os.getenv("NEXTGAME_LLM_PRICE_CACHED", "0.075"))
+LLM_PRICE_OUTPUT = float(os.getenv("NEXTGAME_LLM_PRICE_OUTPUT", "2.50"))
+
+# Aynı aday listesi + dil için Gemini'ye tekrar gitmemek için önbellek.
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.getenv("NEXTGAME_LLM_CACHE_SIZE", "1024")),
+    ttl_seconds=int(os.getenv("NEXTGAME_LLM_CACHE_TTL", str(7 * 24 * 3600))),
+)
 
 SYSTEM_INSTRUCTION_EN = """
 You are the 'NextGame Curator', a knowledgeable, helpful, and enthusiastic virtual assistant specializing in video games. You have extensive knowledge of game genres, themes, tags, and player preferences, especially regarding games on platforms like Steam.
@@ -26,7 +81,7 @@ Your primary task is to analyze a list of candidate games provided to you, based
 1. Two games that are VERY SIMILAR to the user's liked game in terms of genre, theme, gameplay mechanics, or overall atmosphere. Label these as "Similar". Consider the provided genres and tags when making your selection.
 2. One game that is an INTERESTING ALTERNATIVE. It should be a game that someone who likes the user's game might enjoy, but offers something different or unexpected – perhaps a related subgenre, a unique take on familiar mechanics, or an indie gem they might have missed. Label this as "Alternative".
 
-You will be given the name of the user's liked game and a list containing the names, genres, and tags of the candidate games. Make your selections using ONLY the information from the provided candidate list. Do not invent games or details not present in the list.
+You will be given a numbered list of candidate games, one per line in the form "name" | genres | top tags | short description. The name is a quoted JSON string; copy it exactly into "game_name". Make your selections using ONLY the information from the provided candidate list. Do not invent games or details not present in the list. Consider factors like uniqueness, genre representation and potential appeal, and try to select a diverse set if possible.
 
 Your response MUST be ONLY a valid JSON object strictly adhering to the following schema. Do NOT include any introductory text, concluding sentences, markdown formatting (like ```json), or any other text outside the JSON structure.
 
@@ -60,22 +115,328 @@ SAFETY_SETTINGS = [
   {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
 ]
 
-model = genai.GenerativeModel(
-    model_name=MODEL_NAME,
-    safety_settings=SAFETY_SETTINGS,
-    generation_config=CONFIG, # type: ignore
-    system_instruction=SYSTEM_INSTRUCTION_EN
-)
+# Gemini istemcisi ilk kullanımda kurulur (bkz. get_model). Testler ve benchmark'lar
+# yerine kendi modellerini atayabilir.
+model = None
+_model_lock = threading.Lock()
 
-def get_llm_analysis_for_embedding(candidate_games : list[str], language : str = "en") -> list[dict]:
+
+def llm_configured() -> bool:
+    """
+    Bir model atanmış, sahte model seçilmiş veya API anahtarı tanımlı mı.
+    Anahtar yoksa sunucu yine açılır; öneriler yedek sıralayıcıdan gelir.
+    """
+    return model is not None or LLM_FAKE or bool(GEMINI_API_KEY)
+
+
+def get_model():
+    """
+    Gemini modelini ilk çağrıda kurup döndürür. google.generativeai'yi içe aktarmak tek başına
+    yaklaşık bir saniye sürdüğü için bu iş modül yüklenirken değil, uygulama açılışındaki
+    ısınmada (veya ilk LLM isteğinde) yapılır. Anahtar yoksa LLMUnavailable fırlatır.
+    """
+    global model
+
+    if model is not None:
+        return model
+
+    with _model_lock:
+        if model is None:
+            model = _create_model()
+        return model
+
+
+def _create_model():
+    if LLM_FAKE:
+        return FakeGeminiModel(
+            latency=float(os.getenv("NEXTGAME_LLM_FAKE_LATENCY", "0.05")),
+            failure_rate=float(os.getenv("NEXTGAME_LLM_FAKE_FAILURE_RATE", "0")),
+        )
+
+    if not GEMINI_API_KEY:
+        raise LLMUnavailable("GEMINI_API_KEY ortam değişkeni bulunamadı.")
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(
+        model_name=MODEL_NAME,
+        safety_settings=SAFETY_SETTINGS,
+        generation_config=CONFIG, # type: ignore
+        system_instruction=SYSTEM_INSTRUCTION_EN
+    )
+
+def get_llm_analysis_for_embedding(candidate_games : list[str], language : str = "en", use_cache : bool = True) -> list[dict]:
     """
     SentenceTransformer modelinin belirlediği embeddingten gelen verilerle
-    kullanıcıya 3 adet öneride bulunmasına sağlayan fonksiyon
+    kullanıcıya 3 adet öneride bulunmasına sağlayan fonksiyon.
+    Aynı aday listesi ve dil için önce önbelleğe bakar; use_cache=False önbelleği
+    atlayıp yanıtı yeniden üretir (ve önbelleği günceller).
     """
 
     if not candidate_games:
         return []
-    
+
+    cache_key = RecommendationCache.make_key(candidate_games, language, MODEL_NAME, PROMPT_VERSION)
+
+    if use_cache:
+        with span("llm.cache_lookup"):
+            cached = recommendation_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    recommendations = _generate_recommendations(candidate_games, language)
+
+    # Boş yanıtlar (hata) önbelleğe alınmaz, bir sonraki istek tekrar dener.
+    if recommendations:
+        recommendation_cache.set(cache_key, recommendations, candidate_games, language)
+
+    return recommendations
+
+
+async def get_llm_analysis_for_embedding_async(candidate_games : list[str], language : str = "en", use_cache : bool = True) -> list[dict]:
+    """
+    get_llm_analysis_for_embedding'in async sürümü. Önbelleğin SQLite katmanı
+    thread havuzunda, Gemini çağrısı generate_content_async ile yapılır;
+    böylece LLM yanıtı beklenirken event loop diğer istekleri (/search/) işlemeye devam eder.
+    """
+
+    if not candidate_games:
+        return []
+
+    cache_key = RecommendationCache.make_key(candidate_games, language, MODEL_NAME, PROMPT_VERSION)
+
+    if use_cache:
+        with span("llm.cache_lookup"):
+            cached = await asyncio.to_thread(recommendation_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+    recommendations = await _generate_recommendations_async(candidate_games, language)
+
+    if recommendations:
+        await asyncio.to_thread(recommendation_cache.set, cache_key, recommendations, candidate_games, language)
+
+    return recommendations
+
+
+async def stream_llm_analysis_for_embedding(candidate_games : list[str], language : str = "en", use_cache : bool = True):
+    """
+    get_llm_analysis_for_embedding_async'in akış sürümü (async generator). Gemini'nin
+    stream=True yanıtı parça parça okunur ve her öneri JSON nesnesi tamamlanır
+    tamamlanmaz üretilir; ilk öneri tüm yanıtı beklemeden ekrana gelebilir.
+    Önbellekte varsa öneriler hemen döner. Tam yanıt başarıyla ayrıştırılırsa önbelleğe yazılır.
+    """
+
+    if not candidate_games:
+        return
+
+    cache_key = RecommendationCache.make_key(candidate_games, language, MODEL_NAME, PROMPT_VERSION)
+
+    if use_cache:
+        with span("llm.cache_lookup"):
+            cached = await asyncio.to_thread(recommendation_cache.get, cache_key)
+        if cached is not None:
+            for recommendation in cached:
+                yield recommendation
+            return
+
+    if not llm_configured():
+        _record_unavailable("GEMINI_API_KEY tanımlı değil.")
+        return
+
+    if not llm_breaker.allow():
+        _record_unavailable("Devre açık, LLM çağrısı atlandı.")
+        return
+
+    prompt = _build_prompt(candidate_games, language)
+    parser = RecommendationStreamParser()
+    streamed = []
+
+    # Yeniden deneme yok (gönderilmiş öneriler geri alınamaz); tüm akış LLM_DEADLINE_SECONDS ile sınırlı.
+    loop = asyncio.get_running_loop()
+    ends_at = loop.time() + LLM_DEADLINE_SECONDS
+
+    response = None
+    try:
+        llm = await _get_model_async()
+        async with _get_llm_semaphore():
+            # Akışta llm.call ilk yanıt parçasına kadar geçen süredir.
+            with span("llm.call"):
+                response = await asyncio.wait_for(llm.generate_content_async(prompt, stream=True), timeout=ends_at - loop.time())
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=ends_at - loop.time())
+                except StopAsyncIteration:
+                    break
+                for recommendation in parser.feed(chunk.text):
+                    streamed.append(recommendation)
+                    yield recommendation
+
+        _record_usage(response)
+
+        recommendations = _parse_recommendations_text(parser.text)
+    except asyncio.TimeoutError:
+        llm_breaker.record_failure()
+        _record_unavailable(f"LLM akışı {LLM_DEADLINE_SECONDS:.1f} saniyede tamamlanmadı.")
+        return
+    except Exception as e:
+        llm_breaker.record_failure()
+        # Akış yarıda kesildiyse response.text okunamayabilir; o ana kadar gelen metni raporluyoruz.
+        _report_llm_error(e, SimpleNamespace(text=parser.text) if isinstance(e, json.JSONDecodeError) else response)
+        return
+    except BaseException:
+        # İstemci akışı bıraktı (GeneratorExit) veya görev iptal edildi: LLM hatası değil,
+        # ama yarı açık deneme hakkı serbest kalmalı.
+        llm_breaker.release_probe()
+        raise
+
+    llm_breaker.record_success()
+
+    # Artımlı ayrıştırıcının yakalayamadığı (ör. beklenmedik yapıdaki) öneriler de kaybolmasın.
+    for recommendation in recommendations[len(streamed):]:
+        yield recommendation
+
+    if recommendations:
+        await asyncio.to_thread(recommendation_cache.set, cache_key, recommendations, candidate_games, language)
+
+
+def _get_model():
+    """
+    İsteklerde kullanılacak modeli döndürür. NEXTGAME_LLM_CONTEXT_CACHE=1 ise sistem talimatı
+    Gemini tarafında bir kez önbelleğe alınır (CachedContent) ve süresi dolmadan yenilenir;
+    istekler talimatı tekrar göndermez. Önbellek oluşturulamazsa bir kez uyarılır ve normal
+    modele dönülür.
+    """
+    global _cached_model, _cached_model_expires_at, _context_cache_failed
+
+    base_model = get_model()
+    if not LLM_CONTEXT_CACHE or _context_cache_failed:
+        return base_model
+
+    with _context_cache_lock:
+        if _cached_model is None or time.monotonic() >= _cached_model_expires_at:
+            try:
+                import google.generativeai as genai
+
+                cached_content = genai.caching.CachedContent.create(
+                    model=f"models/{MODEL_NAME}",
+                    display_name="nextgame-curator",
+                    system_instruction=SYSTEM_INSTRUCTION_EN,
+                    ttl=timedelta(seconds=LLM_CONTEXT_CACHE_TTL),
+                )
+                _cached_model = genai.GenerativeModel.from_cached_content(
+                    cached_content=cached_content,
+                    generation_config=CONFIG, # type: ignore
+                    safety_settings=SAFETY_SETTINGS,
+                )
+                # Sunucu tarafında silinmeden önce yenilemek için süreyi biraz kısa tutuyoruz.
+                _cached_model_expires_at = time.monotonic() + LLM_CONTEXT_CACHE_TTL * 0.9
+            except Exception as e:
+                print(f"❗️ Gemini context cache oluşturulamadı, önbelleksiz devam ediliyor: {e}")
+                _context_cache_failed = True
+                return base_model
+
+        return _cached_model
+
+
+async def _get_model_async():
+    # Model kurulumu ve önbellek oluşturma/yenileme (ağ çağrısı) event loop'u bloklamasın.
+    if model is not None and (not LLM_CONTEXT_CACHE or _context_cache_failed):
+        return model
+    return await asyncio.to_thread(_get_model)
+
+
+def _record_usage(response) -> None:
+    """
+    Yanıtın usage_metadata alanındaki token sayılarını sayaçlara ekler. LLM_LOG_USAGE açıksa
+    istek başına bir satır da yazar.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+
+    with _usage_lock:
+        llm_usage["requests"] += 1
+        llm_usage["prompt_tokens"] += prompt_tokens
+        llm_usage["cached_tokens"] += cached_tokens
+        llm_usage["output_tokens"] += output_tokens
+
+    if LLM_LOG_USAGE:
+        print(f"Gemini isteği: {prompt_tokens} girdi token'ı ({cached_tokens} önbellekten), {output_tokens} çıktı token'ı.")
+
+
+def usage_stats() -> dict:
+    """
+    Toplam ve istek başına ortalama token sayıları, LLM'in kullanılamadığı istek sayısı
+    ve devre kesicinin durumu.
+    """
+    with _usage_lock:
+        stats = dict(llm_usage)
+
+    requests = stats["requests"] or 1
+    stats["avg_prompt_tokens"] = stats["prompt_tokens"] / requests
+    stats["avg_output_tokens"] = stats["output_tokens"] / requests
+    stats["cost_usd"] = estimated_cost(stats)
+    stats["circuit_breaker"] = llm_breaker.stats()
+    return stats
+
+
+def estimated_cost(usage : dict) -> float:
+    """
+    Token sayaçlarından LLM_PRICE_* fiyatlarıyla tahmini toplam maliyet (USD).
+    """
+    uncached = usage["prompt_tokens"] - usage["cached_tokens"]
+    return (uncached * LLM_PRICE_INPUT + usage["cached_tokens"] * LLM_PRICE_CACHED
+            + usage["output_tokens"] * LLM_PRICE_OUTPUT) / 1_000_000
+
+
+def _usage_snapshot() -> dict:
+    with _usage_lock:
+        return dict(llm_usage)
+
+
+# /metrics: sayaçlar zaten llm_usage ve önbellekte tutuluyor, okuma anında dışa verilir.
+registry.collected("nextgame_llm_requests_total", "Answered LLM requests.", "counter",
+                   lambda: {(): _usage_snapshot()["requests"]})
+registry.collected("nextgame_llm_tokens_total", "LLM tokens by kind (cached is part of prompt).", "counter",
+                   lambda: {(kind,): _usage_snapshot()[f"{kind}_tokens"] for kind in ("prompt", "cached", "output")},
+                   labelnames=["kind"])
+registry.collected("nextgame_llm_cost_usd_total", "Estimated LLM cost from token counts and NEXTGAME_LLM_PRICE_*.", "counter",
+                   lambda: {(): estimated_cost(_usage_snapshot())})
+registry.collected("nextgame_llm_unavailable_total", "Requests answered by the fallback ranker because the LLM was unavailable.", "counter",
+                   lambda: {(): _usage_snapshot()["unavailable"]})
+registry.collected("nextgame_llm_circuit_state", "LLM circuit breaker state (1 for the current state).", "gauge",
+                   lambda: {(state,): int(state == llm_breaker.state) for state in ("closed", "open", "half_open")},
+                   labelnames=["state"])
+registry.collected("nextgame_recommendation_cache_lookups_total", "Recommendation cache lookups by result.", "counter",
+                   lambda: {(result,): recommendation_cache.counters[key]
+                            for result, key in (("memory_hit", "memory_hits"), ("db_hit", "db_hits"), ("miss", "misses"))},
+                   labelnames=["result"])
+registry.collected("nextgame_recommendation_cache_hit_ratio", "Share of recommendation cache lookups that were hits.", "gauge",
+                   lambda: {(): recommendation_cache.stats()["hit_ratio"]})
+registry.collected("nextgame_recommendation_cache_memory_entries", "Entries in the in-memory recommendation cache.", "gauge",
+                   lambda: {(): len(recommendation_cache._memory)})
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    # Semafor ilk kullanımda oluşturulur ki çalışan event loop'a bağlansın.
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+
+def _build_prompt(candidate_games : list[str], language : str) -> str:
+    """
+    Aday kayıtlarından (bkz. prompt_builder.compact_candidate) ve dilden Gemini'ye
+    gönderilecek prompt'u oluşturur.
+    """
 
     # Dil'e göre değişecek kısımlar
     if language == "tr":
@@ -88,72 +449,150 @@ def get_llm_analysis_for_embedding(candidate_games : list[str], language : str =
         output_language_instruction = "Ensure the 'match_reason' and 'user_note' fields are in English."
 
 
-    prompt = f"""
-    Analyze the detailed descriptions of the 20 candidate games provided below. Based *solely* on these descriptions, select exactly 3 games that stand out as particularly interesting or high-quality recommendations.
+    # Sabit kısımlar başta, değişen aday listesi sonda: Gemini'nin ortak prompt başlangıcını
+    # önbelleğe alabilmesi (implicit caching) için. Çıktı şeması sistem talimatında.
+    candidate_lines = "\n".join(f"{number}. {candidate}" for number, candidate in enumerate(candidate_games, start=1))
+
+    prompt = f"""{output_language_instruction}
+match_reason: {reason_instruction}
+user_note: {note_instruction}
+
+Candidate games ("name" | genres | top tags | short description):
+{candidate_lines}
+"""
+
+    return prompt
+
+
+def _parse_recommendations(response) -> list[dict]:
+    """
+    Model yanıtındaki JSON'u ayrıştırıp öneri listesini döndürür.
+    JSON bozuksa json.JSONDecodeError fırlatır.
+    """
+    return _parse_recommendations_text(response.text)
+
+
+def _parse_recommendations_text(response_text : str) -> list[dict]:
+    response_text = response_text.strip()
+
+    if response_text.startswith("```json"):
+        response_text = response_text[len("```json"):].strip()
+    if response_text.endswith("```"):
+        response_text = response_text[:-len("```")].strip()
+    
+    result_json = json.loads(response_text)
+    
+    recomendations = result_json.get("recommendations", [])
+
+    return recomendations
 
-    Consider factors like uniqueness, genre representation, potential appeal based on common gaming interests suggested by the descriptions, etc. Try to select a diverse set if possible.
 
-    Candidate Games (Full Details - Analyze each text carefully):
-    {candidate_games}
-    {output_language_instruction}
-    Required Output Format (VALID JSON ONLY - no extra text before or after):
-    {{
-    "recommendations": [
-        {{
-        "game_name": "The Exact Name of the Chosen Game (Extract accurately from the text provided for the candidate)",
-        "type": "Interesting", // 'type' alanını şimdilik genel tutalım
-        "match_reason": "{reason_instruction}",
-        "user_note": "{note_instruction}"
-        }},
-        // Exactly two more recommendation objects following this structure
-    ]
-    }}
+def _generate_recommendations(candidate_games : list[str], language : str) -> list[dict]:
     """
+    Gemini'ye isteği gönderip JSON yanıtındaki önerileri döndürür. Hata olursa boş liste döner.
+    """
+    prompt = _build_prompt(candidate_games, language)
 
     response = None
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-
-        if response_text.startswith("```json"):
-            response_text = response_text[len("```json"):].strip()
-        if response_text.endswith("```"):
-            response_text = response_text[:-len("```")].strip()
-        
-        result_json = json.loads(response_text)
-        
-        recomendations = result_json.get("recommendations", [])
-
-        return recomendations
-    except json.JSONDecodeError as json_err:
+        with span("llm.call"):
+            response = _get_model().generate_content(prompt)
+        _record_usage(response)
+        with span("llm.parse"):
+            return _parse_recommendations(response)
+    except Exception as e:
+        return _report_llm_error(e, response)
+
+
+async def _generate_recommendations_async(candidate_games : list[str], language : str) -> list[dict]:
+    """
+    _generate_recommendations'ın event loop'u bloklamayan sürümü. Aynı anda en fazla
+    LLM_MAX_CONCURRENCY istek Gemini'ye gider, fazlası sırada bekler.
+    Çağrı LLM_DEADLINE_SECONDS içinde biter: hata veya bozuk JSON'da kalan süre içinde
+    yeniden denenir, yavaş denemeye paralel kopya gönderilir (hedge). Başaramazsa boş
+    liste döner ve çağıran taraf yedek sıralayıcıya geçer.
+    """
+    if not llm_configured():
+        _record_unavailable("GEMINI_API_KEY tanımlı değil.")
+        return []
+
+    prompt = _build_prompt(candidate_games, language)
+    semaphore = _get_llm_semaphore()
+
+    async def attempt() -> list[dict]:
+        response = None
+        try:
+            llm = await _get_model_async()
+            with span("llm.queue"):
+                await semaphore.acquire()
+            try:
+                with span("llm.call"):
+                    response = await llm.generate_content_async(prompt)
+            finally:
+                semaphore.release()
+            _record_usage(response)
+            with span("llm.parse"):
+                recommendations = _parse_recommendations(response)
+        except Exception as e:
+            _report_llm_error(e, response)
+            raise
+
+        if not recommendations:
+            raise ValueError("LLM yanıtında öneri yok.")
+        return recommendations
+
+    try:
+        return await call_with_resilience(
+            attempt,
+            deadline=LLM_DEADLINE_SECONDS,
+            retries=LLM_RETRIES,
+            backoff=LLM_RETRY_BACKOFF,
+            hedge_after=LLM_HEDGE_AFTER or None,
+            breaker=llm_breaker,
+        )
+    except LLMUnavailable as e:
+        _record_unavailable(str(e))
+        return []
+
+
+def _record_unavailable(reason : str) -> None:
+    with _usage_lock:
+        llm_usage["unavailable"] += 1
+    print(f"❗️ LLM kullanılamadı, yedek öneriler kullanılacak: {reason}")
+
+
+def _report_llm_error(error : Exception, response) -> list[dict]:
+    """
+    LLM hatasını ayrıntılarıyla yazdırır ve güvenli bir şekilde boş liste döndürür.
+    """
+    if isinstance(error, json.JSONDecodeError):
         # JSON ayrıştırma sırasında hata olursa burası çalışır
         print(f"❗️ HATA: LLM yanıtı geçerli bir JSON formatında değil veya bozuk.")
-        print(f"   Detay: {json_err}")
+        print(f"   Detay: {error}")
         print(f"   Alınan Ham Yanıt:\n---\n{response.text}\n---")
         # Güvenli bir şekilde boş liste döndür
         return []
 
-    except Exception as e:
-        # API isteği veya başka beklenmedik bir hata olursa burası çalışır
-        print(f"❗️ LLM isteği sırasında genel bir hata oluştu: {e}")
-        # Hata nedenini daha detaylı görmek için prompt_feedback'i kontrol et (varsa)
-        try:
-            if response is None:
-                print("   Prompt Feedback")
-                return []
-            print("   Prompt Feedback:", response.prompt_feedback)
-        except AttributeError:
-            pass # Eğer response objesi oluşmadıysa veya feedback yoksa
-        try:
-            if response is None:
-                print("   Any Error, Not Feedback")
-                return []
-
-            # v1beta için güvenlik ve bitiş nedeni kontrolü
-            if hasattr(response, 'candidates') and response.candidates:
-                print("   Finish Reason:", response.candidates[0].finish_reason)
-                print("   Safety Ratings:", response.candidates[0].safety_ratings)
-        except AttributeError:
-             pass
-        # Güvenli bir şekilde boş liste döndür
-        return []
\ No newline at end of file
+    # API isteği veya başka beklenmedik bir hata olursa burası çalışır
+    print(f"❗️ LLM isteği sırasında genel bir hata oluştu: {error}")
+    # Hata nedenini daha detaylı görmek için prompt_feedback'i kontrol et (varsa)
+    try:
+        if response is None:
+            print("   Prompt Feedback")
+            return []
+        print("   Prompt Feedback:", response.prompt_feedback)
+    except AttributeError:
+        pass # Eğer response objesi oluşmadıysa veya feedback yoksa
+    try:
+        if response is None:
+            print("   Any Error, Not Feedback")
+            return []
+
+        # v1beta için güvenlik ve bitiş nedeni kontrolü
+        if hasattr(response, 'candidates') and response.candidates:
+            print("   Finish Reason:", response.candidates[0].finish_reason)
+            print("   Safety Ratings:", response.candidates[0].safety_ratings)
+    except AttributeError:
+         pass
+    # Güvenli bir şekilde boş liste döndür
+    return []
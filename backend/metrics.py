@@ -0,0 +1,203 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+
+# Saniye cinsinden histogram kova sınırları: 0.5 ms'lik DB sorgusundan 30 s'lik LLM çağrısına.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# İstek başına profil: istemci bu başlığı gönderirse yanıtta aşama süreleri Server-Timing
+# başlığıyla döner (tarayıcı geliştirici araçları da gösterir). NEXTGAME_PROFILING=0 kapatır.
+PROFILE_HEADER = b"x-nextgame-profile"
+PROFILING_ENABLED = os.getenv("NEXTGAME_PROFILING", "1") == "1"
+
+_profile: ContextVar[Optional[list]] = ContextVar("nextgame_profile", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """
+    Sabit kovalı, kilitli ve bağımlılıksız Prometheus histogramı. observe() bir bisect
+    ve kısa bir kilitten ibarettir; sıcak yolda güvenle çağrılabilir.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # etiket değerleri -> [kova sayıları, toplam, adet]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labelnames, labels)
+            inf_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{series_labels} {total}")
+            lines.append(f"{self.name}_count{series_labels} {count}")
+        return lines
+
+
+class Collected:
+    """
+    Değeri sadece /metrics okunurken hesaplanan metrik (ör. önbellek ve token sayaçları
+    zaten başka modüllerde tutuluyor). 'collect' {etiket değerleri: değer} döndürür.
+    """
+
+    def __init__(self, name: str, documentation: str, metric_type: str, collect: Callable[[], dict], labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in sorted(self.collect().items())]
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collected(self, name: str, documentation: str, metric_type: str, collect: Callable[[], dict], labelnames=()) -> Collected:
+        return self.register(Collected(name, documentation, metric_type, collect, labelnames))
+
+    def render(self) -> str:
+        """Prometheus metin biçimi (text/plain; version=0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            try:
+                lines += metric.render()
+            except Exception as e:
+                # Bir toplayıcının hatası tüm /metrics yanıtını bozmasın.
+                print(f"Uyarı: {metric.name} metriği okunamadı. Hata: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "nextgame_stage_duration_seconds", "Duration of each stage of the search and recommend paths.", ["stage"])
+REQUEST_SECONDS = registry.histogram(
+    "nextgame_http_request_duration_seconds", "HTTP request duration by route, method and status.", ["route", "method", "status"])
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Bloğun süresini 'nextgame_stage_duration_seconds{stage=...}' histogramına yazar;
+    istek profil başlığıyla geldiyse Server-Timing için de kaydeder.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        profile = _profile.get()
+        if profile is not None:
+            profile.append((stage, elapsed))
+
+
+def server_timing(profile: list, total: float) -> str:
+    """Aşama sürelerini (aynı aşama birden çok kez çalıştıysa toplamını) Server-Timing değerine çevirir."""
+    durations, counts = {}, {}
+    for stage, elapsed in profile:
+        durations[stage] = durations.get(stage, 0.0) + elapsed
+        counts[stage] = counts.get(stage, 0) + 1
+
+    entries = [
+        f'{stage};dur={duration * 1000:.2f}' + (f';desc="x{counts[stage]}"' if counts[stage] > 1 else "")
+        for stage, duration in durations.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    Her HTTP isteğinin süresini rota şablonuna göre (/recommend/ gibi; ham yol değil, böylece
+    etiket sayısı sınırlı kalır) kaydeden ASGI ara katmanı. İstek 'X-NextGame-Profile: 1'
+    başlığını taşıyorsa aşama süreleri yanıta 'Server-Timing' başlığı olarak eklenir.
+    Akışlı yanıtlarda başlık ilk bayttan önce gönderildiği için sadece o ana kadarki aşamalar görünür.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wants_profile = PROFILING_ENABLED and any(
+            name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope.get("headers", ())
+        )
+        profile = [] if wants_profile else None
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(profile, time.perf_counter() - start).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _profile.reset(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, getattr(route, "path", None) or "other", scope["method"], str(status))
@@ -0,0 +1,66 @@
+import json
+import math
+import re
+from typing import Optional
+
+
+# Aday başına Gemini'ye giden en fazla etiket sayısı ve açıklama bütçesi (yaklaşık token)
+MAX_TAGS = 8
+DESCRIPTION_TOKEN_BUDGET = 60
+
+# Gemini tokenizer'ı için kaba ama yeterli yaklaşım: İngilizce metinde ~4 karakter = 1 token.
+# Gerçek sayı her istekte yanıtın usage_metadata alanından okunur.
+CHARS_PER_TOKEN = 4
+
+
+# text_for_embedding içindeki "Genres: ..." gibi etiketli alanlar; kayıtta zaten ayrı
+# alan olarak bulundukları için açıklama bütçesini harcamasınlar diye çıkarılır.
+_LABELLED_FIELD = re.compile(r"\b(?:Name|Title|Genres?|Tags?|Categories|Developers?|Publishers?)\s*:\s*[^.]*\.\s*", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Metni yaklaşık 'budget' token'a kelime sınırından keser, kesildiyse sonuna '…' ekler.
+    """
+    text = " ".join((text or "").split())
+    limit = budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def _description(text: str) -> str:
+    stripped = _LABELLED_FIELD.sub(" ", text)
+    stripped = re.sub(r"^\s*(?:Description|About)\s*:\s*", "", stripped.strip(), flags=re.IGNORECASE)
+    return stripped
+
+
+def _labels(text: Optional[str], limit: Optional[int] = None) -> str:
+    labels = [label.strip() for label in (text or "").split(",") if label.strip()]
+    return ", ".join(labels[:limit])
+
+
+def compact_candidate(name: str, genres: Optional[str], tags: Optional[str], text: Optional[str],
+                      max_tags: int = MAX_TAGS, description_tokens: int = DESCRIPTION_TOKEN_BUDGET) -> str:
+    """
+    Bir aday oyunu prompt'a girecek tek satırlık kayda çevirir:
+        "ad" | türler | en önemli etiketler | kısaltılmış açıklama
+    Ad JSON dizgisi olarak tırnaklanır, değiştirilmez: içinde '|' geçse de alanlar karışmaz
+    ve model game_name'e gerçek adı aynen yazar.
+    Etiketler veri setindeki sırayla (oy sayısına göre) gelir, ilk 'max_tags' tanesi alınır.
+    Açıklama olarak text_for_embedding, ayrı alanlarda gönderilen ad/tür/etiket kısımları
+    çıkarıldıktan sonra 'description_tokens' bütçesine kırpılır.
+    """
+    fields = [
+        json.dumps((name or "").strip(), ensure_ascii=False),
+        _labels(genres),
+        _labels(tags, max_tags),
+        truncate_to_tokens(_description(text or ""), description_tokens).replace("|", "/"),
+    ]
+    return " | ".join(fields)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+# Dosya düzeni (örnek: NEXTGAME_VECTOR_FILE=database/embeddings.npy):
+#   embeddings.json                  -> biçim sürümü, katalog sürümü, boyutlar, sha256 özeti ve
+#                                       aşağıdaki iki veri dosyasının adı
+#   embeddings.<sha256[:16]>.npy     -> (n, dim) L2-normalize float32 matris, .npy başlığı 64 bayta hizalı
+#   embeddings.<sha256[:16]>.appids.npy -> (n,) int64 appid dizisi, matris satırlarıyla aynı sırada
+#   embeddings.lock                  -> yazma sırasında var; tek yazar seçmek için (bkz. writer_lock)
+#
+# Veri dosyalarının adı içeriklerinin özetidir ve yazıldıktan sonra değişmez. Yayınlama tek bir
+# os.replace ile manifestin değiştirilmesidir: okuyucu ya eski ya yeni sürümün tamamını görür,
+# iki yazarın dosyaları birbirine karışamaz.
+VECTOR_FILE_FORMAT_VERSION = 2
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def _data_paths(path: Path, manifest: dict) -> tuple[Path, Path]:
+    return path.with_name(manifest["matrix_file"]), path.with_name(manifest["appids_file"])
+
+
+def _checksum(appids: np.ndarray, matrix: np.ndarray, chunk_rows: int = 65_536) -> str:
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(appids).tobytes())
+    for start in range(0, len(matrix), chunk_rows):
+        digest.update(np.ascontiguousarray(matrix[start:start + chunk_rows]).tobytes())
+    return digest.hexdigest()
+
+
+@contextmanager
+def writer_lock(path, timeout: float = 30.0, stale_after: float = 600.0):
+    """
+    Vektör dosyasını aynı anda tek bir sürecin yazmasını sağlar: kilit, O_CREAT | O_EXCL ile
+    oluşturulan .lock dosyasıdır. Kilit başka bir süreçteyse 'timeout' saniye beklenir, sonra
+    TimeoutError yükselir. Çöken bir yazarın bıraktığı, 'stale_after' saniyeden eski kilit silinir.
+    """
+    lock_path = Path(path).with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > stale_after:
+                    print(f"Uyarı: {lock_path} eski bir yazardan kalmış, siliniyor.")
+                    lock_path.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{lock_path} {timeout:.0f} saniyede alınamadı.")
+            time.sleep(0.05)
+
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def write_vector_file(path, appids: np.ndarray, matrix: np.ndarray, catalog_version: int) -> dict:
+    """
+    Normalize embedding matrisini ve appid dizisini diske yazıp manifesti yeni dosyalara çevirir.
+
+    Veri dosyaları geçici isimlerle yazılıp içerik özetli isimlerine taşınır, ardından manifest
+    tek bir os.replace ile değiştirilir. Eski veri dosyaları silinir; onları mmap ile açmış
+    süreçler kapatana kadar okumaya devam eder. Çağıran taraf writer_lock'u tutmalıdır.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    appids = np.ascontiguousarray(appids, dtype=np.int64)
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+    checksum = _checksum(appids, matrix)
+    manifest = {
+        "format_version": VECTOR_FILE_FORMAT_VERSION,
+        "catalog_version": int(catalog_version),
+        "count": int(len(appids)),
+        "dim": int(matrix.shape[1]),
+        "dtype": "float32",
+        "normalized": True,
+        "sha256": checksum,
+        "matrix_file": f"{path.stem}.{checksum[:16]}.npy",
+        "appids_file": f"{path.stem}.{checksum[:16]}.appids.npy",
+    }
+    matrix_path, appids_path = _data_paths(path, manifest)
+    manifest_path = _manifest_path(path)
+
+    suffix = f".{os.getpid()}.tmp"
+    if not matrix_path.exists():
+        tmp_matrix = matrix_path.with_name(matrix_path.name + suffix)
+        out = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=np.float32, shape=matrix.shape)
+        out[:] = matrix
+        out.flush()
+        del out
+        os.replace(tmp_matrix, matrix_path)
+
+    if not appids_path.exists():
+        tmp_appids = appids_path.with_name(appids_path.name + suffix)
+        with open(tmp_appids, "wb") as f:
+            np.save(f, appids)
+        os.replace(tmp_appids, appids_path)
+
+    tmp_manifest = manifest_path.with_name(manifest_path.name + suffix)
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+
+    for old in path.parent.glob(f"{path.stem}.*.npy"):
+        if old not in (matrix_path, appids_path):
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    return manifest
+
+
+def read_manifest(path) -> Optional[dict]:
+    manifest_path = _manifest_path(Path(path))
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def open_vector_file(path, expected_version: Optional[int] = None, dim: Optional[int] = None,
+                     verify_checksum: bool = False) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+    Vektör dosyasını salt-okunur np.memmap olarak açar.
+
+    Aynı dosyayı açan tüm worker süreçleri işletim sisteminin page cache'indeki
+    aynı sayfaları paylaşır, süreç başına kopya oluşmaz.
+
+    Dosya yoksa, katalog sürümü 'expected_version' ile uyuşmuyorsa, boyutlar
+    tutmuyorsa veya (istenirse) sha256 özeti bozuksa None döner. 'path' yapılandırılan
+    adtır (örn. embeddings.npy); hangi veri dosyalarının açılacağını manifest söyler.
+    """
+    path = Path(path)
+
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+
+    if manifest.get("format_version") != VECTOR_FILE_FORMAT_VERSION:
+        print(f"Uyarı: {path} desteklenmeyen biçim sürümünde ({manifest.get('format_version')}).")
+        return None
+
+    if expected_version is not None and manifest.get("catalog_version") != expected_version:
+        print(f"Uyarı: {path} eski (dosya sürümü {manifest.get('catalog_version')}, katalog sürümü {expected_version}).")
+        return None
+
+    matrix_path, appids_path = _data_paths(path, manifest)
+    try:
+        matrix = np.load(matrix_path, mmap_mode="r")
+        appids = np.load(appids_path)
+    except FileNotFoundError:
+        # Manifest okunduktan sonra daha yeni bir sürüm yayınlanıp bu dosyalar silinmiş olabilir.
+        print(f"Uyarı: {path} okunurken yeni bir sürüm yayınlandı, dosya şimdilik kullanılmıyor.")
+        return None
+
+    if matrix.dtype != np.float32 or matrix.ndim != 2 or len(matrix) != manifest["count"] \
+            or len(appids) != manifest["count"] or (dim is not None and matrix.shape[1] != dim):
+        print(f"Uyarı: {path} manifest ile uyuşmuyor, yok sayılıyor.")
+        return None
+
+    if verify_checksum and _checksum(appids, matrix) != manifest["sha256"]:
+        print(f"Uyarı: {path} sha256 özeti tutmuyor, dosya bozuk olabilir.")
+        return None
+
+    return appids, matrix
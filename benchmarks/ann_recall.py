@@ -0,0 +1,100 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.ann_index import IVFIndex
+from backend.embedding_store import EmbeddingStore
+from benchmarks.synthetic import clustered_embeddings
+
+# Recall@k of the IVF index against exact brute-force search, for a sweep of nprobe values.
+#
+#   python -m benchmarks.ann_recall --synthetic 100000
+#   python -m benchmarks.ann_recall --from-db
+#
+# Pick the smallest nprobe whose recall is acceptable and set NEXTGAME_ANN_NPROBE.
+
+
+def load_vectors(args):
+    if args.from_db:
+        from database.db import SessionLocal
+        from backend.crud import EMBEDDING_DIM, EMBEDDING_DTYPE
+
+        store = EmbeddingStore(dim=EMBEDDING_DIM, dtype=EMBEDDING_DTYPE)
+        db = SessionLocal()
+        try:
+            store.load(db)
+        finally:
+            db.close()
+        return store.arrays()
+
+    vectors = clustered_embeddings(args.synthetic, seed=args.seed)
+    return np.arange(len(vectors), dtype=np.int64), vectors
+
+
+def exact_top_k(matrix, query_rows, k):
+    results = []
+    for row in query_rows:
+        scores = matrix @ matrix[row]
+        scores[row] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        results.append(set(top.tolist()))
+    return results
+
+
+def run(args):
+    appids, matrix = load_vectors(args)
+    n = len(appids)
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(n, size=min(args.queries, n), replace=False)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(appids, matrix, nlist=args.nlist)
+    build_seconds = time.perf_counter() - start
+    print(f"N={n}  nlist={index.nlist}  build={build_seconds:.2f}s")
+
+    # Compare on row positions so synthetic and real appids are handled the same way.
+    row_of = {int(appid): row for row, appid in enumerate(appids)}
+    truth = exact_top_k(matrix, query_rows, args.k)
+
+    start = time.perf_counter()
+    exact_top_k(matrix, query_rows, args.k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(query_rows)
+    print(f"exact        recall@{args.k}=1.0000  latency={exact_ms:.3f} ms/query")
+
+    results = {"n": n, "nlist": index.nlist, "k": args.k, "build_seconds": build_seconds,
+               "exact_ms_per_query": exact_ms, "sweep": []}
+
+    for nprobe in args.nprobe:
+        hits = 0
+        start = time.perf_counter()
+        found_all = [index.search(matrix[row], top_n=args.k, nprobe=nprobe, exclude_appid=int(appids[row]))[0]
+                     for row in query_rows]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(query_rows)
+
+        for expected, found in zip(truth, found_all):
+            hits += len(expected & {row_of[appid] for appid in found})
+
+        recall = hits / (args.k * len(query_rows))
+        print(f"nprobe={nprobe:<5} recall@{args.k}={recall:.4f}  latency={latency_ms:.3f} ms/query")
+        results["sweep"].append({"nprobe": nprobe, "recall": recall, "ms_per_query": latency_ms})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k vs. exact search benchmark for the IVF index.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=50_000, help="Number of synthetic vectors to generate.")
+    source.add_argument("--from-db", action="store_true", help="Use the embeddings in the games table.")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    run(parser.parse_args())
@@ -0,0 +1,80 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.autocomplete import AutocompleteIndex
+
+# Lookup latency of the in-memory autocomplete index on a synthetic catalogue.
+#
+#   python -m benchmarks.autocomplete_bench --titles 100000
+
+WORDS = ["dark", "souls", "star", "wars", "legend", "quest", "city", "skylines", "dungeon", "racing",
+         "farm", "simulator", "space", "empire", "island", "zombie", "puzzle", "knight", "galaxy",
+         "witcher", "hunt", "wild", "tales", "shadow", "dragon", "age", "fallout", "portal", "craft",
+         "kingdom", "heroes", "battle", "royale", "pixel", "dungeon", "escape", "room", "tower", "defense"]
+
+
+def synthetic_titles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    titles = []
+    for i in range(n):
+        words = rng.choice(WORDS, size=rng.integers(1, 5), replace=False)
+        title = " ".join(word.capitalize() for word in words)
+        if rng.random() < 0.3:
+            title = "The " + title
+        if rng.random() < 0.2:
+            title += f" {rng.integers(2, 5)}"
+        titles.append((i + 1, f"{title} #{i}", None, float(rng.pareto(1.5) * 100)))
+    return titles
+
+
+def measure(index, queries, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, limit=10)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    arr = np.asarray(latencies)
+    return {"p50_us": float(np.percentile(arr, 50)), "p99_us": float(np.percentile(arr, 99)), "max_us": float(arr.max())}
+
+
+def run(args):
+    rows = synthetic_titles(args.titles)
+
+    index = AutocompleteIndex(fuzzy=not args.no_fuzzy)
+    start = time.perf_counter()
+    index.build(rows)
+    build_seconds = time.perf_counter() - start
+    print(f"titles={args.titles} build={build_seconds:.2f}s")
+
+    query_sets = {
+        "prefix": ["the wi", "dark so", "star", "the d", "kingdom he", "pi"],
+        "word_start": ["witcher", "souls", "hunt", "royale 3", "defense", "simul"],
+        "typo": ["wticher", "dragn age", "kingdon", "fallot", "simulater"],
+    }
+
+    results = {"titles": args.titles, "build_seconds": build_seconds}
+    for name, queries in query_sets.items():
+        results[name] = measure(index, queries, args.repeat)
+        r = results[name]
+        print(f"{name:<11} p50={r['p50_us']:.0f}us p99={r['p99_us']:.0f}us max={r['max_us']:.0f}us")
+
+    for query in ("witcher", "wticher"):
+        print(f"  {query!r} -> {[item['name'] for item in index.search(query, limit=3)]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Autocomplete index lookup benchmark.")
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--no-fuzzy", action="store_true")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    run(parser.parse_args())
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.search_under_recommend_load import FakeModel
+
+# N separate /recommend/ calls vs. one /recommend/batch/ call for the same N seed games,
+# against the real FastAPI app, a temporary synthetic SQLite database and a fake LLM.
+#
+#   python -m benchmarks.batch_recommend --games 50000 --seeds 10
+#
+# Reports wall time and the number of LLM calls for both, plus the raw similarity cost
+# (N matrix-vector products vs. one blocked matrix-matrix product).
+
+
+class CountingModel(FakeModel):
+    def __init__(self, latency: float):
+        super().__init__(latency, blocking=False)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        return await super().generate_content_async(prompt)
+
+
+def time_it(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["NEXTGAME_ANN_INDEX_PATH"] = f"{tmp_dir}/ann_index.npz"
+    os.environ["NEXTGAME_VECTOR_FILE"] = f"{tmp_dir}/embeddings.npy"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    import httpx
+    import main as app_module
+    from backend import llm_responses
+    from backend.crud import embedding_store
+    from database.db import SessionLocal
+    from benchmarks.synthetic import populate_synthetic_db
+    from database.create_db import create_tables
+
+    create_tables()  # the app itself creates them in its lifespan hook
+    db = SessionLocal()
+    try:
+        names = populate_synthetic_db(db, args.games)
+        embedding_store.ensure_fresh(db)
+    finally:
+        db.close()
+
+    model = CountingModel(args.llm_latency)
+    llm_responses.model = model
+    llm_responses.recommendation_cache.persistent = False
+    llm_responses.recommendation_cache.max_entries = 0
+
+    rng = np.random.default_rng(0)
+    seeds = [names[i] for i in rng.choice(len(names), size=args.seeds, replace=False)]
+    seed_appids = [names.index(name) + 1 for name in seeds]
+
+    results = {"games": args.games, "seeds": args.seeds, "similarity_ms": {
+        "separate": time_it(lambda: [embedding_store.most_similar(appid, top_n=20) for appid in seed_appids], args.repeat),
+        "batch_rrf": time_it(lambda: embedding_store.most_similar_to_many(seed_appids, top_n=20, method="rrf"), args.repeat),
+        "batch_mean": time_it(lambda: embedding_store.most_similar_to_many(seed_appids, top_n=20, method="mean"), args.repeat),
+    }}
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        model.calls = 0
+        start = time.perf_counter()
+        # What a "because you played X, Y, Z" page did before: one request per seed.
+        responses = await asyncio.gather(*[client.get("/recommend/", params={"game_name": name}) for name in seeds])
+        results["separate"] = {"wall_ms": (time.perf_counter() - start) * 1000, "llm_calls": model.calls,
+                               "ok": all(r.status_code == 200 for r in responses)}
+
+        model.calls = 0
+        start = time.perf_counter()
+        response = await client.get("/recommend/batch/", params={"game_names": seeds})
+        results["batch"] = {"wall_ms": (time.perf_counter() - start) * 1000, "llm_calls": model.calls,
+                            "ok": response.status_code == 200}
+
+    for name, ms in results["similarity_ms"].items():
+        print(f"similarity {name:<10} {ms:8.2f} ms")
+    for name in ("separate", "batch"):
+        r = results[name]
+        print(f"{name:<9} wall={r['wall_ms']:.0f}ms llm_calls={r['llm_calls']} ok={r['ok']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Separate vs. batch recommendation cost for N seed games.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM response time in seconds.")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    asyncio.run(main(parser.parse_args()))
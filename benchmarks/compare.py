@@ -0,0 +1,71 @@
+import argparse
+import json
+import re
+import sys
+
+# Compares two benchmark JSON files (benchmarks.suite, micro, load_test, ...) and
+# flags regressions:
+#
+#   python -m benchmarks.compare before.json after.json --threshold 0.10
+#
+# Latency metrics (p50/p95/p99 in ms) regress when they grow, throughput metrics
+# (*_per_sec) when they shrink, by more than --threshold (relative). The exit code is 1
+# if anything regressed, so the command can gate a CI job.
+
+DEFAULT_METRICS = r"(p50|p95|p99)_ms$|_per_sec$"
+
+
+def flatten(data, prefix="") -> dict:
+    items = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            items.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            items[path] = float(value)
+    return items
+
+
+def compare(before: dict, after: dict, threshold: float, pattern: str = DEFAULT_METRICS) -> list[dict]:
+    metric = re.compile(pattern)
+    old, new = flatten(before), flatten(after)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        if key.startswith(("environment.", "config.")) or not metric.search(key) or old[key] == 0:
+            continue
+        change = (new[key] - old[key]) / old[key]
+        higher_is_better = key.endswith("_per_sec")
+        worse = -change if higher_is_better else change
+        rows.append({"metric": key, "before": old[key], "after": new[key], "change": change,
+                     "regression": worse > threshold, "improvement": worse < -threshold})
+    return rows
+
+
+def main(args) -> int:
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    if before.get("config") != after.get("config"):
+        print("Warning: the runs used different settings; the comparison may be meaningless.")
+    commits = (before.get("environment", {}).get("commit"), after.get("environment", {}).get("commit"))
+    print(f"before={commits[0]} after={commits[1]} threshold={args.threshold:.0%}")
+
+    rows = compare(before, after, args.threshold, args.metrics)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ("improved" if row["improvement"] else "")
+        print(f"  {row['metric']:<62} {row['before']:10.3f} -> {row['after']:10.3f} {row['change']:+7.1%} {flag}")
+
+    regressions = [row for row in rows if row["regression"]]
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON files and report regressions.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression.")
+    parser.add_argument("--metrics", default=DEFAULT_METRICS, help="Regex selecting the compared metrics.")
+    sys.exit(main(parser.parse_args()))
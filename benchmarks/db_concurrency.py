@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.report import percentiles
+
+# Serving-path read latency while an ingestion job writes to the same SQLite file.
+# Reader threads run the candidate lookup of /recommend/ (get_games_in_order for 20
+# random appids); one writer thread rewrites batches of games (new text, embedding and
+# price) in its own transactions, like sync_catalog does.
+#
+#   python -m benchmarks.db_concurrency --games 20000 --readers 8 --seconds 10
+#
+# "default": a plain create_engine() (rollback journal, synchronous=FULL, default pool).
+# "tuned":   database.db.make_engine() (WAL, synchronous=NORMAL, page cache, mmap,
+#            busy_timeout) with read-only reader connections.
+# Reports reader p50/p95/p99, reader errors ("database is locked"), reads/sec and
+# rows written/sec.
+
+
+def reader(session_factory, appid_count, stop, latencies, errors, seed):
+    from backend.crud import get_games_in_order
+
+    rng = np.random.default_rng(seed)
+    db = session_factory()
+    try:
+        while not stop.is_set():
+            appids = [int(appid) for appid in rng.integers(1, appid_count + 1, size=20)]
+            start = time.perf_counter()
+            try:
+                get_games_in_order(db, appids)
+                db.rollback()
+            except Exception as e:
+                errors.append(type(e).__name__)
+                db.rollback()
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+
+
+def writer(engine, appid_count, stop, batch_size, pause, written, errors, dim):
+    from sqlalchemy import bindparam, update
+    from database.tables import Game, GameText, GameEmbedding
+
+    def update_statement(table, column):
+        return update(table).where(table.c.appid == bindparam("b_appid")).values({column: bindparam("b_value")})
+
+    prices = update_statement(Game.__table__, "price")
+    texts = update_statement(GameText.__table__, "text_for_embedding")
+    embeddings = update_statement(GameEmbedding.__table__, "embedding")
+
+    rng = np.random.default_rng(1234)
+    while not stop.is_set():
+        appids = range(int(rng.integers(1, max(2, appid_count - batch_size))), appid_count + 1)[:batch_size]
+        vectors = rng.standard_normal((len(appids), dim)).astype(np.float32)
+        try:
+            with engine.begin() as connection:
+                connection.execute(prices, [{"b_appid": appid, "b_value": float(rng.integers(0, 6000)) / 100} for appid in appids])
+                connection.execute(texts, [{"b_appid": appid, "b_value": f"Name: Game {appid}. Updated at {time.time():.3f}."} for appid in appids])
+                connection.execute(embeddings, [{"b_appid": appid, "b_value": vector.tobytes()} for appid, vector in zip(appids, vectors)])
+            written.append(len(appids))
+        except Exception as e:
+            errors.append(type(e).__name__)
+        time.sleep(pause)
+
+
+def run_config(name, tmp_dir, args):
+    from sqlalchemy.orm import sessionmaker
+    from database.db import Base, make_engine
+    import database.tables  # noqa: F401  (registers the tables on Base)
+    from benchmarks.synthetic import populate_synthetic_db
+
+    url = f"sqlite:///{tmp_dir}/{name}.db"
+    tuned = name == "tuned"
+    write_engine = make_engine(url, tuned=tuned)
+    read_engine = make_engine(url, read_only=True, tuned=tuned)
+
+    Base.metadata.create_all(bind=write_engine)
+    db = sessionmaker(bind=write_engine)()
+    try:
+        populate_synthetic_db(db, args.games)
+    finally:
+        db.close()
+
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    stop = threading.Event()
+    latencies, read_errors, written, write_errors = [], [], [], []
+
+    threads = [threading.Thread(target=reader, args=(ReadSession, args.games, stop, latencies, read_errors, seed))
+               for seed in range(args.readers)]
+    if args.batch_size:
+        threads.append(threading.Thread(target=writer, args=(write_engine, args.games, stop, args.batch_size,
+                                                             args.writer_pause, written, write_errors, 384)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    write_engine.dispose()
+    read_engine.dispose()
+
+    return {
+        "read_latency": percentiles(latencies),
+        "reads_per_sec": round(len(latencies) / args.seconds, 1),
+        "read_errors": len(read_errors),
+        "rows_written_per_sec": round(sum(written) / args.seconds, 1),
+        "write_errors": len(write_errors),
+        "error_types": sorted(set(read_errors + write_errors)),
+    }
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    # backend.crud opens the module-level engines lazily; keep them away from the real database.
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/unused.db"
+
+    results = {"games": args.games, "readers": args.readers, "seconds": args.seconds,
+               "writer": {"batch_size": args.batch_size, "pause": args.writer_pause}}
+    for name in ("default", "tuned"):
+        results[name] = run_config(name, tmp_dir, args)
+        r = results[name]
+        latency = r["read_latency"]
+        print(f"{name:<8} read p50={latency['p50_ms']:6.2f}ms p95={latency['p95_ms']:7.2f}ms p99={latency['p99_ms']:7.2f}ms "
+              f"reads/s={r['reads_per_sec']:8.1f} read_errors={r['read_errors']} "
+              f"rows_written/s={r['rows_written_per_sec']:8.1f} write_errors={r['write_errors']} {r['error_types'] or ''}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reader latency with a concurrent writer, default vs. tuned SQLite engine.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per write transaction (0 disables the writer).")
+    parser.add_argument("--writer-pause", type=float, default=0.05, help="Seconds between write transactions.")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from data_load_to_db.generate_embeddings import TextEncoder, MODEL_NAME, ENCODE_BATCH_SIZE
+
+# Throughput (texts/sec) of the offline embedding stage on this machine.
+#
+#   python -m benchmarks.embedding_throughput --parquet dataset_cleaned.parquet --sample 5000 --workers 1 2 4
+#
+# "unsorted" feeds the model one batch at a time in dataset order (what a naive loop does);
+# "sorted" is the pipeline: length-sorted chunks, optionally over several processes.
+
+WORDS = ["open", "world", "rpg", "story", "rich", "dungeon", "crawler", "with", "roguelike", "elements",
+         "co-op", "multiplayer", "shooter", "pixel", "art", "platformer", "city", "builder", "strategy",
+         "survival", "crafting", "horror", "puzzle", "racing", "simulation", "indie", "fantasy", "sci-fi"]
+
+
+def synthetic_texts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Steam descriptions are long-tailed: most are short, a few hit the model's token limit.
+    lengths = np.clip(rng.lognormal(mean=3.5, sigma=0.9, size=n).astype(int), 5, 400)
+    return [" ".join(rng.choice(WORDS, size=length)) for length in lengths]
+
+
+def load_texts(parquet, sample, seed=0):
+    texts = [text or "" for text in pq.read_table(parquet, columns=["text_for_embedding"]).column(0).to_pylist()]
+    if sample and sample < len(texts):
+        rng = np.random.default_rng(seed)
+        texts = [texts[i] for i in rng.choice(len(texts), size=sample, replace=False)]
+    return texts
+
+
+def measure(texts, **encoder_args):
+    with TextEncoder(**encoder_args) as encoder:
+        # Warm-up starts the workers and loads the model outside the timed part.
+        encoder.encode(texts[:encoder.batch_size * encoder.workers])
+        start = time.perf_counter()
+        encoder.encode(texts)
+        elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "texts_per_sec": len(texts) / elapsed}
+
+
+def run(args):
+    texts = load_texts(args.parquet, args.sample) if args.parquet else synthetic_texts(args.sample)
+    print(f"texts={len(texts)} mean_chars={np.mean([len(t) for t in texts]):.0f} model={args.model}")
+
+    results = {"texts": len(texts), "model": args.model, "runs": {}}
+    configs = [("unsorted_w1", dict(workers=1, chunk_size=args.batch_size, sort_by_length=False))]
+    configs += [(f"sorted_w{workers}", dict(workers=workers)) for workers in args.workers]
+
+    for name, config in configs:
+        r = measure(texts, model_name=args.model, batch_size=args.batch_size, **config)
+        results["runs"][name] = r
+        print(f"{name:<12} {r['texts_per_sec']:8.1f} texts/sec ({r['seconds']:.1f}s)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding stage throughput benchmark.")
+    parser.add_argument("--parquet", default=None, help="Sample real texts from this parquet instead of synthetic ones.")
+    parser.add_argument("--sample", type=int, default=5000)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    run(parser.parse_args())
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.report import percentiles
+
+# /recommend/ latency when the LLM has a heavy tail, with and without the resilient client.
+# Runs against the real FastAPI app, a temporary synthetic SQLite database and the local
+# FakeGeminiModel (backend/fake_llm.py), which answers in --latency seconds, takes
+# --slow-latency seconds for --slow-rate of the calls and fails --failure-rate of them.
+#
+#   python -m benchmarks.llm_resilience --requests 200 --concurrency 10
+#
+# "baseline": no deadline, no retries, no hedging, no circuit breaker, so slow calls are
+# awaited in full (errors still fall back to the local ranker instead of the old HTTP 500).
+# "resilient": the configured deadline/retry/hedge settings. Reports p50/p95/p99, status
+# codes and the share of answers that came from the fallback.
+
+
+async def run(client, games, concurrency):
+    queue = asyncio.Queue()
+    for game_name in games:
+        queue.put_nowait(game_name)
+
+    latencies, statuses, sources = [], {}, {}
+
+    async def worker():
+        while not queue.empty():
+            game_name = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get("/recommend/", params={"game_name": game_name})
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                source = response.json().get("source", "llm")
+                sources[source] = sources.get(source, 0) + 1
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return {"latency": percentiles(latencies), "status": statuses, "source": sources}
+
+
+async def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["NEXTGAME_ANN_INDEX_PATH"] = f"{tmp_dir}/ann_index.npz"
+    os.environ["NEXTGAME_VECTOR_FILE"] = f"{tmp_dir}/embeddings.npy"
+    os.environ["NEXTGAME_LLM_FAKE"] = "1"
+
+    import httpx
+    import main as app_module
+    from backend import llm_responses
+    from backend.crud import embedding_store
+    from backend.fake_llm import FakeGeminiModel
+    from backend.llm_client import CircuitBreaker
+    from database.db import SessionLocal
+    from benchmarks.synthetic import populate_synthetic_db
+    from database.create_db import create_tables
+
+    create_tables()  # the app itself creates them in its lifespan hook
+    db = SessionLocal()
+    try:
+        names = populate_synthetic_db(db, args.games)
+        embedding_store.ensure_fresh(db)
+    finally:
+        db.close()
+
+    llm_responses.recommendation_cache.persistent = False
+    llm_responses.recommendation_cache.max_entries = 0
+
+    rng = np.random.default_rng(0)
+    games = [names[i] for i in rng.integers(0, len(names), size=args.requests)]
+
+    configs = {
+        "baseline": {"deadline": 3600.0, "retries": 0, "hedge": 0.0, "breaker": CircuitBreaker(failure_threshold=10 ** 9)},
+        "resilient": {"deadline": args.deadline, "retries": args.retries, "hedge": args.hedge_after, "breaker": CircuitBreaker()},
+    }
+
+    results = {"requests": args.requests, "concurrency": args.concurrency, "llm": {
+        "latency": args.latency, "slow_rate": args.slow_rate, "slow_latency": args.slow_latency, "failure_rate": args.failure_rate,
+    }}
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, config in configs.items():
+            llm_responses.model = FakeGeminiModel(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                                                  failure_rate=args.failure_rate, seed=1)
+            llm_responses.LLM_DEADLINE_SECONDS = config["deadline"]
+            llm_responses.LLM_RETRIES = config["retries"]
+            llm_responses.LLM_HEDGE_AFTER = config["hedge"]
+            llm_responses.llm_breaker = config["breaker"]
+
+            results[name] = await run(client, games, args.concurrency)
+            results[name]["llm_calls"] = llm_responses.model.calls
+
+    for name in configs:
+        r = results[name]
+        latency = r["latency"]
+        print(f"{name:<9} p50={latency['p50_ms']:7.0f}ms p95={latency['p95_ms']:7.0f}ms p99={latency['p99_ms']:7.0f}ms "
+              f"status={r['status']} source={r['source']} llm_calls={r['llm_calls']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail latency of /recommend/ with a flaky LLM, with and without the resilient client.")
+    parser.add_argument("--games", type=int, default=5_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=1.0, help="Normal fake LLM response time in seconds.")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of calls that take --slow-latency.")
+    parser.add_argument("--slow-latency", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Share of calls that raise an API error.")
+    parser.add_argument("--deadline", type=float, default=4.0, help="LLM deadline of the resilient run.")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--hedge-after", type=float, default=2.0)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.report import percentiles, run_config, save_results
+
+# End-to-end HTTP load test of /search/, /recommend/ and /recommend/batch/ with a
+# stubbed LLM. A fixed number of clients send requests back-to-back for --seconds,
+# picking the endpoint by --mix weights. Reports throughput, p50/p95/p99 and status
+# codes per endpoint.
+#
+#   python -m benchmarks.load_test --games 20000 --concurrency 32 --seconds 30 --output load.json
+#
+# By default the FastAPI app runs in-process (httpx ASGI transport) on a synthetic
+# catalogue, with the local FakeGeminiModel answering in --llm-latency seconds and the
+# recommendation cache disabled so every /recommend/ reaches the LLM. With --url the
+# requests go to a running server instead (start it with NEXTGAME_LLM_FAKE=1 to stub
+# the LLM); game names are then discovered through /search/ first.
+
+ENDPOINTS = ("search", "recommend", "batch")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in --mix: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def request_for(endpoint, names, rng):
+    if endpoint == "search":
+        name = names[int(rng.integers(len(names)))]
+        return "/search/", {"q": name[:int(rng.integers(2, 8))]}
+    if endpoint == "recommend":
+        return "/recommend/", {"game_name": names[int(rng.integers(len(names)))], "lang": "en"}
+    seeds = [names[int(i)] for i in rng.integers(len(names), size=3)]
+    return "/recommend/batch/", {"game_names": seeds, "lang": "en"}
+
+
+async def run_load(client, names, concurrency: int, seconds: float, mix: dict, seed: int = 0) -> dict:
+    endpoints = list(mix)
+    weights = np.asarray([mix[name] for name in endpoints], dtype=float)
+    weights /= weights.sum()
+
+    latencies = {name: [] for name in endpoints}
+    statuses = {name: {} for name in endpoints}
+    errors = {name: 0 for name in endpoints}
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(rng):
+        while time.perf_counter() < deadline:
+            endpoint = endpoints[int(rng.choice(len(endpoints), p=weights))]
+            path, params = request_for(endpoint, names, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+            except Exception:
+                errors[endpoint] += 1
+                continue
+            latencies[endpoint].append((time.perf_counter() - start) * 1000)
+            status = str(response.status_code)
+            statuses[endpoint][status] = statuses[endpoint].get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client_loop(np.random.default_rng(seed + i)) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    results = {"seconds": elapsed, "concurrency": concurrency}
+    for name in endpoints:
+        results[name] = {**percentiles(latencies[name]), "requests_per_sec": len(latencies[name]) / elapsed,
+                         "status": statuses[name], "errors": errors[name]}
+    results["total_requests_per_sec"] = sum(len(values) for values in latencies.values()) / elapsed
+    return results
+
+
+def print_load(results: dict) -> None:
+    print(f"{results['concurrency']} clients, {results['seconds']:.1f}s, {results['total_requests_per_sec']:.1f} req/s total")
+    for name in ENDPOINTS:
+        r = results.get(name)
+        if not r or "p50_ms" not in r:
+            continue
+        print(f"  {name:<10} {r['requests_per_sec']:8.1f} req/s p50={r['p50_ms']:8.1f}ms p95={r['p95_ms']:8.1f}ms "
+              f"p99={r['p99_ms']:8.1f}ms status={r['status']} errors={r['errors']}")
+
+
+def configure_fake_llm(latency: float, use_cache: bool) -> None:
+    from backend import llm_responses
+    from backend.fake_llm import FakeGeminiModel
+
+    llm_responses.model = FakeGeminiModel(latency=latency, seed=0)
+    if not use_cache:
+        llm_responses.recommendation_cache.persistent = False
+        llm_responses.recommendation_cache.max_entries = 0
+
+
+def warm_up_app() -> None:
+    """The ASGI transport does not run the lifespan hook; load the in-memory indexes here."""
+    from database.db import ReadSessionLocal
+    from backend.crud import embedding_store, autocomplete_index
+
+    db = ReadSessionLocal()
+    try:
+        embedding_store.ensure_fresh(db)
+        autocomplete_index.ensure_fresh(db)
+    finally:
+        db.close()
+
+
+async def discover_names(client, count: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    names = set()
+    for _ in range(count):
+        response = await client.get("/search/", params={"q": "".join(rng.choice(list(letters), size=2))})
+        if response.status_code == 200:
+            names.update(item["name"] for item in response.json()["game_list"])
+    return sorted(names)
+
+
+async def main(args):
+    import httpx
+
+    mix = parse_mix(args.mix)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None,
+                                     limits=httpx.Limits(max_connections=args.concurrency)) as client:
+            names = await discover_names(client, 200, args.seed)
+            if not names:
+                raise SystemExit(f"No game names found through {args.url}/search/")
+            results = await run_load(client, names, args.concurrency, args.seconds, mix, seed=args.seed)
+    else:
+        from benchmarks.micro import prepare_environment
+        from benchmarks.synthetic import create_synthetic_db
+
+        tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+        prepare_environment(tmp_dir)
+        names = create_synthetic_db(f"{tmp_dir}/bench.db", args.games, seed=args.seed)
+
+        import main as app_module
+        configure_fake_llm(args.llm_latency, args.llm_cache)
+        warm_up_app()
+
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results = await run_load(client, names, args.concurrency, args.seconds, mix, seed=args.seed)
+
+    print_load(results)
+    save_results(args.output, {"config": run_config(args), "load": results})
+
+
+def add_load_arguments(parser) -> None:
+    parser.add_argument("--concurrency", type=int, default=32, help="Number of clients sending requests back-to-back.")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--mix", default="search=70,recommend=25,batch=5", help="Endpoint weights.")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM response time in seconds.")
+    parser.add_argument("--llm-cache", action="store_true", help="Keep the recommendation cache enabled.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP load test of the search and recommend endpoints with a stubbed LLM.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--url", default=None, help="Base URL of a running server instead of the in-process app.")
+    parser.add_argument("--seed", type=int, default=0)
+    add_load_arguments(parser)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.report import percentiles, run_config, save_results
+
+# Micro-benchmarks of the CRUD hot paths behind /search/ and /recommend/, called
+# directly (no HTTP) on a synthetic SQLite catalogue:
+#
+#   python -m benchmarks.micro --games 50000 --output micro.json
+#
+#   search_games_by_name                  prefix, second-word and one-typo queries
+#   get_similar_game_embeddings_and_texts full candidate step of /recommend/, with and without filters
+#   find_similar_appids                   similarity search only
+#   get_candidate_records_in_order        candidate records of 20 appids only
+#
+# The first call of each path (autocomplete build, embedding store load) is reported
+# separately as *_cold_ms.
+
+FILTERS = {"max_price": 20.0, "platforms": ["linux"]}
+
+
+def timed(func, inputs) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for value in inputs:
+        call_start = time.perf_counter()
+        func(value)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return {**percentiles(latencies), "ops_per_sec": len(latencies) / elapsed}
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = int(rng.integers(1, len(word) - 2))
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def search_queries(names, count, rng) -> list[str]:
+    queries = []
+    for name in rng.choice(names, size=count):
+        words = name.lower().split()
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append(name.lower()[:int(rng.integers(2, 9))])
+        elif kind < 0.8 and len(words) > 1:
+            queries.append(words[1][:int(rng.integers(3, 7))])
+        else:
+            queries.append(typo(words[0], rng))
+    return queries
+
+
+def run_micro(names, requests: int, seed: int = 0) -> dict:
+    """Runs every micro-benchmark against the database configured in database.db."""
+    from database.db import ReadSessionLocal
+    from backend.crud import search_games_by_name, get_similar_game_embeddings_and_texts
+    from backend.crud import find_similar_appids, get_candidate_records_in_order
+
+    rng = np.random.default_rng(seed)
+    results = {}
+    db = ReadSessionLocal()
+    try:
+        start = time.perf_counter()
+        search_games_by_name(db, names[0][:3])
+        results["search_cold_ms"] = (time.perf_counter() - start) * 1000
+        results["search_games_by_name"] = timed(lambda q: search_games_by_name(db, q, limit=10),
+                                                search_queries(names, requests, rng))
+
+        start = time.perf_counter()
+        get_similar_game_embeddings_and_texts(db, names[0])
+        results["similar_cold_ms"] = (time.perf_counter() - start) * 1000
+
+        seeds = list(rng.choice(names, size=requests))
+        results["get_similar_game_embeddings_and_texts"] = timed(
+            lambda name: get_similar_game_embeddings_and_texts(db, name, top_n=20), seeds)
+        results["get_similar_game_embeddings_and_texts_filtered"] = timed(
+            lambda name: get_similar_game_embeddings_and_texts(db, name, top_n=20, filters=FILTERS), seeds)
+        results["find_similar_appids"] = timed(lambda name: find_similar_appids(db, name, top_n=20), seeds)
+
+        appid_lists = [[int(appid) for appid in rng.integers(1, len(names) + 1, size=20)] for _ in range(requests)]
+        results["get_candidate_records_in_order"] = timed(lambda appids: get_candidate_records_in_order(db, appids), appid_lists)
+    finally:
+        db.close()
+
+    return results
+
+
+def print_micro(results: dict) -> None:
+    print(f"search cold start {results['search_cold_ms']:.0f}ms, similarity cold start {results['similar_cold_ms']:.0f}ms")
+    for name, r in results.items():
+        if isinstance(r, dict):
+            print(f"  {name:<48} p50={r['p50_ms']:7.3f}ms p95={r['p95_ms']:7.3f}ms p99={r['p99_ms']:7.3f}ms {r['ops_per_sec']:9.0f} ops/s")
+
+
+def prepare_environment(tmp_dir) -> None:
+    """Points the database, ANN index and vector file at a temporary directory."""
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["NEXTGAME_ANN_INDEX_PATH"] = f"{tmp_dir}/ann_index.npz"
+    os.environ["NEXTGAME_VECTOR_FILE"] = f"{tmp_dir}/embeddings.npy"
+    os.environ["NEXTGAME_LLM_FAKE"] = "1"
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    prepare_environment(tmp_dir)
+
+    from benchmarks.synthetic import create_synthetic_db
+
+    names = create_synthetic_db(f"{tmp_dir}/bench.db", args.games, seed=args.seed)
+    results = run_micro(names, args.requests, seed=args.seed)
+    print_micro(results)
+    save_results(args.output, {"config": run_config(args), "micro": results})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of search_games_by_name and the similarity step.")
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=500, help="Calls per benchmarked function.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    main(parser.parse_args())
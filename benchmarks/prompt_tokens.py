@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# Input size of the Gemini prompt before and after compaction, for the same candidate lists.
+#
+#   python -m benchmarks.prompt_tokens                                  # synthetic Steam-like texts
+#   python -m benchmarks.prompt_tokens --from-db "Hades" "Portal 2"     # real candidates from the database
+#   python -m benchmarks.prompt_tokens --from-db "Hades" --live         # + Gemini count_tokens and latency
+#
+# "legacy" is the prompt as it was built before: the Python repr of the 20 full
+# text_for_embedding strings plus the repeated output schema. "compact" is the current
+# _build_prompt over one-line candidate records. Without --live, tokens are estimated
+# (~4 characters per token); with --live they are counted by Gemini (system instruction
+# included) and each prompt is sent --repeat times to time the full response.
+
+WORDS = ("explore build fight craft survive a vast hand-drawn world full of secrets ancient ruins "
+         "challenging bosses deep story choices matter co-op with friends procedurally generated "
+         "dungeons upgrade your weapons unlock new abilities atmospheric soundtrack pixel art").split()
+GENRES = ["Action", "Adventure", "Indie", "RPG", "Strategy", "Simulation", "Casual", "Racing"]
+TAGS = ["Singleplayer", "Atmospheric", "Roguelike", "Pixel Graphics", "Story Rich", "Open World", "Co-op",
+        "Difficult", "Exploration", "Fantasy", "Sci-fi", "Crafting", "Survival", "Great Soundtrack",
+        "Multiplayer", "2D", "Horror", "Turn-Based", "Sandbox", "Metroidvania"]
+
+
+def legacy_prompt(candidate_games, language):
+    """The prompt builder before compaction (kept here only for the comparison)."""
+    if language == "tr":
+        reason_instruction = "Explain briefly (1-2 sentences) in Turkish why it's similar or a good alternative, referencing specific details FROM THE PROVIDED TEXT for that game."
+        note_instruction = "Write a short, friendly, and engaging note for the user in Turkish about the chosen game, based on the details in its provided text (e.g., 'Bu oyunda özellikle şunu sevebilirsin:' or 'Eğer X'i sevdiysen, Y'ye bayılacaksın.')."
+        output_language_instruction = "Ensure the 'match_reason' and 'user_note' fields are in Turkish."
+    else:
+        reason_instruction = "Explain briefly (1-2 sentences) in English why it's similar or a good alternative, referencing specific details FROM THE PROVIDED TEXT for that game."
+        note_instruction = "Write a short, friendly, and engaging note for the user in English about the chosen game, based on the details in its provided text (e.g., 'You'll especially love the X in this game:' or 'If you enjoyed Y, you'll definitely like Z.')"
+        output_language_instruction = "Ensure the 'match_reason' and 'user_note' fields are in English."
+
+    return f"""
+    Analyze the detailed descriptions of the 20 candidate games provided below. Based *solely* on these descriptions, select exactly 3 games that stand out as particularly interesting or high-quality recommendations.
+
+    Consider factors like uniqueness, genre representation, potential appeal based on common gaming interests suggested by the descriptions, etc. Try to select a diverse set if possible.
+
+    Candidate Games (Full Details - Analyze each text carefully):
+    {candidate_games}
+    {output_language_instruction}
+    Required Output Format (VALID JSON ONLY - no extra text before or after):
+    {{
+    "recommendations": [
+        {{
+        "game_name": "The Exact Name of the Chosen Game (Extract accurately from the text provided for the candidate)",
+        "type": "Interesting", // 'type' alanını şimdilik genel tutalım
+        "match_reason": "{reason_instruction}",
+        "user_note": "{note_instruction}"
+        }},
+        // Exactly two more recommendation objects following this structure
+    ]
+    }}
+    """
+
+
+def synthetic_candidate_sets(n_sets, seed):
+    """(full texts, compact records) for n_sets lists of 20 Steam-like games."""
+    from backend.prompt_builder import compact_candidate
+
+    rng = np.random.default_rng(seed)
+    sets = []
+    for s in range(n_sets):
+        full, compact = [], []
+        for i in range(20):
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {s * 20 + i}"
+            genres = ", ".join(rng.choice(GENRES, size=3, replace=False))
+            tags = ", ".join(rng.choice(TAGS, size=15, replace=False))
+            description = " ".join(rng.choice(WORDS, size=int(rng.integers(120, 260))))
+            text = f"Name: {name}. Genres: {genres}. Tags: {tags}. Description: {description}."
+            full.append(text)
+            compact.append(compact_candidate(name, genres, tags, text))
+        sets.append((full, compact))
+    return sets
+
+
+def db_candidate_sets(game_names):
+    from database.db import SessionLocal
+    from database.tables import GameText
+    from backend.crud import find_similar_appids, get_candidate_records_in_order
+
+    db = SessionLocal()
+    try:
+        sets = []
+        for game_name in game_names:
+            appids = find_similar_appids(db, game_name, top_n=20)
+            if not appids:
+                print(f"Skipping '{game_name}': game not found or no similar games.")
+                continue
+            texts = dict(db.query(GameText.appid, GameText.text_for_embedding).filter(GameText.appid.in_(appids)).all())
+            sets.append(([texts[appid] for appid in appids if appid in texts], get_candidate_records_in_order(db, appids)))
+        return sets
+    finally:
+        db.close()
+
+
+def main(args):
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    from backend import llm_responses
+    from backend.prompt_builder import estimate_tokens
+
+    sets = db_candidate_sets(args.from_db) if args.from_db else synthetic_candidate_sets(args.sets, args.seed)
+    if not sets:
+        raise SystemExit("No candidate lists to compare.")
+
+    prompts = {
+        "legacy": [legacy_prompt(full, args.language) for full, _ in sets],
+        "compact": [llm_responses._build_prompt(compact, args.language) for _, compact in sets],
+    }
+
+    results = {"candidate_sets": len(sets), "language": args.language}
+    for name, texts in prompts.items():
+        results[name] = {
+            "chars": float(np.mean([len(text) for text in texts])),
+            "estimated_tokens": float(np.mean([estimate_tokens(text) for text in texts])),
+        }
+
+    if args.live:
+        model = llm_responses.get_model()
+        for name, texts in prompts.items():
+            tokens, latencies = [], []
+            for text in texts:
+                tokens.append(model.count_tokens(text).total_tokens)
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    model.generate_content(text)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            results[name]["gemini_tokens"] = float(np.mean(tokens))
+            results[name]["latency_p50_ms"] = float(np.percentile(latencies, 50))
+            results[name]["latency_p95_ms"] = float(np.percentile(latencies, 95))
+
+    for name in prompts:
+        r = results[name]
+        line = f"{name:<8} chars={r['chars']:8.0f} est_tokens={r['estimated_tokens']:7.0f}"
+        if args.live:
+            line += f" gemini_tokens={r['gemini_tokens']:7.0f} p50={r['latency_p50_ms']:.0f}ms p95={r['latency_p95_ms']:.0f}ms"
+        print(line)
+    ratio = results["legacy"]["estimated_tokens"] / results["compact"]["estimated_tokens"]
+    print(f"compact prompt is {ratio:.1f}x smaller (estimated)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tokens (and optionally latency) of the legacy vs. compact Gemini prompt.")
+    parser.add_argument("--from-db", nargs="+", metavar="GAME", default=None, help="Use real candidates for these games.")
+    parser.add_argument("--sets", type=int, default=20, help="Synthetic candidate lists when --from-db is not given.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--language", default="en", choices=["en", "tr"])
+    parser.add_argument("--live", action="store_true", help="Count tokens with Gemini and time real requests (needs GEMINI_API_KEY).")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per prompt with --live.")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    main(parser.parse_args())
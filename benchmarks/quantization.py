@@ -0,0 +1,110 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.embedding_store import EmbeddingStore
+from backend.quantization import PQVectors
+from benchmarks.ann_recall import load_vectors
+from benchmarks.report import percentiles, run_config, save_results
+
+# Memory and recall@k of the compressed vector copies (NEXTGAME_VECTOR_QUANTIZATION)
+# against exact float32 search. "auto" is the store's default shortlist, which grows
+# with k and the catalogue size; the numbered rows use a fixed shortlist of that many
+# candidates. rerank == k means no full-precision rescoring beyond ordering the k
+# results the compressed scan found. PQ codebooks are trained here the way
+# data_load_to_db/build_pq_codes.py does it and loaded from a temporary file.
+#
+#   python -m benchmarks.quantization --synthetic 100000
+#   python -m benchmarks.quantization --from-db --kinds int8 pq --pq-subvectors 48 96
+#
+# The synthetic vectors have isotropic noise in all 384 dimensions, which makes
+# neighbours much closer to each other than in real sentence embeddings; recall on
+# the real catalogue (--from-db) is the number to decide on.
+
+
+def timed_search(store, query_rows, appids, k):
+    found, latencies = [], []
+    for row in query_rows:
+        start = time.perf_counter()
+        found.append(store.most_similar(int(appids[row]), top_n=k)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return found, latencies
+
+
+def recall(truth, found, k):
+    return sum(len(expected & set(result)) for expected, result in zip(truth, found)) / (k * len(truth))
+
+
+def configurations(args):
+    for kind in args.kinds:
+        for subvectors in (args.pq_subvectors if kind == "pq" else [None]):
+            yield kind, subvectors
+
+
+def run(args):
+    appids, matrix = load_vectors(args)
+    n, dim = matrix.shape
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(n, size=min(args.queries, n), replace=False)
+
+    exact = EmbeddingStore(dim=dim)
+    exact.load_arrays(appids, matrix)
+    truth, latencies = timed_search(exact, query_rows, appids, args.k)
+    truth = [set(found) for found in truth]
+
+    float32_bytes = exact.memory_stats()["matrix_bytes"]
+    baseline = percentiles(latencies)
+    print(f"N={n}  dim={dim}  float32 matrix={float32_bytes / 2**20:.1f} MB  exact p50={baseline['p50_ms']:.2f} ms")
+
+    results = {"n": n, "dim": dim, "k": args.k, "float32_bytes": float32_bytes, "exact": baseline, "runs": []}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind, subvectors in configurations(args):
+            pq_path = None
+            start = time.perf_counter()
+            if kind == "pq":
+                pq_path = Path(tmp_dir) / f"pq{subvectors}.npz"
+                PQVectors.build(exact.arrays()[1], m=subvectors).save(pq_path, appids)
+            build_seconds = time.perf_counter() - start
+
+            store = EmbeddingStore(dim=dim, quantization=kind, pq_path=pq_path)
+            store.load_arrays(appids, matrix)
+
+            codes_bytes = store.memory_stats()["codes_bytes"]
+            name = kind if subvectors is None else f"pq{subvectors}"
+            print(f"{name:<8} codes={codes_bytes / 2**20:.1f} MB ({float32_bytes / codes_bytes:.1f}x smaller)  training={build_seconds:.2f}s")
+
+            for rerank in ["auto", *args.rerank]:
+                if rerank == "auto":
+                    store.rerank = EmbeddingStore(dim=dim).rerank
+                    store.RERANK_PER_RESULT, store.RERANK_FRACTION = EmbeddingStore.RERANK_PER_RESULT, EmbeddingStore.RERANK_FRACTION
+                    shortlist = store._rerank_size(args.k, n)
+                else:
+                    store.rerank, store.RERANK_PER_RESULT, store.RERANK_FRACTION = rerank, 0, 0
+                    shortlist = rerank
+                found, latencies = timed_search(store, query_rows, appids, args.k)
+                r = recall(truth, found, args.k)
+                timing = percentiles(latencies)
+                print(f"  rerank={str(rerank):<5} shortlist={shortlist:<5} recall@{args.k}={r:.4f}  p50={timing['p50_ms']:.2f} ms  p95={timing['p95_ms']:.2f} ms")
+                results["runs"].append({"kind": name, "codes_bytes": codes_bytes, "compression": float32_bytes / codes_bytes,
+                                        "build_seconds": build_seconds, "rerank": rerank, "shortlist": shortlist, "recall": r, **timing})
+
+    save_results(args.output, {"config": run_config(args), **results})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory and recall@k of int8 / PQ vectors with full-precision reranking.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=50_000, help="Number of synthetic vectors to generate.")
+    source.add_argument("--from-db", action="store_true", help="Use the embeddings in the database.")
+    parser.add_argument("--kinds", nargs="+", default=["int8", "pq"], choices=["int8", "pq"])
+    parser.add_argument("--pq-subvectors", type=int, nargs="+", default=[48, 96])
+    parser.add_argument("--rerank", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    run(parser.parse_args())
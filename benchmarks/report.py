@@ -0,0 +1,57 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Helpers shared by the benchmarks: latency percentiles and JSON result files that
+# carry enough context (commit, machine, settings) to compare two runs later with
+# `python -m benchmarks.compare old.json new.json`.
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {}
+    arr = np.asarray(samples_ms)
+    return {
+        "count": len(arr),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_config(args) -> dict:
+    """Command line settings of a run, without the output path (compared between runs)."""
+    return {key: value for key, value in vars(args).items() if key != "output"}
+
+
+def save_results(path, results: dict) -> None:
+    """Writes the results with an 'environment' block; no-op when path is empty."""
+    if not path:
+        return
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), **results}, f, indent=2)
+    print(f"Results written to {path}")
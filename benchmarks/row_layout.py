@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+# Size of the games table and metadata query times with the old single-table layout
+# (text_for_embedding and embedding inside each games row) vs. the current one
+# (game_texts / game_embeddings tables), on a synthetic SQLite catalogue whose texts
+# are padded to --text-chars characters like real Steam descriptions.
+#
+#   python -m benchmarks.row_layout --games 50000
+#
+# Queries: the autocomplete and filter-attribute loads (full scans of games), an
+# unindexed metadata filter, and the 20-candidate lookup of /recommend/ (which now
+# joins game_texts). The legacy database is also migrated with
+# database.create_db.move_heavy_columns to time the migration.
+
+QUERIES = {
+    "autocomplete_load": ("SELECT appid, name, header_image, popularity FROM games", None),
+    "attributes_load": ("SELECT appid, price, release_date, required_age, windows, mac, linux, genres, tags FROM games", None),
+    "metadata_filter": ("SELECT COUNT(*) FROM games WHERE price < 5 AND windows IS NULL", None),
+    "candidates_legacy": ("SELECT appid, name, header_image, genres, tags, text_for_embedding FROM games WHERE appid IN ({ids})", "legacy"),
+    "candidates_split": ("SELECT g.appid, g.name, g.header_image, g.genres, g.tags, t.text_for_embedding FROM games g "
+                         "LEFT JOIN game_texts t ON t.appid = g.appid WHERE g.appid IN ({ids})", "split"),
+}
+
+
+def table_bytes(connection, name):
+    from sqlalchemy import text
+    try:
+        return connection.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :name"), {"name": name}).scalar()
+    except Exception:
+        return None  # SQLite built without the dbstat table
+
+
+def time_query(connection, sql, repeats, rng, games):
+    from sqlalchemy import text
+    timings = []
+    for _ in range(repeats):
+        ids = ",".join(str(appid) for appid in rng.integers(1, games + 1, size=20))
+        start = time.perf_counter()
+        connection.execute(text(sql.format(ids=ids))).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def build(tmp_dir, args):
+    from sqlalchemy import Column, MetaData, Table, Text, BLOB, text
+    from sqlalchemy.orm import sessionmaker
+    from database.db import Base, make_engine
+    from database.tables import Game
+    from benchmarks.synthetic import populate_synthetic_db
+
+    split_engine = make_engine(f"sqlite:///{tmp_dir}/split.db")
+    Base.metadata.create_all(bind=split_engine)
+    db = sessionmaker(bind=split_engine)()
+    try:
+        populate_synthetic_db(db, args.games)
+    finally:
+        db.close()
+
+    filler = ("A story-rich adventure with exploration, crafting and tactical combat. " * 64)[:args.text_chars]
+    with split_engine.begin() as connection:
+        connection.execute(text("UPDATE game_texts SET text_for_embedding = text_for_embedding || :filler"), {"filler": filler})
+
+    legacy_metadata = MetaData()
+    Table("games", legacy_metadata, *[Column(column.name, column.type, primary_key=column.primary_key) for column in Game.__table__.columns],
+          Column("text_for_embedding", Text, nullable=False), Column("embedding", BLOB, nullable=False))
+    legacy_engine = make_engine(f"sqlite:///{tmp_dir}/legacy.db")
+    legacy_metadata.create_all(bind=legacy_engine)
+
+    with legacy_engine.begin() as connection:
+        connection.execute(text(f"ATTACH DATABASE '{tmp_dir}/split.db' AS split"))
+        connection.execute(text(
+            "INSERT INTO games SELECT g.*, t.text_for_embedding, e.embedding FROM split.games g "
+            "JOIN split.game_texts t ON t.appid = g.appid JOIN split.game_embeddings e ON e.appid = g.appid"
+        ))
+    with legacy_engine.connect() as connection:
+        connection.execute(text("DETACH DATABASE split"))
+
+    return {"legacy": legacy_engine, "split": split_engine}
+
+
+def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/migrated.db"
+
+    engines = build(tmp_dir, args)
+    rng = np.random.default_rng(0)
+    results = {"games": args.games, "text_chars": args.text_chars}
+
+    for layout, engine in engines.items():
+        with engine.connect() as connection:
+            result = {"games_table_bytes": table_bytes(connection, "games")}
+            for name, (sql, only) in QUERIES.items():
+                if only in (None, layout):
+                    result[name.replace(f"_{layout}", "") + "_ms"] = time_query(connection, sql, args.repeats, rng, args.games)
+        results[layout] = result
+        print(f"{layout:<7} " + " ".join(f"{key}={value}" for key, value in result.items()))
+
+    # Migration of the legacy file, through the same code the server runs at startup.
+    import shutil
+    from sqlalchemy import inspect
+    shutil.copy(f"{tmp_dir}/legacy.db", f"{tmp_dir}/migrated.db")
+    from database.create_db import create_tables
+    from database.db import engine as migrated_engine
+
+    start = time.perf_counter()
+    create_tables()
+    results["migration_seconds"] = round(time.perf_counter() - start, 2)
+    columns = {column["name"] for column in inspect(migrated_engine).get_columns("games")}
+    print(f"migration {results['migration_seconds']}s, games columns left: text_for_embedding={'text_for_embedding' in columns}, embedding={'embedding' in columns}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Games table size and metadata query times, legacy vs. split row layout.")
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--text-chars", type=int, default=1500, help="Padding added to every synthetic text_for_embedding.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    main(parser.parse_args())
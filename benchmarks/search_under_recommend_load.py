@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.report import percentiles
+
+# /search/ latency with and without concurrent /recommend/ traffic, against the real
+# FastAPI app, a temporary synthetic SQLite database and a fake LLM with fixed latency.
+#
+#   python -m benchmarks.search_under_recommend_load
+#   python -m benchmarks.search_under_recommend_load --blocking-llm   # simulate a sync LLM call on the event loop
+#
+# With the async LLM path, /search/ p99 should stay flat while /recommend/ calls are in flight.
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel with a fixed response time."""
+
+    def __init__(self, latency: float, blocking: bool):
+        self.latency = latency
+        self.blocking = blocking
+
+    def _response(self):
+        class Response:
+            text = json.dumps({"recommendations": [
+                {"game_name": "Fake", "type": "Similar", "match_reason": "-", "user_note": "-"}
+            ]})
+        return Response()
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return self._response()
+
+    async def generate_content_async(self, prompt):
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        return self._response()
+
+
+async def search_worker(client, queries, n_requests, latencies):
+    for i in range(n_requests):
+        start = time.perf_counter()
+        response = await client.get("/search/", params={"q": queries[i % len(queries)]})
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+
+async def recommend_worker(client, names, stop, latencies):
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/recommend/", params={"game_name": names[i % len(names)], "lang": "en"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def run_phase(client, names, args, with_recommend):
+    queries = [name[:3] for name in names[:200]]
+    search_latencies, recommend_latencies = [], []
+    stop = asyncio.Event()
+
+    recommenders = []
+    if with_recommend:
+        recommenders = [asyncio.create_task(recommend_worker(client, names, stop, recommend_latencies))
+                        for _ in range(args.recommend_concurrency)]
+        await asyncio.sleep(0.05)
+
+    await asyncio.gather(*[search_worker(client, queries, args.search_requests, search_latencies)
+                           for _ in range(args.search_concurrency)])
+    stop.set()
+    await asyncio.gather(*recommenders)
+
+    return {"search": percentiles(search_latencies), "recommend": percentiles(recommend_latencies)}
+
+
+async def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["NEXTGAME_ANN_INDEX_PATH"] = f"{tmp_dir}/ann_index.npz"
+    os.environ["NEXTGAME_VECTOR_FILE"] = f"{tmp_dir}/embeddings.npy"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    import httpx
+    import main as app_module
+    from backend import llm_responses
+    from database.db import SessionLocal
+    from benchmarks.synthetic import populate_synthetic_db
+    from database.create_db import create_tables
+
+    create_tables()  # the app itself creates them in its lifespan hook
+    db = SessionLocal()
+    try:
+        names = populate_synthetic_db(db, args.games)
+    finally:
+        db.close()
+
+    llm_responses.model = FakeModel(args.llm_latency, blocking=args.blocking_llm)
+    # Every /recommend/ must reach the (fake) LLM, otherwise the cache hides the effect.
+    llm_responses.recommendation_cache.persistent = False
+    llm_responses.recommendation_cache.max_entries = 0
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/recommend/", params={"game_name": names[0]})  # warm the embedding store
+        baseline = await run_phase(client, names, args, with_recommend=False)
+        loaded = await run_phase(client, names, args, with_recommend=True)
+
+    results = {
+        "games": args.games,
+        "llm_latency_s": args.llm_latency,
+        "blocking_llm": args.blocking_llm,
+        "search_only": baseline,
+        "search_with_recommend": loaded,
+    }
+
+    for label, phase in (("search only", baseline), ("search + recommend", loaded)):
+        s = phase["search"]
+        print(f"{label:<20} /search/ p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms p99={s['p99_ms']:.2f}ms")
+    if loaded["recommend"]:
+        print(f"{'':<20} /recommend/ completed={loaded['recommend']['count']} p50={loaded['recommend']['p50_ms']:.0f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/search/ tail latency while /recommend/ calls are in flight.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--search-requests", type=int, default=200, help="Requests per search worker.")
+    parser.add_argument("--search-concurrency", type=int, default=4)
+    parser.add_argument("--recommend-concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Fake LLM response time in seconds.")
+    parser.add_argument("--blocking-llm", action="store_true", help="Block the event loop during the fake LLM call.")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    asyncio.run(main(parser.parse_args()))
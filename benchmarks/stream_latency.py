@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.report import percentiles
+
+# Perceived latency of /recommend/ vs. /recommend/stream/ against the real FastAPI app,
+# a temporary synthetic SQLite database and a fake LLM that produces its answer at a
+# fixed token rate (like Gemini's streaming API), so the full answer takes ~generation time.
+#
+#   python -m benchmarks.stream_latency --games 20000 --requests 20 --llm-seconds 4
+#
+# Reports p50/p95 of: the full /recommend/ response, and for the stream the time to the
+# candidate list, to the first recommendation and to the end of the stream.
+
+
+class StreamingFakeModel:
+    """Stands in for genai.GenerativeModel; yields the JSON answer in small chunks over 'seconds'."""
+
+    def __init__(self, seconds: float, chunks: int = 60):
+        self.seconds = seconds
+        self.chunks = chunks
+        self.text = json.dumps({"recommendations": [
+            {"game_name": f"Fake {i}", "type": "Similar" if i < 2 else "Alternative",
+             "match_reason": "Shares the core loop and art direction. " * 4, "user_note": "-"}
+            for i in range(3)
+        ]}, indent=2)
+
+    def _pieces(self):
+        size = max(1, len(self.text) // self.chunks)
+        return [self.text[i:i + size] for i in range(0, len(self.text), size)]
+
+    async def _stream(self):
+        pieces = self._pieces()
+        for piece in pieces:
+            await asyncio.sleep(self.seconds / len(pieces))
+
+            class Chunk:
+                text = piece
+            yield Chunk()
+
+    async def generate_content_async(self, prompt, stream=False):
+        if stream:
+            return self._stream()
+
+        await asyncio.sleep(self.seconds)
+
+        class Response:
+            text = self.text
+        return Response()
+
+
+async def stream_timings(client, game_name):
+    start = time.perf_counter()
+    timings = {}
+    async with client.stream("GET", "/recommend/stream/", params={"game_name": game_name}) as response:
+        buffer = ""
+        async for text in response.aiter_text():
+            buffer += text
+            while "\n\n" in buffer:
+                block, buffer = buffer.split("\n\n", 1)
+                event = block.split("\n", 1)[0].removeprefix("event: ")
+                elapsed = (time.perf_counter() - start) * 1000
+                if event == "candidates":
+                    timings["candidates"] = elapsed
+                elif event == "recommendation":
+                    timings.setdefault("first_recommendation", elapsed)
+                elif event == "done":
+                    timings["done"] = elapsed
+    return timings
+
+
+async def main(args):
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["NEXTGAME_ANN_INDEX_PATH"] = f"{tmp_dir}/ann_index.npz"
+    os.environ["NEXTGAME_VECTOR_FILE"] = f"{tmp_dir}/embeddings.npy"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+    import httpx
+    import uvicorn
+    import main as app_module
+    from backend import llm_responses
+    from backend.crud import embedding_store
+    from database.db import SessionLocal
+    from benchmarks.synthetic import populate_synthetic_db
+    from database.create_db import create_tables
+
+    create_tables()  # the app itself creates them in its lifespan hook
+    db = SessionLocal()
+    try:
+        names = populate_synthetic_db(db, args.games)
+        embedding_store.ensure_fresh(db)
+    finally:
+        db.close()
+
+    llm_responses.model = StreamingFakeModel(args.llm_seconds)
+    llm_responses.recommendation_cache.persistent = False
+    llm_responses.recommendation_cache.max_entries = 0
+
+    rng = np.random.default_rng(0)
+    games = [names[i] for i in rng.choice(len(names), size=args.requests, replace=False)]
+
+    # httpx's ASGITransport buffers whole responses, so the stream is measured over a real socket.
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    full, candidates, first, done = [], [], [], []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        for game_name in games:
+            start = time.perf_counter()
+            response = await client.get("/recommend/", params={"game_name": game_name})
+            assert response.status_code == 200, response.text
+            full.append((time.perf_counter() - start) * 1000)
+
+            timings = await stream_timings(client, game_name)
+            candidates.append(timings["candidates"])
+            first.append(timings["first_recommendation"])
+            done.append(timings["done"])
+
+    server.should_exit = True
+    await server_task
+
+    results = {
+        "games": args.games,
+        "llm_seconds": args.llm_seconds,
+        "recommend": percentiles(full),
+        "stream_candidates": percentiles(candidates),
+        "stream_first_recommendation": percentiles(first),
+        "stream_done": percentiles(done),
+    }
+
+    for name in ("recommend", "stream_candidates", "stream_first_recommendation", "stream_done"):
+        r = results[name]
+        print(f"{name:<28} p50={r['p50_ms']:8.1f}ms p95={r['p95_ms']:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time to first result: /recommend/ vs. /recommend/stream/.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--llm-seconds", type=float, default=4.0, help="Fake LLM generation time for a full answer.")
+    parser.add_argument("--output", default=None, help="Optional JSON file for the results.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import tempfile
+
+from benchmarks.report import run_config, save_results
+
+# The reproducible benchmark run: one synthetic catalogue, the CRUD micro-benchmarks
+# (benchmarks/micro.py) and the HTTP load test (benchmarks/load_test.py) with the
+# stubbed LLM, saved to one JSON file. Compare two runs with benchmarks/compare.py:
+#
+#   python -m benchmarks.suite --output before.json
+#   ... change code ...
+#   python -m benchmarks.suite --output after.json
+#   python -m benchmarks.compare before.json after.json
+#
+# Runs are only comparable with the same --games/--seed/--concurrency/--mix on the
+# same machine; the environment block of the JSON records commit and hardware.
+
+
+async def run_suite(args) -> dict:
+    import httpx
+    from benchmarks.micro import prepare_environment, run_micro, print_micro
+    from benchmarks.load_test import configure_fake_llm, warm_up_app, run_load, print_load, parse_mix
+    from benchmarks.synthetic import create_synthetic_db
+
+    tmp_dir = tempfile.mkdtemp(prefix="nextgame-bench-")
+    prepare_environment(tmp_dir)
+    names = create_synthetic_db(f"{tmp_dir}/bench.db", args.games, seed=args.seed)
+
+    print("== micro-benchmarks")
+    micro = run_micro(names, args.requests, seed=args.seed)
+    print_micro(micro)
+
+    print("== HTTP load test")
+    import main as app_module
+    configure_fake_llm(args.llm_latency, args.llm_cache)
+    warm_up_app()
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        load = await run_load(client, names, args.concurrency, args.seconds, parse_mix(args.mix), seed=args.seed)
+    print_load(load)
+
+    return {"config": run_config(args), "micro": micro, "load": load}
+
+
+if __name__ == "__main__":
+    from benchmarks.load_test import add_load_arguments
+
+    parser = argparse.ArgumentParser(description="Micro-benchmarks and HTTP load test on one synthetic catalogue.")
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=500, help="Calls per micro-benchmarked function.")
+    parser.add_argument("--seed", type=int, default=0)
+    add_load_arguments(parser)
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON file for the results.")
+    args = parser.parse_args()
+
+    save_results(args.output, asyncio.run(run_suite(args)))
@@ -0,0 +1,199 @@
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+# Synthetic games catalogue for the benchmarks. Standalone:
+#
+#   python -m benchmarks.synthetic --games 50000 --db /tmp/nextgame-synthetic.db
+#
+# writes a database the server can use (NEXTGAME_DATABASE_URL=sqlite:////tmp/nextgame-synthetic.db).
+# Names look like Steam titles ("The Lost Kingdom II", "Space Farm Simulator",
+# "Shadow Tactics: Blades of the Hollow"), and each embedding cluster gets its own
+# genres and tags, so autocomplete, filters and the fallback ranker see realistic data.
+
+ADJECTIVES = ["Dark", "Lost", "Hollow", "Eternal", "Forgotten", "Broken", "Silent", "Crimson", "Iron", "Wild",
+              "Ancient", "Little", "Super", "Final", "Hidden", "Frozen", "Endless", "Savage", "Neon", "Golden"]
+NOUNS = ["Kingdom", "Knight", "Souls", "Legend", "Empire", "Dungeon", "Galaxy", "Frontier", "Island", "Tower",
+         "Horizon", "Shadow", "Dragon", "Hunter", "Colony", "Station", "Village", "Machine", "Garden", "Citadel",
+         "Odyssey", "Outpost", "Harbor", "Wasteland", "Chronicle", "Arena", "Rift", "Forge", "Crown", "Signal"]
+THEMES = ["Space", "Farm", "City", "Train", "Truck", "Pizza", "Zombie", "Pirate", "Ninja", "Robot",
+          "Monster", "Castle", "Ocean", "Medieval", "Cyber", "Bakery", "Hospital", "Prison", "Airport", "Dinosaur"]
+KINDS = ["Simulator", "Tycoon", "Defense", "Tactics", "Survival", "Racing", "Builder", "Manager", "Quest", "Party"]
+PLACES = ["the Hollow", "Aetheria", "the North", "Eldoria", "the Abyss", "Ravenmoor", "the Stars", "Avalon", "Valhalla", "Nowhere"]
+SEQUELS = ["II", "III", "2", "3", "Remastered", "Deluxe Edition", "Reborn", "Origins", "Online", "VR"]
+
+GENRES = ["Action", "Adventure", "Indie", "RPG", "Strategy", "Simulation", "Casual", "Sports", "Racing", "Puzzle",
+          "Massively Multiplayer", "Early Access"]
+TAGS = ["Singleplayer", "Multiplayer", "Co-op", "Open World", "Story Rich", "Atmospheric", "Pixel Graphics", "2D", "3D",
+        "First-Person", "Third Person", "Roguelike", "Roguelite", "Souls-like", "Metroidvania", "Survival", "Crafting",
+        "Base Building", "Sandbox", "Exploration", "Horror", "Sci-fi", "Fantasy", "Anime", "Cute", "Funny", "Difficult",
+        "Turn-Based", "Real-Time", "Tactical", "Management", "Economy", "Building", "Physics", "Stealth", "Shooter",
+        "FPS", "Platformer", "Card Game", "Deckbuilding", "Relaxing", "Family Friendly", "Competitive", "PvP", "Zombies"]
+PHRASES = ["Explore a vast world full of secrets", "Build and manage your own {noun}", "Fight your way through the {noun}",
+           "Team up with friends to survive", "Uncover the truth behind the {noun}", "Master a deep combat system",
+           "Craft, trade and expand", "Race against time across {place}", "Lead your {noun} to glory",
+           "Solve hand-crafted puzzles", "A cozy game about growing a {noun}", "Survive the night in {place}"]
+
+
+def clustered_embeddings(n: int, dim: int = 384, n_topics: int = 200, noise: float = 0.6, seed: int = 0,
+                         return_topics: bool = False):
+    """
+    Random unit vectors grouped around `n_topics` centres.
+
+    Real sentence embeddings are strongly clustered by genre/theme, so uniformly
+    random vectors would make any ANN index look much worse than it is in practice.
+    With return_topics=True also returns the topic index of every vector.
+    """
+    rng = np.random.default_rng(seed)
+
+    centres = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    topic_of = rng.integers(0, n_topics, size=n)
+    vectors = centres[topic_of] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors.astype(np.float32)
+    return (vectors, topic_of) if return_topics else vectors
+
+
+def _pick(rng, options):
+    return options[int(rng.integers(len(options)))]
+
+
+def game_name(rng) -> str:
+    pattern = rng.random()
+    if pattern < 0.25:
+        name = f"{_pick(rng, ADJECTIVES)} {_pick(rng, NOUNS)}"
+    elif pattern < 0.40:
+        name = f"The {_pick(rng, ADJECTIVES)} {_pick(rng, NOUNS)}"
+    elif pattern < 0.55:
+        name = f"{_pick(rng, THEMES)} {_pick(rng, KINDS)}"
+    elif pattern < 0.65:
+        name = f"{_pick(rng, THEMES)} {_pick(rng, NOUNS)} {_pick(rng, KINDS)}"
+    elif pattern < 0.80:
+        name = f"{_pick(rng, NOUNS)} of {_pick(rng, PLACES)}"
+    else:
+        name = f"{_pick(rng, NOUNS)} {_pick(rng, KINDS)}: {_pick(rng, ADJECTIVES)} {_pick(rng, NOUNS)}"
+    if rng.random() < 0.12:
+        name += f" {_pick(rng, SEQUELS)}"
+    return name
+
+
+def unique_names(n: int, rng) -> list[str]:
+    """n distinct titles; collisions first get a sequel suffix, then a year."""
+    names, seen = [], set()
+    for _ in range(n):
+        name = game_name(rng)
+        if name in seen:
+            name = f"{name} {_pick(rng, SEQUELS)}"
+        while name in seen:
+            name = f"{name} ({int(rng.integers(1995, 2026))})"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def topic_labels(n_topics: int, seed: int) -> list[tuple[list[str], list[str]]]:
+    """Main genres and tags of every embedding cluster."""
+    rng = np.random.default_rng(seed + 1)
+    return [
+        (list(rng.choice(GENRES, size=3, replace=False)), list(rng.choice(TAGS, size=10, replace=False)))
+        for _ in range(n_topics)
+    ]
+
+
+def synthetic_rows(n: int, dim: int = 384, seed: int = 0, n_topics: int = 200) -> tuple[list, list, list]:
+    """
+    (games rows, game_texts rows, game_embeddings rows) for n synthetic games, appids 1..n.
+    """
+    rng = np.random.default_rng(seed)
+    vectors, topic_of = clustered_embeddings(n, dim=dim, n_topics=n_topics, seed=seed, return_topics=True)
+    labels = topic_labels(n_topics, seed)
+    names = unique_names(n, rng)
+    first_release = date(2005, 1, 1)
+
+    games, texts, embeddings = [], [], []
+    for i, name in enumerate(names):
+        appid = i + 1
+        topic_genres, topic_tags = labels[topic_of[i]]
+        genres = topic_genres[:int(rng.integers(1, 4))]
+        tags = list(dict.fromkeys(
+            list(rng.choice(topic_tags, size=int(rng.integers(4, 9)), replace=False))
+            + list(rng.choice(TAGS, size=int(rng.integers(0, 4)), replace=False))
+        ))
+        free = rng.random() < 0.12
+        description = ". ".join(
+            _pick(rng, PHRASES).format(noun=_pick(rng, NOUNS).lower(), place=_pick(rng, PLACES))
+            for _ in range(int(rng.integers(2, 6)))
+        )
+
+        games.append({
+            "appid": appid,
+            "name": name,
+            "release_date": first_release + timedelta(days=int(rng.integers(0, 7300))),
+            "required_age": int(_pick(rng, [0, 0, 0, 0, 12, 16, 18])),
+            "price": 0.0 if free else float(_pick(rng, [0.99, 4.99, 9.99, 14.99, 19.99, 24.99, 29.99, 39.99, 59.99, 69.99])),
+            "dlc_count": int(rng.poisson(0.8)),
+            "header_image": f"https://cdn.example.com/steam/apps/{appid}/header.jpg",
+            "windows": True,
+            "mac": bool(rng.random() < 0.3),
+            "linux": bool(rng.random() < 0.2),
+            "genres": ", ".join(genres),
+            "tags": ", ".join(tags),
+            "popularity": float(rng.pareto(1.2) * 50),
+        })
+        texts.append({
+            "appid": appid,
+            "text_for_embedding": f"Name: {name}. Genres: {', '.join(genres)}. Tags: {', '.join(tags)}. Description: {description}.",
+        })
+        embeddings.append({"appid": appid, "embedding": vectors[i].tobytes()})
+
+    return games, texts, embeddings
+
+
+def populate_synthetic_db(db, n: int, dim: int = 384, seed: int = 0) -> list[str]:
+    """
+    Fill the games tables with `n` synthetic games and clustered embeddings.
+    Returns the generated game names (appid i + 1 is names[i]).
+    """
+    from sqlalchemy import insert
+    from database.tables import Game, GameText, GameEmbedding
+    from backend.crud import bump_catalog_version
+
+    games, texts, embeddings = synthetic_rows(n, dim=dim, seed=seed)
+    for model, rows in ((Game, games), (GameText, texts), (GameEmbedding, embeddings)):
+        for start in range(0, len(rows), 5000):
+            db.execute(insert(model), rows[start:start + 5000])
+
+    bump_catalog_version(db)
+    db.commit()
+    return [game["name"] for game in games]
+
+
+def create_synthetic_db(path: str, n: int, seed: int = 0) -> list[str]:
+    """
+    Creates (or refills) a SQLite database file with n synthetic games through the
+    application's own engine. Must run before database.db is imported elsewhere.
+    """
+    os.environ["NEXTGAME_DATABASE_URL"] = f"sqlite:///{path}"
+    from database.create_db import create_tables
+    from database.db import SessionLocal
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        return populate_synthetic_db(db, n, seed=seed)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic games catalogue to a SQLite database.")
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--db", default="nextgame-synthetic.db", help="Output SQLite file (must not contain games yet).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = create_synthetic_db(os.path.abspath(args.db), args.games, seed=args.seed)
+    print(f"{len(names)} games written to {args.db}, e.g. {names[:3]}")
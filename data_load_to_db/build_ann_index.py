@@ -0,0 +1,47 @@
+import argparse
+import time
+
+from database.db import SessionLocal
+from backend.ann_index import IVFIndex
+from backend.crud import embedding_store, ANN_INDEX_PATH
+
+# Run from the project root:
+#   python -m data_load_to_db.build_ann_index --nlist 512
+# The serving process picks the index up on its next catalogue reload as long as
+# the index was built for the current catalogue version.
+
+
+def build_index(nlist=None, n_iter=20, output=ANN_INDEX_PATH) -> IVFIndex:
+    db = SessionLocal()
+    try:
+        # Load the exact vectors the server will search, ignoring any old index on disk.
+        embedding_store.index_path = None
+        embedding_store.load(db)
+    finally:
+        db.close()
+
+    appids, matrix = embedding_store.arrays()
+
+    if len(appids) == 0:
+        raise RuntimeError("No embeddings found in the database. Run populate_db first.")
+
+    print(f"Training IVF index on {len(appids)} vectors...")
+    start = time.perf_counter()
+    index = IVFIndex.build(appids, matrix, nlist=nlist, n_iter=n_iter, version=embedding_store.version)
+    elapsed = time.perf_counter() - start
+
+    index.save(output)
+    print(f"Built IVF index with {index.nlist} lists in {elapsed:.1f}s (catalogue version {index.version}).")
+    print(f"Index saved to {output}")
+
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the IVF approximate nearest-neighbour index from the games table.")
+    parser.add_argument("--nlist", type=int, default=None, help="Number of k-means lists (default: 4 * sqrt(N)).")
+    parser.add_argument("--iterations", type=int, default=20, help="k-means iterations.")
+    parser.add_argument("--output", default=ANN_INDEX_PATH, help="Where to write the index file.")
+    args = parser.parse_args()
+
+    build_index(nlist=args.nlist, n_iter=args.iterations, output=args.output)
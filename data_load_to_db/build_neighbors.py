@@ -0,0 +1,126 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sqlalchemy import delete, insert
+from threadpoolctl import threadpool_limits
+from tqdm import tqdm
+
+from database.db import SessionLocal, engine
+from database.tables import GameNeighbors
+from database.create_db import create_tables
+from backend.crud import embedding_store
+
+# Run from the project root after a full catalogue load (populate_db):
+#   python -m data_load_to_db.build_neighbors --k 50 --workers 8
+# Computes the exact top-K neighbours of every game and replaces the game_neighbors
+# table. /recommend/ then reads one row per request instead of scanning all vectors.
+# After incremental syncs a row stays in use as long as the change log shows the game,
+# its listed neighbours and their scores are unchanged and no changed game would now
+# rank among them (backend/crud.py get_precomputed_neighbors); other rows fall back
+# to live search until the next rebuild.
+
+NEIGHBORS_K = 50
+BLOCK_BYTES = 64 * 1024 * 1024   # memory of one (block x n) float32 score matrix
+INSERT_BATCH_SIZE = 5000
+
+
+def top_k_block(matrix: np.ndarray, start: int, end: int, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rows start:end of the all-pairs top-k: one matrix-matrix product, self-matches excluded.
+    Returns (row indices, scores), both (end - start, k) in descending score order.
+    """
+    scores = matrix[start:end] @ matrix.T
+    scores[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+    # Partitioning for the k largest directly avoids a negated copy of the block.
+    top = np.argpartition(scores, -k, axis=1)[:, -k:]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def compute_neighbors(matrix: np.ndarray, k: int = NEIGHBORS_K, workers=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k neighbours (row indices, scores) of every row of an L2-normalized matrix.
+    Blocks of rows are scored on a thread pool; each thread uses single-threaded BLAS so
+    the cores are split between blocks instead of oversubscribed.
+    """
+    n = len(matrix)
+    k = min(k, n - 1)
+    workers = workers or os.cpu_count() or 1
+    block = max(1, BLOCK_BYTES // (4 * n))
+
+    neighbors = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+
+    def run(start):
+        end = min(start + block, n)
+        neighbors[start:end], scores[start:end] = top_k_block(matrix, start, end, k)
+        return end - start
+
+    with threadpool_limits(limits=1, user_api="blas"), ThreadPoolExecutor(max_workers=workers) as pool, \
+            tqdm(total=n, unit="games") as progress:
+        for done in pool.map(run, range(0, n, block)):
+            progress.update(done)
+
+    return neighbors, scores
+
+
+def build_neighbors(k=NEIGHBORS_K, workers=None) -> int:
+    create_tables()
+
+    db = SessionLocal()
+    try:
+        # Exact vectors (memmap file if current, otherwise the database), no ANN index.
+        embedding_store.index_path = None
+        embedding_store.load(db)
+    finally:
+        db.close()
+
+    version = embedding_store.version
+    appids, matrix = embedding_store.arrays()
+
+    if len(appids) < 2:
+        raise RuntimeError("Not enough embeddings in the database. Run populate_db first.")
+
+    print(f"Computing top-{k} neighbours for {len(appids)} games...")
+    start = time.perf_counter()
+    rows, scores = compute_neighbors(np.ascontiguousarray(matrix), k=k, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"Neighbours computed in {elapsed:.1f}s ({len(appids) / elapsed:.0f} games/sec).")
+
+    neighbor_appids = appids[rows].astype(np.int32)
+    scores = scores.astype(np.float16)
+
+    # One transaction: readers see either the old table or the complete new one.
+    with engine.begin() as connection:
+        connection.execute(delete(GameNeighbors))
+        for batch_start in range(0, len(appids), INSERT_BATCH_SIZE):
+            batch_end = min(batch_start + INSERT_BATCH_SIZE, len(appids))
+            connection.execute(insert(GameNeighbors), [
+                {
+                    "appid": int(appids[i]),
+                    "version": version,
+                    "neighbors": neighbor_appids[i].tobytes(),
+                    "scores": scores[i].tobytes(),
+                }
+                for i in range(batch_start, batch_end)
+            ])
+
+    size_mb = (neighbor_appids.nbytes + scores.nbytes) / (1024 * 1024)
+    print(f"game_neighbors written: {len(appids)} rows, {size_mb:.1f} MB, catalogue version {version}.")
+
+    return len(appids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the top-K neighbour table used by /recommend/.")
+    parser.add_argument("--k", type=int, default=NEIGHBORS_K, help="Neighbours stored per game (/recommend/ uses 20).")
+    parser.add_argument("--workers", type=int, default=None, help="Threads scoring blocks in parallel (default: all cores).")
+    args = parser.parse_args()
+
+    build_neighbors(k=args.k, workers=args.workers)
@@ -0,0 +1,53 @@
+import argparse
+import time
+
+from database.db import SessionLocal
+from backend.quantization import PQVectors
+from backend.crud import embedding_store, PQ_CODES_PATH
+
+# Run from the project root:
+#   python -m data_load_to_db.build_pq_codes --subvectors 48
+# Trains the product-quantization codebooks used when NEXTGAME_VECTOR_QUANTIZATION=pq
+# and stores them together with the codes of every game. The server never trains
+# codebooks itself: it loads this file, uses the codes as they are if they were built
+# for the current catalogue version, and otherwise re-encodes the vectors with the
+# stored codebooks. Rebuild after large catalogue changes so the codebooks keep
+# matching the data.
+
+
+def build_codes(subvectors=48, n_iter=10, sample_size=20_000, output=PQ_CODES_PATH) -> PQVectors:
+    db = SessionLocal()
+    try:
+        # Load the exact vectors the server will search, without an old index or codes file.
+        embedding_store.index_path = None
+        embedding_store.quantization = None
+        embedding_store.load(db)
+    finally:
+        db.close()
+
+    appids, matrix = embedding_store.arrays()
+
+    if len(appids) == 0:
+        raise RuntimeError("No embeddings found in the database. Run populate_db first.")
+
+    print(f"Training PQ codebooks ({subvectors} subvectors) on {min(len(appids), sample_size)} of {len(appids)} vectors...")
+    start = time.perf_counter()
+    codes = PQVectors.build(matrix, m=subvectors, n_iter=n_iter, sample_size=sample_size)
+    elapsed = time.perf_counter() - start
+
+    codes.save(output, appids, version=embedding_store.version)
+    print(f"Built PQ codes ({codes.nbytes / 2**20:.1f} MB) in {elapsed:.1f}s (catalogue version {embedding_store.version}).")
+    print(f"Codes saved to {output}")
+
+    return codes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train product-quantization codebooks and encode the games table.")
+    parser.add_argument("--subvectors", type=int, default=48, help="Number of subvectors, one byte each (must divide the dimension).")
+    parser.add_argument("--iterations", type=int, default=10, help="k-means iterations per subspace.")
+    parser.add_argument("--sample-size", type=int, default=20_000, help="Number of vectors to train the codebooks on.")
+    parser.add_argument("--output", default=PQ_CODES_PATH, help="Where to write the codes file.")
+    args = parser.parse_args()
+
+    build_codes(subvectors=args.subvectors, n_iter=args.iterations, sample_size=args.sample_size, output=args.output)
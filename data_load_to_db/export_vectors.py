@@ -0,0 +1,51 @@
+import argparse
+import time
+
+from database.db import SessionLocal
+from backend.crud import embedding_store, VECTOR_FILE_PATH
+from backend.embedding_store import get_catalog_version
+from backend.vector_file import write_vector_file, open_vector_file, writer_lock
+
+# Run from the project root after every catalogue load:
+#   python -m data_load_to_db.export_vectors
+# Every uvicorn worker then memory-maps the same file instead of decoding its own
+# copy of the embedding BLOBs.
+
+
+def export_vectors(output=VECTOR_FILE_PATH, verify=False) -> dict:
+    db = SessionLocal()
+    try:
+        version = get_catalog_version(db)
+        start = time.perf_counter()
+        # Always decode from the database so the export reflects the table, not an older file.
+        appids, matrix = embedding_store.read_from_db(db)
+    finally:
+        db.close()
+
+    if len(appids) == 0:
+        raise RuntimeError("No embeddings found in the database. Run populate_db first.")
+
+    # Serving workers patching the file after a sync take the same lock, so only one process writes at a time.
+    with writer_lock(output, timeout=300):
+        manifest = write_vector_file(output, appids, matrix, catalog_version=version)
+    elapsed = time.perf_counter() - start
+
+    size_mb = matrix.nbytes / (1024 * 1024)
+    print(f"Exported {manifest['count']} vectors ({size_mb:.1f} MB) for catalogue version {version} in {elapsed:.1f}s.")
+    print(f"Vector file written to {output}")
+
+    if verify:
+        if open_vector_file(output, expected_version=version, verify_checksum=True) is None:
+            raise RuntimeError("Verification of the exported vector file failed.")
+        print("Checksum verified.")
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all game embeddings to a flat, memory-mappable .npy file.")
+    parser.add_argument("--output", default=VECTOR_FILE_PATH, help="Path of the .npy file to write.")
+    parser.add_argument("--verify", action="store_true", help="Re-open the file and check its sha256 after writing.")
+    args = parser.parse_args()
+
+    export_vectors(output=args.output, verify=args.verify)
@@ -0,0 +1,369 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from database.db import SessionLocal
+from database.tables import Game, GameEmbedding
+from database.create_db import create_tables
+from backend.crud import content_hash, EMBEDDING_DIM, EMBEDDING_DTYPE
+from data_load_to_db.populate_db import PARQUET_FILE, BATCH_SIZE, EMBEDDING_MODEL_KEY
+
+# Offline, CPU-only embedding stage. Run from the project root:
+#   python -m data_load_to_db.generate_embeddings dataset_cleaned.parquet dataset_embedded.parquet --workers 4
+# then load the output with populate_db or sync_catalog.
+#
+# * Texts are deduplicated by content hash (the same sha256 stored in games.content_hash);
+#   hashes already in the checkpoint directory or in the database (stored by the same
+#   model) are never re-encoded.
+# * The remaining texts are sorted by length and cut into chunks, so every batch the model
+#   sees has texts of similar length and little padding.
+# * Chunks are encoded in a process pool (one model copy and a share of the CPU threads per
+#   process). Every finished chunk is written to the checkpoint directory as its own shard,
+#   so an interrupted run resumes where it stopped.
+# * The output parquet is the input plus an 'embedding' column (fixed size float32 list);
+#   its schema metadata names the model, which populate_db stores with every vector.
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHECKPOINT_DIR = Path("./database/embedding_cache")
+CHUNK_SIZE = 2048         # texts per pool task and per checkpoint shard
+ENCODE_BATCH_SIZE = 64    # texts per forward pass inside a chunk
+
+_worker_model = None
+
+
+def _require_sentence_transformers():
+    if importlib.util.find_spec("sentence_transformers") is None:
+        raise RuntimeError(
+            "The embedding stage needs sentence-transformers (CPU build of torch is enough): "
+            "pip install -r requirements-embeddings.txt"
+        )
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_chunk(texts: list[str], batch_size: int) -> np.ndarray:
+    vectors = _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=EMBEDDING_DTYPE)
+
+
+class TextEncoder:
+    """
+    Encodes texts with a sentence-transformers model on the CPU, optionally across a process pool.
+    The pool (and the model in every worker) is started on first use and kept until close().
+    """
+
+    def __init__(self, model_name=MODEL_NAME, workers=1, chunk_size=CHUNK_SIZE, batch_size=ENCODE_BATCH_SIZE,
+                 sort_by_length=True):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.sort_by_length = sort_by_length
+        self._pool = None
+        self._local_ready = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _threads_per_worker(self) -> int:
+        return max(1, (os.cpu_count() or 1) // self.workers)
+
+    def _ensure_local(self):
+        if not self._local_ready:
+            _init_worker(self.model_name, self._threads_per_worker())
+            self._local_ready = True
+
+    def _submit(self, texts):
+        if self._pool is None:
+            # spawn: torch is not fork-safe once its thread pool is running.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self._threads_per_worker()),
+            )
+        return self._pool.submit(_encode_chunk, texts, self.batch_size)
+
+    def encode(self, texts: list[str], on_chunk=None) -> np.ndarray:
+        """
+        Returns the (len(texts), dim) float32 matrix in input order.
+        on_chunk(indices, vectors) is called as each chunk finishes, e.g. to checkpoint it.
+        """
+        if not texts:
+            return np.empty((0, EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+
+        _require_sentence_transformers()
+
+        # Longest first: similar lengths share a batch and the slowest chunks start early.
+        if self.sort_by_length:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        else:
+            order = list(range(len(texts)))
+        chunks = [order[i:i + self.chunk_size] for i in range(0, len(order), self.chunk_size)]
+        result = np.empty((len(texts), EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+
+        def finish(indices, vectors):
+            if vectors.shape[1] != EMBEDDING_DIM:
+                raise RuntimeError(f"Model produced {vectors.shape[1]}-d vectors, the database expects {EMBEDDING_DIM}.")
+            result[indices] = vectors
+            if on_chunk is not None:
+                on_chunk(indices, vectors)
+
+        if self.workers == 1:
+            self._ensure_local()
+            for indices in chunks:
+                finish(indices, _encode_chunk([texts[i] for i in indices], self.batch_size))
+            return result
+
+        futures = {self._submit([texts[i] for i in indices]): indices for indices in chunks}
+        for future in as_completed(futures):
+            finish(futures[future], future.result())
+        return result
+
+    def blobs(self, texts: list[str]) -> list[bytes]:
+        """
+        Embedder for sync_catalog: one float32 BLOB per text.
+        """
+        return [row.tobytes() for row in self.encode(texts)]
+
+
+class EmbeddingCheckpoint:
+    """
+    Vectors finished so far, keyed by content hash, stored as .npz shards in one directory.
+    A manifest pins the model and dimension so vectors of different models are never mixed.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, model_name=MODEL_NAME, dim=EMBEDDING_DIM):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.dim = dim
+        self.vectors = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.vectors
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def load(self) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / "manifest.json"
+
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+            if manifest.get("model") != self.model_name or manifest.get("dim") != self.dim:
+                raise RuntimeError(
+                    f"Checkpoint directory {self.directory} was written by {manifest.get('model')} "
+                    f"({manifest.get('dim')}-d). Use another --checkpoint-dir or --reset."
+                )
+        else:
+            manifest_path.write_text(json.dumps({"model": self.model_name, "dim": self.dim}))
+
+        for shard in sorted(self.directory.glob("shard-*.npz")):
+            with np.load(shard) as data:
+                for key, vector in zip(data["hashes"].tolist(), data["vectors"]):
+                    self.vectors[key] = vector
+        return len(self.vectors)
+
+    def reset(self) -> None:
+        for path in self.directory.glob("shard-*.npz"):
+            path.unlink()
+        manifest_path = self.directory / "manifest.json"
+        if manifest_path.exists():
+            manifest_path.unlink()
+        self.vectors = {}
+
+    def add(self, hashes: list[str], vectors: np.ndarray) -> None:
+        if not hashes:
+            return
+
+        shard = self.directory / f"shard-{time.time_ns()}-{hashes[0][:12]}.npz"
+        tmp_path = shard.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, hashes=np.array(hashes), vectors=np.asarray(vectors, dtype=EMBEDDING_DTYPE))
+        # Half-written shards never get the .npz name, so a crash cannot leave a corrupt one.
+        os.replace(tmp_path, shard)
+
+        for key, vector in zip(hashes, vectors):
+            self.vectors[key] = vector
+
+
+def vectors_from_db(hashes: list[str], model_name: str = MODEL_NAME) -> tuple[list[str], np.ndarray]:
+    """
+    Embeddings already in the database for the given content hashes, produced by 'model_name'.
+    Vectors of other models (or of an unknown one) are never mixed into the output.
+    content_hash is not indexed, so this is one streaming pass over the table instead of many IN scans.
+    """
+    wanted = set(hashes)
+    found, rows = [], []
+
+    db = SessionLocal()
+    try:
+        query = db.query(Game.content_hash, GameEmbedding.embedding) \
+            .join(GameEmbedding, GameEmbedding.appid == Game.appid) \
+            .filter(GameEmbedding.model == model_name)
+        for key, blob in query.yield_per(5000):
+            if key not in wanted:
+                continue
+            vector = np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+            if vector.size == EMBEDDING_DIM:
+                wanted.discard(key)
+                found.append(key)
+                rows.append(vector)
+    finally:
+        db.close()
+
+    if not rows:
+        return [], np.empty((0, EMBEDDING_DIM), dtype=EMBEDDING_DTYPE)
+    return found, np.vstack(rows)
+
+
+def embedding_column(vectors: np.ndarray) -> pa.FixedSizeListArray:
+    flat = pa.array(np.ascontiguousarray(vectors, dtype=EMBEDDING_DTYPE).ravel())
+    return pa.FixedSizeListArray.from_arrays(flat, EMBEDDING_DIM)
+
+
+def write_output(parquet_file, output, hashes: list[str], checkpoint: EmbeddingCheckpoint, batch_size=BATCH_SIZE) -> None:
+    parquet = pq.ParquetFile(parquet_file)
+    tmp_path = f"{output}.tmp"
+    writer = None
+    position = 0
+
+    try:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            table = pa.Table.from_batches([batch])
+            if "embedding" in table.column_names:
+                table = table.drop_columns(["embedding"])
+
+            batch_hashes = hashes[position:position + table.num_rows]
+            position += table.num_rows
+            vectors = np.vstack([checkpoint.vectors[key] for key in batch_hashes])
+            table = table.append_column("embedding", embedding_column(vectors))
+            metadata = {**(table.schema.metadata or {}), EMBEDDING_MODEL_KEY: checkpoint.model_name.encode()}
+            table = table.replace_schema_metadata(metadata)
+
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    os.replace(tmp_path, output)
+
+
+def generate_embeddings(parquet_file=PARQUET_FILE, output=None, model_name=MODEL_NAME, workers=1,
+                        chunk_size=CHUNK_SIZE, batch_size=ENCODE_BATCH_SIZE, checkpoint_dir=CHECKPOINT_DIR,
+                        reuse_db=True, reset=False) -> dict:
+    """
+    Encodes every text_for_embedding of the parquet file that has no vector yet and
+    writes the parquet again with an 'embedding' column.
+    """
+    output = output or Path(parquet_file).with_name(Path(parquet_file).stem + "_embedded.parquet")
+
+    texts = pq.read_table(parquet_file, columns=["text_for_embedding"]).column(0).to_pylist()
+    texts = [text or "" for text in texts]
+    hashes = [content_hash(text) for text in texts]
+
+    unique = {}
+    for key, text in zip(hashes, texts):
+        unique.setdefault(key, text)
+
+    checkpoint = EmbeddingCheckpoint(checkpoint_dir, model_name=model_name)
+    if reset:
+        checkpoint.reset()
+    checkpoint.load()
+
+    pending = [key for key in unique if key not in checkpoint]
+    from_checkpoint = len(unique) - len(pending)
+    from_db = 0
+    if reuse_db and pending:
+        create_tables()  # adds game_embeddings.model to older databases
+        found, vectors = vectors_from_db(pending, model_name)
+        checkpoint.add(found, vectors)
+        from_db = len(found)
+        pending = [key for key in pending if key not in checkpoint]
+
+    stats = {
+        "rows": len(texts),
+        "unique_texts": len(unique),
+        "from_checkpoint": from_checkpoint,
+        "from_database": from_db,
+        "encoded": len(pending),
+    }
+    print(f"{stats['rows']} rows, {stats['unique_texts']} unique texts; {len(pending)} to encode "
+          f"with {workers} worker(s) ({from_db} reused from the database).")
+
+    start = time.perf_counter()
+    if pending:
+        pending_texts = [unique[key] for key in pending]
+
+        with tqdm(total=len(pending), unit="texts") as progress, \
+                TextEncoder(model_name, workers=workers, chunk_size=chunk_size, batch_size=batch_size) as encoder:
+            def on_chunk(indices, vectors):
+                checkpoint.add([pending[i] for i in indices], vectors)
+                progress.update(len(indices))
+
+            encoder.encode(pending_texts, on_chunk=on_chunk)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 2)
+    stats["texts_per_sec"] = round(len(pending) / elapsed, 1) if pending and elapsed > 0 else None
+    if pending:
+        print(f"Encoded {len(pending)} texts in {elapsed:.1f}s ({stats['texts_per_sec']} texts/sec).")
+
+    write_output(parquet_file, output, hashes, checkpoint)
+    print(f"Embedded parquet written to {output}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode text_for_embedding into vectors (CPU, batched, multi-process).")
+    parser.add_argument("parquet", nargs="?", default=PARQUET_FILE, help="Path of the cleaned parquet file.")
+    parser.add_argument("output", nargs="?", default=None, help="Output parquet (default: <input>_embedded.parquet).")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--workers", type=int, default=1, help="Encoder processes; CPU threads are split between them.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Texts per task and per checkpoint shard.")
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE, help="Texts per forward pass.")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--no-reuse-db", action="store_true", help="Do not reuse vectors of unchanged texts from the database.")
+    parser.add_argument("--reset", action="store_true", help="Discard the checkpoint directory before starting.")
+    args = parser.parse_args()
+
+    generate_embeddings(
+        args.parquet,
+        output=args.output,
+        model_name=args.model,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        checkpoint_dir=args.checkpoint_dir,
+        reuse_db=not args.no_reuse_db,
+        reset=args.reset,
+    )
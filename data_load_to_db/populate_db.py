@@ -1,90 +1,233 @@
-import pandas as pd
+import argparse
+import time
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from tqdm import tqdm
-from datetime import datetime
 from pathlib import Path
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from database.db import SessionLocal, engine
-from database.tables import Game, User
+from database.tables import Game, GameText, GameEmbedding
 from database.create_db import create_tables
+from backend.crud import bump_catalog_version, content_hash, EMBEDDING_DIM, EMBEDDING_DTYPE
 
-create_tables()
+# Run from the project root:
+#   python -m data_load_to_db.populate_db [path/to/dataset_cleaned.parquet]
+# The parquet file is streamed in Arrow record batches; every batch is transformed
+# column-wise and upserted in its own transaction, so a failure only loses the
+# current batch and re-running the loader is safe.
 
 PARQUET_FILE = Path("C:/Projects/game/dataset_cleaned.parquet")
-
-try:
-    df = pd.read_parquet(PARQUET_FILE)
-    print(f"Parquet file loaded successfully with {len(df)} records.")
-except FileNotFoundError:
-    raise FileNotFoundError(f"Parquet file not found at {PARQUET_FILE}. Please ensure the file exists.")
-except Exception as e:
-    raise RuntimeError(f"An error occurred while reading the Parquet file: {e}")
-
-db = SessionLocal()
-
-print("Populating the database with game data...")
-
-try:
-    for _, row in tqdm(df.iterrows(), total=df.shape[0]):
-
-        release_date_obj = None
-
-        try:
-            release_date_str = row.get("release_date", '')
-            if isinstance(release_date_str, str) and release_date_str:
-                for fmt in ("%Y-%m-%d"):
-                    try:
-                        release_date_obj = datetime.strptime(release_date_str, fmt).date()
-                        break
-                    except ValueError:
-                        continue
-        except:
-            release_date_obj = None
-        
-        genres_str = ", ".join(row["genres"]) if isinstance(row["genres"], list) else str(row["genres"])
-        tags_str = ", ".join(row["tags"].keys()) if isinstance(row["tags"], dict) else str(row["tags"])
-        categories_str = ", ".join(row["categories"]) if isinstance(row["categories"], list) else str(row["categories"])
-        supported_languages_str = ", ".join(row["supported_languages"]) if isinstance(row["supported_languages"], list) else str(row["supported_languages"])
-
-        developers = ", ".join(row["developers"]) if isinstance(row["developers"], list) else str(row["developers"])
-        publishers = ", ".join(row["publishers"]) if isinstance(row["publishers"], list) else str(row["publishers"])
-
-        embedding_bytes = row["embedding"].tobytes()
-
-        game = Game(
-            appid = row["appid"],
-            name = row.get("name", ""),
-            release_date = release_date_obj,
-            required_age = row.get("required_age", 0),
-            price = row.get("price", 0.0),
-            dlc_count = row.get("dlc_count", 0),
-
-            header_image = row.get("header_image", None),
-            website = row.get("website", None),
-
-            windows = row.get("windows", None),
-            mac = row.get("mac", None),
-            linux = row.get("linux", None),
-
-            supported_languages = supported_languages_str,
-            genres = genres_str,
-            tags = tags_str,
-            categories = categories_str,
-            developers = developers,
-            publishers = publishers,
-
-            text_for_embedding = row.get("text_for_embedding", ""),
-            embedding = embedding_bytes
-        )
-
-        db.add(game)
-
-    db.commit()
-    print("Database population completed successfully.")
-
-except Exception as e:
-    db.rollback()
-    raise RuntimeError(f"An error occurred while populating the database: {e}")
-finally:
-    db.close()
-    print("Database session closed.")
+BATCH_SIZE = 5000
+# Parquet schema metadata key under which generate_embeddings names the embedding model.
+EMBEDDING_MODEL_KEY = b"embedding_model"
+
+LIST_COLUMNS = {
+    "genres": "genres",
+    "categories": "categories",
+    "supported_languages": "supported_languages",
+    "developers": "developers",
+    "publishers": "publishers",
+}
+
+DEFAULTS = {
+    "name": "",
+    "required_age": 0,
+    "price": 0.0,
+    "dlc_count": 0,
+    "header_image": None,
+    "website": None,
+    "windows": None,
+    "mac": None,
+    "linux": None,
+    "recommendations": None,
+    "text_for_embedding": "",
+}
+
+
+def _join_values(value) -> str:
+    # Fallback for columns Arrow cannot join natively (mixed/struct types).
+    if isinstance(value, dict):
+        return ", ".join(str(key) for key, count in value.items() if count is not None)
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return ", ".join(str(item[0]) if isinstance(item, tuple) else str(item) for item in value)
+    return str(value)
+
+
+def join_column(column: pa.ChunkedArray) -> list:
+    """
+    Turns a list/map column into comma separated strings, column-wise where possible.
+    """
+    column_type = column.type
+
+    if pa.types.is_map(column_type):
+        return pc.binary_join(pc.map_keys(column), ", ").to_pylist()
+    if pa.types.is_list(column_type) or pa.types.is_large_list(column_type):
+        if pa.types.is_string(column_type.value_type) or pa.types.is_large_string(column_type.value_type):
+            return pc.binary_join(column, ", ").to_pylist()
+    if pa.types.is_string(column_type) or pa.types.is_large_string(column_type):
+        return column.to_pylist()
+
+    return [None if value is None else _join_values(value) for value in column.to_pylist()]
+
+
+def parse_dates(column: pa.ChunkedArray) -> list:
+    if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+        return pc.cast(column, pa.date32()).to_pylist()
+    parsed = pc.strptime(column.cast(pa.string()), format="%Y-%m-%d", unit="s", error_is_null=True)
+    return pc.cast(parsed, pa.date32()).to_pylist()
+
+
+def embedding_blobs(column: pa.ChunkedArray) -> list:
+    """
+    Converts the embedding column to float32 BLOBs with one flat copy instead of a per-row tobytes().
+    Rows without an embedding (null) stay None.
+    """
+    if pa.types.is_binary(column.type) or pa.types.is_large_binary(column.type):
+        return column.to_pylist()
+
+    column = column.combine_chunks()
+    present = column.is_valid().to_numpy(zero_copy_only=False)
+    values = column.drop_null().flatten().to_numpy(zero_copy_only=False).astype(EMBEDDING_DTYPE, copy=False)
+    matrix = values.reshape(-1, EMBEDDING_DIM)
+    row_size = EMBEDDING_DIM * np.dtype(EMBEDDING_DTYPE).itemsize
+    buffer = matrix.tobytes()
+
+    blobs = [None] * len(column)
+    for i, row in enumerate(np.flatnonzero(present).tolist()):
+        blobs[row] = buffer[i * row_size:(i + 1) * row_size]
+    return blobs
+
+
+def embedding_model(schema: pa.Schema):
+    """
+    Model named in the parquet metadata by generate_embeddings; None for files without it.
+    """
+    value = (schema.metadata or {}).get(EMBEDDING_MODEL_KEY)
+    return value.decode() if value else None
+
+
+def prepare_batch(batch: pa.RecordBatch) -> list[dict]:
+    """
+    Builds the row dictionaries for one record batch, transforming whole columns at once.
+    """
+    table = pa.Table.from_batches([batch])
+    n = table.num_rows
+
+    def column_or_default(name):
+        if name in table.column_names:
+            return table.column(name).to_pylist()
+        return [DEFAULTS[name]] * n
+
+    columns = {
+        "appid": table.column("appid").to_pylist(),
+        "name": column_or_default("name"),
+        "release_date": parse_dates(table.column("release_date")) if "release_date" in table.column_names else [None] * n,
+        "required_age": column_or_default("required_age"),
+        "price": column_or_default("price"),
+        "dlc_count": column_or_default("dlc_count"),
+        "header_image": column_or_default("header_image"),
+        "website": column_or_default("website"),
+        "windows": column_or_default("windows"),
+        "mac": column_or_default("mac"),
+        "linux": column_or_default("linux"),
+        "tags": join_column(table.column("tags")) if "tags" in table.column_names else [None] * n,
+        "popularity": column_or_default("recommendations"),
+        "text_for_embedding": column_or_default("text_for_embedding"),
+        "embedding": embedding_blobs(table.column("embedding")) if "embedding" in table.column_names else [None] * n,
+    }
+    columns["content_hash"] = [content_hash(text) for text in columns["text_for_embedding"]]
+    model = embedding_model(batch.schema)
+    columns["embedding_model"] = [model if blob is not None else None for blob in columns["embedding"]]
+    for target, source in LIST_COLUMNS.items():
+        columns[target] = join_column(table.column(source)) if source in table.column_names else [None] * n
+
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def upsert_statement(table=Game.__table__):
+    # SQLite and PostgreSQL share the ON CONFLICT ... DO UPDATE syntax.
+    insert = postgresql_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(table)
+    updatable = {column.name: stmt.excluded[column.name] for column in table.columns if column.name != "appid"}
+    return stmt.on_conflict_do_update(index_elements=["appid"], set_=updatable)
+
+
+GAME_COLUMNS = [column.name for column in Game.__table__.columns]
+
+
+def write_records(connection, records, statements) -> None:
+    """
+    Upserts full rows: metadata into games, the text into game_texts and the vector
+    into game_embeddings. Rows without an incoming embedding keep their stored vector
+    (if any). statements: (games, game_texts, game_embeddings) upserts.
+    """
+    games_stmt, texts_stmt, embeddings_stmt = statements
+    connection.execute(games_stmt, [{name: record[name] for name in GAME_COLUMNS} for record in records])
+    connection.execute(texts_stmt, [
+        {"appid": record["appid"], "text_for_embedding": record["text_for_embedding"]} for record in records
+    ])
+    embeddings = [
+        {"appid": record["appid"], "embedding": record["embedding"], "model": record["embedding_model"]}
+        for record in records if record["embedding"] is not None
+    ]
+    if embeddings:
+        connection.execute(embeddings_stmt, embeddings)
+
+
+def upsert_statements() -> tuple:
+    return tuple(upsert_statement(table) for table in (Game.__table__, GameText.__table__, GameEmbedding.__table__))
+
+
+def populate(parquet_file=PARQUET_FILE, batch_size=BATCH_SIZE) -> int:
+    create_tables()
+
+    try:
+        parquet = pq.ParquetFile(parquet_file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Parquet file not found at {parquet_file}. Please ensure the file exists.")
+    except Exception as e:
+        raise RuntimeError(f"An error occurred while reading the Parquet file: {e}")
+
+    total_rows = parquet.metadata.num_rows
+    print(f"Parquet file opened with {total_rows} records.")
+    print("Populating the database with game data...")
+
+    statements = upsert_statements()
+    written = 0
+    start = time.perf_counter()
+
+    with tqdm(total=total_rows, unit="rows") as progress:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            records = prepare_batch(batch)
+            # One transaction per batch: executemany of INSERT ... ON CONFLICT(appid) DO UPDATE per table.
+            with engine.begin() as connection:
+                write_records(connection, records, statements)
+            written += len(records)
+            progress.update(len(records))
+
+    db = SessionLocal()
+    try:
+        # Running servers see the new version and reload their in-memory copies.
+        bump_catalog_version(db)
+        db.commit()
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Database population completed: {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} rows/sec).")
+
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load (upsert) the games parquet into the database.")
+    parser.add_argument("parquet", nargs="?", default=PARQUET_FILE, help="Path of the cleaned parquet file.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    populate(args.parquet, batch_size=args.batch_size)
@@ -0,0 +1,62 @@
+import argparse
+
+from database.db import SessionLocal
+from database.create_db import create_tables
+from backend.crud import get_similar_game_embeddings_and_texts
+from backend.llm_responses import get_llm_analysis_for_embedding, recommendation_cache
+
+# Fill the Gemini recommendation cache ahead of traffic. Run from the project root:
+#   python -m data_load_to_db.prewarm_llm_cache "The Witcher 3: Wild Hunt" "Hades"
+#   python -m data_load_to_db.prewarm_llm_cache --file popular_games.txt --languages en tr
+#   python -m data_load_to_db.prewarm_llm_cache --refresh-top 100
+# --refresh-top regenerates the most requested cache entries so they do not expire.
+
+
+def prewarm_games(game_names, languages, force=False):
+    db = SessionLocal()
+    try:
+        for game_name in game_names:
+            candidate_texts = get_similar_game_embeddings_and_texts(db, target_game_name=game_name, top_n=20)
+            if not candidate_texts:
+                print(f"Skipping '{game_name}': game not found or no similar games.")
+                continue
+
+            for language in languages:
+                recommendations = get_llm_analysis_for_embedding(candidate_texts, language=language, use_cache=not force)
+                status = "ok" if recommendations else "FAILED"
+                print(f"[{status}] {game_name} ({language})")
+    finally:
+        db.close()
+
+
+def refresh_most_requested(limit):
+    for entry in recommendation_cache.most_requested(limit):
+        recommendations = get_llm_analysis_for_embedding(entry["candidates"], language=entry["language"], use_cache=False)
+        status = "ok" if recommendations else "FAILED"
+        print(f"[{status}] refreshed entry with {entry['hits']} hits ({entry['language']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the Gemini recommendation cache.")
+    parser.add_argument("games", nargs="*", help="Game names to warm.")
+    parser.add_argument("--file", help="Text file with one game name per line.")
+    parser.add_argument("--languages", nargs="+", default=["en", "tr"], choices=["en", "tr"])
+    parser.add_argument("--refresh-top", type=int, default=0, help="Regenerate the N most requested cache entries.")
+    parser.add_argument("--force", action="store_true", help="Call the LLM even if a valid cache entry exists.")
+    args = parser.parse_args()
+
+    create_tables()
+
+    game_names = list(args.games)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            game_names.extend(line.strip() for line in f if line.strip())
+
+    print(f"Purged {recommendation_cache.purge_expired()} expired cache entries.")
+
+    if game_names:
+        prewarm_games(game_names, args.languages, force=args.force)
+    if args.refresh_top:
+        refresh_most_requested(args.refresh_top)
+
+    print("Cache stats:", recommendation_cache.stats())
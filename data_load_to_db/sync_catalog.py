@@ -0,0 +1,174 @@
+import argparse
+import time
+import pyarrow.parquet as pq
+from tqdm import tqdm
+from sqlalchemy import bindparam, delete, select, update
+
+from database.db import SessionLocal, engine
+from database.tables import Game, GameText, GameEmbedding
+from database.create_db import create_tables
+from backend.crud import bump_catalog_version
+from data_load_to_db.populate_db import PARQUET_FILE, BATCH_SIZE, prepare_batch, upsert_statements, write_records
+from data_load_to_db.generate_embeddings import TextEncoder
+
+# Incremental catalogue sync. Run from the project root:
+#   python -m data_load_to_db.sync_catalog path/to/new_dataset.parquet [--prune] [--dry-run] [--embed]
+#
+# Every incoming row is compared with the games table by appid:
+#   * new appid                         -> inserted
+#   * text_for_embedding hash changed   -> metadata, text, hash and embedding rewritten
+#   * only metadata changed             -> metadata columns updated, embedding untouched
+#   * identical                         -> skipped
+# With --prune, games missing from the incoming dataset are deleted.
+# The changed appids are recorded with the new catalogue version so running servers
+# patch only those rows in their in-memory embedding store and autocomplete index.
+# Metadata-only changes are recorded separately: servers refresh their attributes and
+# names but keep their vectors and precomputed neighbours.
+
+METADATA_COLUMNS = [column.name for column in Game.__table__.columns if column.name not in {"appid", "content_hash"}]
+
+
+def _comparable(value):
+    # URLType and friends come back as objects; compare their text form.
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def fetch_existing(connection, appids) -> dict:
+    table = Game.__table__
+    columns = [table.c.appid, table.c.content_hash] + [table.c[name] for name in METADATA_COLUMNS]
+    rows = connection.execute(select(*columns).where(table.c.appid.in_(appids))).all()
+    return {row[0]: row for row in rows}
+
+
+def diff_batch(records, existing) -> tuple[list, list, list]:
+    """
+    Splits a batch into (rows to insert/rewrite fully, rows with metadata-only changes, unchanged appids).
+    """
+    full, metadata_only, unchanged = [], [], []
+
+    for record in records:
+        old = existing.get(record["appid"])
+
+        if old is None or old[1] != record["content_hash"]:
+            full.append(record)
+            continue
+
+        old_metadata = [_comparable(value) for value in old[2:]]
+        new_metadata = [_comparable(record[name]) for name in METADATA_COLUMNS]
+        if old_metadata != new_metadata:
+            metadata_only.append(record)
+        else:
+            unchanged.append(record["appid"])
+
+    return full, metadata_only, unchanged
+
+
+def metadata_update_statement():
+    table = Game.__table__
+    return update(table) \
+        .where(table.c.appid == bindparam("b_appid")) \
+        .values({name: bindparam(f"b_{name}") for name in METADATA_COLUMNS})
+
+
+def sync(parquet_file=PARQUET_FILE, batch_size=BATCH_SIZE, prune=False, dry_run=False, embedder=None,
+         embedder_model=None) -> dict:
+    """
+    Applies the incoming dataset to the games table, touching only rows that changed.
+
+    embedder: optional callable(list of texts) -> list of float32 BLOBs, used for
+    new/changed rows whose incoming embedding is missing. embedder_model is stored
+    with the vectors it produces.
+    """
+    create_tables()
+    parquet = pq.ParquetFile(parquet_file)
+
+    upserts = upsert_statements()
+    metadata_update = metadata_update_statement()
+    stats = {"inserted_or_text_changed": 0, "metadata_changed": 0, "unchanged": 0, "missing_embedding": 0, "deleted": 0}
+    upserted_appids, metadata_appids, deleted_appids = [], [], []
+    seen_appids = set()
+    start = time.perf_counter()
+
+    with tqdm(total=parquet.metadata.num_rows, unit="rows") as progress:
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            records = prepare_batch(batch)
+            seen_appids.update(record["appid"] for record in records)
+
+            with engine.begin() as connection:
+                existing = fetch_existing(connection, [record["appid"] for record in records])
+                full, metadata_only, unchanged = diff_batch(records, existing)
+
+                # Only rows whose text changed (or new rows) need a (re-)computed embedding.
+                needs_embedding = [record for record in full if record["embedding"] is None]
+                if needs_embedding and embedder is not None:
+                    for record, blob in zip(needs_embedding, embedder([r["text_for_embedding"] for r in needs_embedding])):
+                        record["embedding"] = blob
+                        record["embedding_model"] = embedder_model
+                    needs_embedding = []
+                if needs_embedding:
+                    missing = {record["appid"] for record in needs_embedding}
+                    stats["missing_embedding"] += len(missing)
+                    full = [record for record in full if record["appid"] not in missing]
+
+                if not dry_run:
+                    if full:
+                        write_records(connection, full, upserts)
+                    if metadata_only:
+                        connection.execute(metadata_update, [
+                            {f"b_{key}": value for key, value in record.items() if key in METADATA_COLUMNS or key == "appid"}
+                            for record in metadata_only
+                        ])
+
+            upserted_appids += [record["appid"] for record in full]
+            metadata_appids += [record["appid"] for record in metadata_only]
+            stats["inserted_or_text_changed"] += len(full)
+            stats["metadata_changed"] += len(metadata_only)
+            stats["unchanged"] += len(unchanged)
+            progress.update(len(records))
+
+    if prune:
+        with engine.begin() as connection:
+            stored = {appid for (appid,) in connection.execute(select(Game.__table__.c.appid))}
+            deleted_appids = sorted(stored - seen_appids)
+            if not dry_run:
+                for i in range(0, len(deleted_appids), 500):
+                    # SQLite does not enforce the foreign keys' ON DELETE CASCADE by default.
+                    for table in (GameEmbedding.__table__, GameText.__table__, Game.__table__):
+                        connection.execute(delete(table).where(table.c.appid.in_(deleted_appids[i:i + 500])))
+        stats["deleted"] = len(deleted_appids)
+
+    if not dry_run and (upserted_appids or metadata_appids or deleted_appids):
+        db = SessionLocal()
+        try:
+            stats["catalog_version"] = bump_catalog_version(db, upserted=upserted_appids, deleted=deleted_appids,
+                                                            metadata_only=metadata_appids)
+            db.commit()
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Sync {'(dry run) ' if dry_run else ''}finished in {elapsed:.1f}s: {stats}")
+    if stats["missing_embedding"]:
+        print(f"{stats['missing_embedding']} new/changed rows were skipped because they have no embedding.")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync a games parquet into the database.")
+    parser.add_argument("parquet", nargs="?", default=PARQUET_FILE, help="Path of the incoming parquet file.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--prune", action="store_true", help="Delete games that are not in the incoming dataset.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change.")
+    parser.add_argument("--embed", action="store_true", help="Encode new/changed rows that arrive without an embedding.")
+    parser.add_argument("--workers", type=int, default=1, help="Encoder processes used with --embed.")
+    args = parser.parse_args()
+
+    if args.embed and not args.dry_run:
+        with TextEncoder(workers=args.workers) as encoder:
+            sync(args.parquet, batch_size=args.batch_size, prune=args.prune, embedder=encoder.blobs,
+                 embedder_model=encoder.model_name)
+    else:
+        sync(args.parquet, batch_size=args.batch_size, prune=args.prune, dry_run=args.dry_run)
@@ -1,3 +1,4 @@
+from sqlalchemy import inspect, text
 from database.db import engine, Base
 from database.tables import Game, User
 
@@ -5,5 +6,96 @@ def create_tables():
     """Create database tables based on the defined models."""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    move_heavy_columns()
+    add_missing_columns()
+    backfill_content_hashes()
     print("Database tables created.")
-    # if the tables already exist, they will not be recreated or modified
\ No newline at end of file
+    # if the tables already exist, they will not be recreated or modified
+
+# Columns that used to be stored in the games row -> the table they live in now.
+HEAVY_COLUMNS = {
+    "text_for_embedding": "game_texts",
+    "embedding": "game_embeddings",
+}
+
+
+def move_heavy_columns():
+    """
+    Older databases stored text_for_embedding and embedding in the games table.
+    Copies them into game_texts / game_embeddings and drops them from games
+    (SQLite 3.35+ for DROP COLUMN). Runs once; later calls find nothing to move.
+    On SQLite the freed pages stay in the file until it is vacuumed.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table("games"):
+        return
+
+    existing = {column["name"] for column in inspector.get_columns("games")}
+    legacy = [name for name in HEAVY_COLUMNS if name in existing]
+    if not legacy:
+        return
+
+    with engine.begin() as connection:
+        for name in legacy:
+            table = HEAVY_COLUMNS[name]
+            moved = connection.execute(text(
+                f"INSERT INTO {table} (appid, {name}) SELECT appid, {name} FROM games "
+                f"WHERE {name} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.appid = games.appid)"
+            )).rowcount
+            connection.execute(text(f"ALTER TABLE games DROP COLUMN {name}"))
+            print(f"Moved games.{name} to {table} ({moved} rows)")
+
+    if engine.dialect.name == "sqlite":
+        print("Run VACUUM on the database file to reclaim the space of the moved columns.")
+
+
+def add_missing_columns():
+    """
+    create_all() never alters existing tables, so columns added to the models
+    later (all nullable) are added here with ALTER TABLE on older databases.
+    """
+    inspector = inspect(engine)
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"Added missing column {table.name}.{column.name}")
+
+
+def backfill_content_hashes(batch_size: int = 5000):
+    """
+    Databases created before games.content_hash existed have NULL there, which made
+    sync_catalog treat every game as a text change and re-embed the whole catalogue.
+    Fills the hash from game_texts. Later calls find nothing to fill; games without
+    a stored text keep NULL and are rewritten on their next sync.
+    """
+    # Imported here: backend.crud imports the tables module, and the hash must match populate_db's.
+    from backend.crud import content_hash
+
+    inspector = inspect(engine)
+    if not inspector.has_table("games") or not inspector.has_table("game_texts"):
+        return
+
+    with engine.begin() as connection:
+        rows = connection.execute(text(
+            "SELECT games.appid, game_texts.text_for_embedding FROM games "
+            "JOIN game_texts ON game_texts.appid = games.appid WHERE games.content_hash IS NULL"
+        )).all()
+
+        for start in range(0, len(rows), batch_size):
+            connection.execute(
+                text("UPDATE games SET content_hash = :content_hash WHERE appid = :appid"),
+                [{"appid": appid, "content_hash": content_hash(text_value)} for appid, text_value in rows[start:start + batch_size]],
+            )
+
+    if rows:
+        print(f"Filled games.content_hash for {len(rows)} games from game_texts")
@@ -1,7 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, Text, BLOB, Date, Boolean
-from sqlalchemy_utils import URLType
+from sqlalchemy import Column, Integer, String, Float, Text, BLOB, Date, DateTime, Boolean, ForeignKey
+from sqlalchemy.types import TypeDecorator, UnicodeText
 from database.db import Base
 
+
+class URLType(TypeDecorator):
+    """
+    URL stored as text. Same column type and values as sqlalchemy_utils.URLType without
+    furl installed (non-string values are stored as NULL, strings come back as strings),
+    but without importing sqlalchemy_utils, which alone adds ~0.2 s to every startup.
+    """
+    impl = UnicodeText
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return value if isinstance(value, str) else None
+
+
 class Game(Base):
     __tablename__ = "games"
 
@@ -29,9 +43,40 @@ class Game(Base):
     developers = Column(Text)
     publishers = Column(Text)
 
+    # Ranking signal for autocomplete (e.g. number of Steam recommendations).
+    popularity = Column(Float, nullable=True)
+
+    # sha256 of text_for_embedding; incremental syncs only re-embed rows whose hash changed.
+    content_hash = Column(String(64), nullable=True)
+
 
+# The long text and the 1.5 KB vector of a game live in their own tables, so the games
+# rows stay small: autocomplete, filter attributes and metadata lookups scan only a
+# fraction of the pages, and each heavy payload is read only by the code that needs it.
+
+class GameText(Base):
+    """
+    text_for_embedding of a game (the source of its embedding and of the LLM candidate
+    description). Read for a handful of candidates per request.
+    """
+    __tablename__ = "game_texts"
+
+    appid = Column(Integer, ForeignKey("games.appid", ondelete="CASCADE"), primary_key=True)
     text_for_embedding = Column(Text, nullable=False)
+
+
+class GameEmbedding(Base):
+    """
+    float32 embedding of a game's text_for_embedding. Only read in bulk when the
+    in-memory embedding store (re)loads. Games without a vector have no row.
+    'model' is the sentence-transformers model that produced the vector (NULL when
+    unknown, e.g. rows written before the column existed).
+    """
+    __tablename__ = "game_embeddings"
+
+    appid = Column(Integer, ForeignKey("games.appid", ondelete="CASCADE"), primary_key=True)
     embedding = Column(BLOB, nullable=False)
+    model = Column(String, nullable=True)
 
 class User(Base):
     __tablename__ = "users"
@@ -45,4 +90,66 @@ class User(Base):
     game_info = Column(Text, nullable=True)  # JSON formatında oyun bilgisi
     is_superuser = Column(Boolean, default=False)
 
-    ".... To be continued ...."
\ No newline at end of file
+    ".... To be continued ...."
+
+
+class CatalogVersion(Base):
+    """
+    Single-row counter bumped every time the games catalogue is written.
+    Serving processes compare it against the version of their in-memory
+    copies to know when they have to reload.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
+
+
+class CatalogChange(Base):
+    """
+    Which appids changed in each catalogue version. Serving processes that are
+    only a few versions behind patch those rows instead of reloading everything.
+    A row with appid NULL marks a full reload of that version. metadata_only rows
+    are games whose text (and so embedding) did not change; only their attributes
+    and name need refreshing.
+    """
+    __tablename__ = "catalog_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    version = Column(Integer, nullable=False, index=True)
+    appid = Column(Integer, nullable=True)
+    deleted = Column(Boolean, nullable=False, default=False)
+    metadata_only = Column(Boolean, nullable=True, default=False)
+
+
+class LLMCacheEntry(Base):
+    """
+    Persistent tier of the Gemini recommendation cache (see backend/llm_cache.py).
+    The candidate list is stored with the response so popular entries can be
+    regenerated before they expire without knowing which game produced them.
+    """
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    language = Column(String(8), nullable=False)
+    candidates = Column(Text, nullable=False)  # JSON list of candidate texts
+    response = Column(Text, nullable=False)  # JSON list of recommendations
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    hits = Column(Integer, nullable=False, default=0)
+
+class GameNeighbors(Base):
+    """
+    Precomputed most similar games of every game (data_load_to_db/build_neighbors.py).
+    'neighbors' holds int32 appids and 'scores' float16 cosine scores, both in
+    descending score order. 'version' is the catalogue version the row was computed
+    for. Rows of older versions are still used while the catalog_changes log shows
+    that no change since then affects them; otherwise similarity is computed live.
+    """
+    __tablename__ = "game_neighbors"
+
+    appid = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    neighbors = Column(BLOB, nullable=False)
+    scores = Column(BLOB, nullable=False)
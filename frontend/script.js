@@ -16,7 +16,9 @@ const translations = {
         "card_type_alternative": "Alternatif Cevher",
         "card_type_noteworthy": "Dikkate Değer",
         "card_reason_label": "Neden Önerildi?",
-        "card_note_label": "Not:"
+        "card_note_label": "Not:",
+        "candidates_title": "Benzer bulunan oyunlar",
+        "curating_text": "Adaylar bulundu, öneriler hazırlanıyor..."
     },
     "en": {
         "page_title": "NextGame Recommendation Engine",
@@ -34,7 +36,9 @@ const translations = {
         "card_type_alternative": "Alternative Gem",
         "card_type_noteworthy": "Noteworthy",
         "card_reason_label": "Why Recommended?",
-        "card_note_label": "Note:"
+        "card_note_label": "Note:",
+        "candidates_title": "Similar games found",
+        "curating_text": "Candidates found, curating recommendations..."
     }
 };
 
@@ -72,6 +76,9 @@ function debounce(func, delay) {
     }
 }
 
+// Yedek görsel SVG'si (header_image boş veya bozuksa kullanılır)
+const placeholderSVG = "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSI2MCIgaGVpZ2h0PSIzNCIgdmlld0JveD0iMCAwIDYwIDM0Ij48cmVjdCBmaWxsPSIjMzMzMzMzIiB3aWR0aD0iNjAiIGhlaWdodD0iMzQiLz48L3N2Zz4=";
+
 // --- GLOBAL DEĞİŞKEN ---
 // Seçili olan dil kodunu tutmak için (tr: Türkçe, en: İngilizce)
 let currentLanguage = 'tr'; // Varsayılan olarak Türkçe başlasın
@@ -172,9 +179,6 @@ function showSearchResults(searchResults) {
         return;
     }
 
-    // Yedek görsel SVG'si (header_image boş veya bozuksa kullanılır)
-    const placeholderSVG = "data:image/svg+xml;base64,PHN2ZyB4bWxucz0iaHR0cDovL3d3dy53My5vcmcvMjAwMC9zdmciIHdpZHRoPSI2MCIgaGVpZ2h0PSIzNCIgdmlld0JveD0iMCAwIDYwIDM0Ij48cmVjdCBmaWxsPSIjMzMzMzMzIiB3aWR0aD0iNjAiIGhlaWdodD0iMzQiLz48L3N2Zz4=";
-
     // Her bir arama sonucu için bir liste öğesi ('div') oluştur
     searchResults.forEach(game => {
         const item = document.createElement('div');
@@ -209,11 +213,13 @@ function showSearchResults(searchResults) {
 
 
 /**
- * "Öneri Getir" butonuna basıldığında backend'deki /recommend/ endpoint'ine istek atar.
+ * "Öneri Getir" butonuna basıldığında backend'deki /recommend/stream/ endpoint'ine istek atar.
+ * Yanıt Server-Sent Events olarak akar: önce benzer adaylar, sonra her öneri hazır oldukça tek tek gelir.
  */
 async function getRecommendations() {
     const gameName = document.getElementById('gameInput').value; // Arama kutusundaki oyun adı
     const resultsDiv = document.getElementById('results'); // Asıl önerilerin gösterileceği alan
+    const candidatesDiv = document.getElementById('candidates'); // Benzer aday oyunların şeridi
     const loadingDiv = document.getElementById('loading'); // Yükleniyor... mesajı
     const errorDiv = document.getElementById('error'); // Hata mesajı alanı
     const searchResultsBox = document.getElementById('search-results-box'); // Arama sonuç kutusu
@@ -229,24 +235,27 @@ async function getRecommendations() {
 
     // Önceki sonuçları ve hataları temizle, yükleniyor mesajını göster
     resultsDiv.innerHTML = '';
+    candidatesDiv.innerHTML = '';
     errorDiv.style.display = 'none';
     // Yükleniyor mesajını çevir
     loadingDiv.textContent = translations[currentLanguage]['loading_text']; 
     loadingDiv.style.display = 'block';
 
+    let recommendationCount = 0;
+
     try {
         // Seçili olan dili global değişkenden al (butonlardan ayarlanmıştı)
         const preferredLanguage = currentLanguage;
 
-        // Backend API adresini oluştur (örneğin: /recommend/?game_name=The%20Witcher%203&lang=tr)
-        const apiUrl = `/recommend/?game_name=${encodeURIComponent(gameName)}&lang=${preferredLanguage}`;
+        // Backend API adresini oluştur (örneğin: /recommend/stream/?game_name=The%20Witcher%203&lang=tr)
+        const apiUrl = `/recommend/stream/?game_name=${encodeURIComponent(gameName)}&lang=${preferredLanguage}`;
 
         console.log("Öneri İsteği Gönderiliyor:", apiUrl); // Konsola hangi adrese istek atıldığını yaz
 
         // Backend'e öneri isteğini gönder
         const response = await fetch(apiUrl);
 
-        // Sunucudan hata dönerse (örneğin 404, 500), hata fırlat
+        // Sunucudan hata dönerse (örneğin 404), akış hiç başlamaz; hata JSON olarak gelir
         if (!response.ok) {
             // Hata mesajını JSON olarak okumaya çalış
             const errorData = await response.json().catch(() => ({ detail: `${translations[currentLanguage]['error_recommend_fail']} ${response.statusText}` }));
@@ -254,11 +263,22 @@ async function getRecommendations() {
             throw new Error(errorData.detail || `${translations[currentLanguage]['error_recommend_fail']} ${response.statusText}`);
         }
 
-        // Sunucudan gelen JSON yanıtını al
-        const data = await response.json();
+        // Akıştaki her olayı geldiği anda ekrana yansıt
+        await readEventStream(response, (event, data) => {
+            if (event === 'candidates') {
+                displayCandidates(data.candidates);
+                loadingDiv.textContent = translations[currentLanguage]['curating_text'];
+            } else if (event === 'recommendation') {
+                appendRecommendationCard(data, recommendationCount++);
+                loadingDiv.style.display = 'none';
+            } else if (event === 'error') {
+                throw new Error(data.detail);
+            }
+        });
 
-        // Gelen önerileri ekrana yazdır
-        displayRecommendations(data.recommendations); // Backend'in 'recommendations' anahtarını kullandığını varsayıyoruz
+        if (recommendationCount === 0) {
+            resultsDiv.innerHTML = `<p>${translations[currentLanguage]['recommend_not_found']}</p>`;
+        }
 
     } catch (error) {
         console.error("Öneri Sırasında Hata:", error); // Hatayı konsola yaz
@@ -272,41 +292,131 @@ async function getRecommendations() {
 }
 
 /**
- * /recommend/ endpoint'inden gelen ASIL önerileri ekranda kartlar halinde gösterir.
- * @param {object[]} recommendations - Önerilen oyunların objelerini içeren liste
+ * text/event-stream yanıtını parça parça okur ve her tamamlanan olay için onEvent(olay, veri) çağırır.
+ * Olaylar boş satırla ayrılır; her olayın 'event:' ve JSON 'data:' satırları vardır.
+ * @param {Response} response - fetch yanıtı
+ * @param {function} onEvent - (olay adı, çözülmüş JSON verisi) ile çağrılır
+ */
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Tamamlanan her olay bloğunu işle, yarım kalanı bir sonraki parçaya bırak
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+/**
+ * Benzerlik aramasının bulduğu aday oyunları (LLM yanıtını beklemeden) küçük kapak görselleriyle gösterir.
+ * @param {object[]} candidates - {'name': string, 'header_image': string} objelerini içeren liste
  */
-function displayRecommendations(recommendations) {
+function displayCandidates(candidates) {
+    const candidatesDiv = document.getElementById('candidates');
+    candidatesDiv.innerHTML = '';
+
+    if (!candidates || candidates.length === 0) return;
+
+    const title = document.createElement('h3');
+    title.textContent = translations[currentLanguage]['candidates_title'];
+    candidatesDiv.appendChild(title);
+
+    const strip = document.createElement('div');
+    strip.className = 'candidate-strip';
+
+    // Oyun adları ve resim adresleri veriden gelir; innerHTML yerine özellik olarak atanır.
+    candidates.forEach(game => {
+        const imgSrc = (game.header_image && game.header_image.trim() !== '') ? game.header_image : placeholderSVG;
+
+        const item = document.createElement('div');
+        item.className = 'candidate-item';
+        item.title = game.name;
+
+        const img = document.createElement('img');
+        img.src = imgSrc;
+        img.alt = game.name;
+        img.onerror = () => {
+            img.onerror = null;
+            img.src = placeholderSVG;
+        };
+
+        const name = document.createElement('span');
+        name.textContent = game.name;
+
+        item.append(img, name);
+        strip.appendChild(item);
+    });
+
+    candidatesDiv.appendChild(strip);
+}
+
+/**
+ * Akıştan gelen tek bir öneriyi kart olarak sonuç alanının sonuna ekler.
+ * @param {object} game - LLM'in döndürdüğü öneri objesi
+ * @param {number} index - Önerinin sırası (animasyon gecikmesi için)
+ */
+function appendRecommendationCard(game, index) {
     const resultsDiv = document.getElementById('results');
 
-    // Öneri yoksa veya boşsa çevrilmiş bilgi mesajı göster
-    if (!recommendations || recommendations.length === 0) {
-        resultsDiv.innerHTML = `<p>${translations[currentLanguage]['recommend_not_found']}</p>`;
-        return;
+    const card = document.createElement('div');
+    card.className = 'game-card'; // CSS stilini uygula
+    // Kartların sırayla belirmesi için küçük bir animasyon gecikmesi
+    card.style.animationDelay = `${index * 0.1}s`;
+
+    // Kart türünü çevir
+    let cardType = translations[currentLanguage]['card_type_noteworthy']; // Varsayılan
+    if (game.type === 'Similar') {
+        cardType = translations[currentLanguage]['card_type_similar'];
+    } else if (game.type === 'Alternative') {
+        cardType = translations[currentLanguage]['card_type_alternative'];
     }
 
-    // Her bir öneri için bir kart ('div') oluştur
-    recommendations.forEach((game, index) => {
-        const card = document.createElement('div');
-        card.className = 'game-card'; // CSS stilini uygula
-        // Kartların sırayla belirmesi için küçük bir animasyon gecikmesi
-        card.style.animationDelay = `${index * 0.1}s`;
-
-        // Kart türünü çevir
-        let cardType = translations[currentLanguage]['card_type_noteworthy']; // Varsayılan
-        if (game.type === 'Similar') {
-            cardType = translations[currentLanguage]['card_type_similar'];
-        } else if (game.type === 'Alternative') {
-            cardType = translations[currentLanguage]['card_type_alternative'];
-        }
+    // Kartın içeriğini oluştur (LLM'den gelen verilere göre ve çevrilmiş etiketlerle).
+    // LLM çıktısı HTML olarak yorumlanmasın diye metinler textContent ile atanır.
+    const title = document.createElement('h2');
+    title.textContent = game.game_name;
+
+    const type = document.createElement('div');
+    type.className = 'type';
+    type.textContent = cardType;
+
+    card.append(
+        title,
+        type,
+        labelledParagraph(translations[currentLanguage]['card_reason_label'], game.match_reason),
+        labelledParagraph(translations[currentLanguage]['card_note_label'], game.user_note),
+    );
+    // Oluşturulan kartı sonuç alanına ekle
+    resultsDiv.appendChild(card);
+}
 
-        // Kartın içeriğini oluştur (LLM'den gelen verilere göre ve çevrilmiş etiketlerle)
-        card.innerHTML = `
-            <h2>${game.game_name}</h2>
-            <div class="type">${cardType}</div>
-            <p><strong>${translations[currentLanguage]['card_reason_label']}</strong> ${game.match_reason}</p>
-            <p><strong>${translations[currentLanguage]['card_note_label']}</strong> ${game.user_note}</p>
-        `;
-        // Oluşturulan kartı sonuç alanına ekle
-        resultsDiv.appendChild(card);
-    });
-}
\ No newline at end of file
+/**
+ * Kalın bir etiket ve ardından düz metin içeren paragraf oluşturur.
+ * @param {string} label - Kalın yazılacak etiket
+ * @param {string} text - Etiketten sonraki metin
+ */
+function labelledParagraph(label, text) {
+    const paragraph = document.createElement('p');
+    const strong = document.createElement('strong');
+    strong.textContent = label;
+    paragraph.append(strong, ` ${text ?? ''}`);
+    return paragraph;
+}
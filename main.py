@@ -1,39 +1,125 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
 from typing import Optional
+from datetime import date
 from sqlalchemy.orm import Session
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from database.db import SessionLocal, engine
-from backend.crud import search_games_by_name, get_similar_game_embeddings_and_texts
-from backend.llm_responses import get_llm_analysis_for_embedding
-from database.tables import Base
-import uvicorn
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, JSONResponse
+from database.db import ReadSessionLocal
+from backend.crud import search_games_by_name, embedding_store, autocomplete_index
+from backend.crud import resolve_game_appids, get_user_library_appids, find_similar_appids_for_seeds
+from backend.crud import find_similar_appids, get_games_in_order, get_candidate_records_in_order, get_fallback_recommendations
+from backend.llm_responses import get_llm_analysis_for_embedding_async, stream_llm_analysis_for_embedding, recommendation_cache
+from backend.llm_responses import usage_stats, get_model, llm_configured
+from backend.metrics import MetricsMiddleware, registry as metrics_registry
+from database.create_db import create_tables
+import asyncio
+import contextvars
+import json
+import os
+import time
 
 
-Base.metadata.create_all(bind=engine)
+# /recommend/batch/ isteğinde açıkça verilebilecek en fazla oyun adı
+BATCH_MAX_GAMES = int(os.getenv("NEXTGAME_BATCH_MAX_GAMES", "50"))
+
+# Benzerlik hesabı (NumPy matris çarpımı GIL'i bırakır) için ayrı bir thread havuzu.
+# Varsayılan havuzu paylaşmadığı için yoğun /recommend/ trafiği /search/ isteklerini aç bırakmaz.
+similarity_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("NEXTGAME_SIMILARITY_WORKERS", str(os.cpu_count() or 4))),
+    thread_name_prefix="similarity",
+)
+
+
+async def run_in_similarity_pool(func, *args, **kwargs):
+    # run_in_executor bağlam değişkenlerini taşımaz; istek profili (backend/metrics.py) thread'de de görünsün.
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(similarity_executor, partial(context.run, func, *args, **kwargs))
+
+
+async def release_db_connection(db: Session):
+    """
+    Oturumun bağlantısını havuza geri verir. LLM saniyelerce beklenirken bağlantı tutulursa
+    eşzamanlı isteklerde havuz tükenir (SQLite'ta açık okuma işlemi WAL checkpoint'ini de
+    bekletir). Oturum sonradan (yedek öneriler için) kullanılırsa yeni bir bağlantı alır.
+    """
+    await run_in_similarity_pool(db.close)
 
 def get_db():
-    db = SessionLocal()
+    # İstek işleyicileri sadece okur; LLM önbelleği yazmalarını kendi SessionLocal oturumuyla yapar.
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
+# Açılıştaki ısınmanın durumu (/health/ ve /ready/).
+startup_state = {"ready": False, "error": None, "warm_up_seconds": None}
+
+
+def warm_up():
+    """
+    Embedding deposunu, otomatik tamamlama indeksini ve Gemini istemcisini ilk isteği
+    beklemeden bir kez yükler. Sunucu bu sırada bağlantı kabul eder; yük dengeleyici
+    /ready/ 200 dönene kadar trafik göndermemelidir. Isınmadan önce gelen istekler
+    yine çalışır, sadece yüklemeyi kendileri bekler.
+    """
+    start = time.perf_counter()
+    try:
+        db = ReadSessionLocal()
+        try:
+            embedding_store.ensure_fresh(db)
+            autocomplete_index.ensure_fresh(db)
+        finally:
+            db.close()
+
+        if llm_configured():
+            get_model()
+        else:
+            print("Uyarı: GEMINI_API_KEY tanımlı değil; öneriler yedek sıralayıcıdan gelecek.")
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"Hata: Açılış ısınması tamamlanamadı. Hata: {e}")
+        return
+
+    startup_state["warm_up_seconds"] = round(time.perf_counter() - start, 3)
+    startup_state["ready"] = True
+    print(f"Sunucu hazır: ısınma {startup_state['warm_up_seconds']} saniye sürdü.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tablolar ve taşımalar modül yüklenirken değil, sunucu açılırken bir kez.
+    create_tables()
+    warm_up_task = asyncio.create_task(run_in_similarity_pool(warm_up))
+    yield
+    warm_up_task.cancel()
+    similarity_executor.shutdown(wait=False)
+
+
 # FastAPI uygulamasını oluştur
 app = FastAPI(
     title="NextGame Recommender API",
     description="Oyun önerileri sunan akıllı bir API.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# İstek süreleri ve isteğe bağlı Server-Timing profili (X-NextGame-Profile: 1 başlığıyla).
+app.add_middleware(MetricsMiddleware)
+
 
 # Search Endpoint
 @app.get("/search/")
-async def search_games(q:str, db: Session = Depends(get_db)):
+def search_games(q:str, db: Session = Depends(get_db)):
     """
     Kullanıcı arama çubuğuna yazdıkça otomatik tamamlama önerileri sağlar.
     Kullanım: /search/?q=Witch
+    Senkron DB sorgusu yaptığı için 'def' olarak tanımlı; FastAPI bunu thread havuzunda çalıştırır.
     """
 
     if not q:
@@ -44,28 +130,221 @@ async def search_games(q:str, db: Session = Depends(get_db)):
     return {"game_list" : game_list}
 
 
+def metadata_filters(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    released_after: Optional[date] = None,
+    released_before: Optional[date] = None,
+    platforms: Optional[list[str]] = Query(None, description="windows, mac, linux (hepsi gerekir)"),
+    max_required_age: Optional[int] = Query(None, ge=0),
+    genres: Optional[list[str]] = Query(None),
+    tags: Optional[list[str]] = Query(None),
+) -> dict:
+    """
+    /recommend/ uçlarının ortak filtre parametreleri. Verilmeyenler sözlüğe girmez.
+    Örnek: /recommend/?game_name=Portal&platforms=linux&max_price=20&released_after=2020-01-01
+    """
+    for platform in platforms or []:
+        if platform not in ("windows", "mac", "linux"):
+            raise HTTPException(status_code=422, detail=f"Bilinmeyen platform: '{platform}'.")
+
+    filters = {
+        "min_price": min_price,
+        "max_price": max_price,
+        "released_after": released_after,
+        "released_before": released_before,
+        "platforms": platforms,
+        "max_required_age": max_required_age,
+        "genres": genres,
+        "tags": tags,
+    }
+    return {key: value for key, value in filters.items() if value is not None}
+
+
 @app.get("/recommend/")
-async def suggestion_games(game_name:str, db : Session = Depends(get_db), lang : Optional[str] = Query("en", enum=["en", "tr"])):
+async def suggestion_games(game_name:str, db : Session = Depends(get_db), lang : Optional[str] = Query("en", enum=["en", "tr"]),
+                           filters : dict = Depends(metadata_filters)):
     """
     Verilen oyun adına göre önce benzer oyunları bulur, sonra LLM ile analiz edip
-    3 adet (2 benzer, 1 alternatif) öneri döndürür.
+    3 adet (2 benzer, 1 alternatif) öneri döndürür. Filtre parametreleri
+    (fiyat, çıkış tarihi, platform, yaş sınırı, tür, etiket) benzerlik aramasının içinde uygulanır.
+    LLM süresi içinde yanıt veremezse öneriler aynı adaylardan yerel olarak seçilir
+    ('source': 'fallback').
     """
-    candidate_texts = get_similar_game_embeddings_and_texts(db, target_game_name=game_name, top_n=20)
+    similar_appids = await run_in_similarity_pool(find_similar_appids, db, game_name, top_n=20, filters=filters)
+    candidate_texts = await run_in_similarity_pool(get_candidate_records_in_order, db, similar_appids) if similar_appids else []
 
     if not candidate_texts:
+        if filters:
+            raise HTTPException(status_code=404, detail=f"'{game_name}' için filtrelere uyan benzer oyun bulunamadı.")
         raise HTTPException(status_code=404, detail=f"'{game_name}' oyunu bulunamadı veya benzerleri hesaplanamadı.")
     
-    recommendations = get_llm_analysis_for_embedding(candidate_games=candidate_texts, language=lang) # type: ignore
+    await release_db_connection(db)
+    recommendations = await get_llm_analysis_for_embedding_async(candidate_games=candidate_texts, language=lang) # type: ignore
+    source = "llm"
+
+    if not recommendations:
+        seed_appids = list((await run_in_similarity_pool(resolve_game_appids, db, [game_name])).values())
+        recommendations = await run_in_similarity_pool(get_fallback_recommendations, db, similar_appids, seed_appids, language=lang)
+        source = "fallback"
 
     if not recommendations:
         raise HTTPException(status_code=500, detail="Öneriler işlenirken bir sunucu hatası oluştu.")
     
-    return {"recommendations" : recommendations}
+    return {"recommendations" : recommendations, "source" : source}
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/recommend/stream/")
+async def suggestion_games_stream(game_name:str, db : Session = Depends(get_db), lang : Optional[str] = Query("en", enum=["en", "tr"]),
+                                  filters : dict = Depends(metadata_filters)):
+    """
+    /recommend/ ile aynı önerileri Server-Sent Events olarak akıtır:
+      - 'candidates': benzerlik aramasının bulduğu adaylar (ad + kapak görseli), LLM beklenmeden hemen
+      - 'recommendation': LLM yanıtındaki her öneri, JSON nesnesi tamamlanır tamamlanmaz;
+        LLM süresi içinde hiç öneri üretemezse yerel yedek öneriler
+      - 'error': yedek öneriler de üretilemezse
+      - 'done': akışın sonu, gönderilen öneri sayısı ve kaynağıyla ('llm' veya 'fallback')
+    Oyun bulunamazsa akış başlamadan 404 döner.
+    """
+    similar_appids = await run_in_similarity_pool(find_similar_appids, db, game_name, top_n=20, filters=filters)
+    candidates = await run_in_similarity_pool(get_games_in_order, db, similar_appids) if similar_appids else []
+
+    if not candidates:
+        if filters:
+            raise HTTPException(status_code=404, detail=f"'{game_name}' için filtrelere uyan benzer oyun bulunamadı.")
+        raise HTTPException(status_code=404, detail=f"'{game_name}' oyunu bulunamadı veya benzerleri hesaplanamadı.")
+
+    # Aday verisi akış başlamadan okunur; oturum akış sırasında sadece yedek öneriler için kullanılır.
+    candidate_texts = [game["candidate"] for game in candidates]
+    await release_db_connection(db)
+
+    async def events():
+        yield sse_event("candidates", {"candidates": [{"name": game["name"], "header_image": game["header_image"]} for game in candidates]})
+
+        count = 0
+        source = "llm"
+        async for recommendation in stream_llm_analysis_for_embedding(candidate_games=candidate_texts, language=lang): # type: ignore
+            count += 1
+            yield sse_event("recommendation", recommendation)
+
+        if not count:
+            source = "fallback"
+            seed_appids = list((await run_in_similarity_pool(resolve_game_appids, db, [game_name])).values())
+            for recommendation in await run_in_similarity_pool(get_fallback_recommendations, db, similar_appids, seed_appids, language=lang):
+                count += 1
+                yield sse_event("recommendation", recommendation)
 
+        if not count:
+            yield sse_event("error", {"detail": "Öneriler işlenirken bir sunucu hatası oluştu."})
+        yield sse_event("done", {"count": count, "source": source})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/recommend/batch/")
+async def suggestion_games_batch(
+    game_names: Optional[list[str]] = Query(None),
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    lang: Optional[str] = Query("en", enum=["en", "tr"]),
+    method: str = Query("rrf", enum=["rrf", "mean"]),
+    filters: dict = Depends(metadata_filters),
+):
+    """
+    Birden fazla oyun için ("X, Y ve Z'yi oynadığın için") tek istekte 3 öneri döndürür.
+    Tohumlar ya tekrar eden 'game_names' parametreleriyle ya da 'user_id' ile
+    (User.game_info kütüphanesi) verilir. Benzerlikler tek seferde hesaplanıp
+    tek bir aday listesinde birleştirilir ve tek bir LLM çağrısı yapılır.
+    Kullanım: /recommend/batch/?game_names=Portal&game_names=Half-Life&lang=tr
+    """
+    if not game_names and user_id is None:
+        raise HTTPException(status_code=400, detail="En az bir 'game_names' veya 'user_id' verilmelidir.")
+
+    if game_names and len(game_names) > BATCH_MAX_GAMES:
+        raise HTTPException(status_code=400, detail=f"En fazla {BATCH_MAX_GAMES} oyun adı gönderilebilir.")
+
+    missing = []
+    if game_names:
+        found = await run_in_similarity_pool(resolve_game_appids, db, game_names)
+        seed_appids = list(found.values())
+        missing = [name for name in game_names if name not in found]
+    else:
+        seed_appids = await run_in_similarity_pool(get_user_library_appids, db, user_id)
+
+    if not seed_appids:
+        raise HTTPException(status_code=404, detail="Verilen oyunların hiçbiri bulunamadı.")
+
+    similar_appids = await run_in_similarity_pool(find_similar_appids_for_seeds, db, seed_appids, top_n=20, method=method, filters=filters)
+    candidate_texts = await run_in_similarity_pool(get_candidate_records_in_order, db, similar_appids) if similar_appids else []
+
+    if not candidate_texts:
+        raise HTTPException(status_code=404, detail="Verilen oyunlar için benzer oyun hesaplanamadı.")
+
+    await release_db_connection(db)
+    recommendations = await get_llm_analysis_for_embedding_async(candidate_games=candidate_texts, language=lang) # type: ignore
+    source = "llm"
+
+    if not recommendations:
+        recommendations = await run_in_similarity_pool(get_fallback_recommendations, db, similar_appids, seed_appids, language=lang)
+        source = "fallback"
+
+    if not recommendations:
+        raise HTTPException(status_code=500, detail="Öneriler işlenirken bir sunucu hatası oluştu.")
+
+    return {"recommendations" : recommendations, "source" : source, "seed_count" : len(seed_appids), "missing" : missing}
+
+
+@app.get("/cache/stats/")
+async def cache_stats():
+    """
+    LLM öneri önbelleğinin isabet/ıskalama sayaçlarını döndürür.
+    """
+    return recommendation_cache.stats()
+
+
+@app.get("/llm/usage/")
+async def llm_usage():
+    """
+    Gemini isteklerinin toplam ve ortalama girdi/çıktı token sayıları (önbellekten gelenler dahil).
+    """
+    return usage_stats()
+
+
+@app.get("/health/")
+async def health():
+    """
+    Süreç ayakta mı (liveness). Isınma sürerken de 200 döner; hazır olma durumu gövdededir.
+    """
+    return {"status" : "ok", **startup_state, "llm_configured" : llm_configured(), "games" : len(embedding_store)}
+
+
+@app.get("/ready/")
+async def ready():
+    """
+    Isınma bitti mi (readiness). Bitene kadar veya ısınma hata verdiyse 503 döner.
+    """
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status" : "starting" if startup_state["error"] is None else "error", **startup_state})
+    return {"status" : "ready", **startup_state}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metin biçiminde metrikler: aşama ve istek süresi histogramları,
+    LLM token/maliyet sayaçları, önbellek isabet oranı ve bellekteki indekslerin durumu.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 
 
 app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=3000)
\ No newline at end of file
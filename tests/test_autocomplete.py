@@ -0,0 +1,31 @@
+from backend.autocomplete import AutocompleteIndex
+
+
+def build(rows):
+    index = AutocompleteIndex()
+    index.build([(appid, name, None, popularity) for appid, (name, popularity) in enumerate(rows, start=1)])
+    return index
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_popular_title_beats_obscure_name_start_match():
+    witch_titles = [(f"Witchery {i}", 5) for i in range(12)]
+    index = build([("The Witcher 3: Wild Hunt", 1000), ("Witchery", 5), *witch_titles])
+
+    assert names(index.search("witcher"))[0] == "The Witcher 3: Wild Hunt"
+    assert names(index.search("witch"))[0] == "The Witcher 3: Wild Hunt"
+
+
+def test_name_start_wins_between_similarly_popular_games():
+    index = build([("The Portal Chronicles", 100), ("Portal Knights", 90)])
+
+    assert names(index.search("portal")) == ["Portal Knights", "The Portal Chronicles"]
+
+
+def test_typo_is_corrected():
+    index = build([("The Witcher 3: Wild Hunt", 1000), ("Stardew Valley", 500)])
+
+    assert names(index.search("wticher")) == ["The Witcher 3: Wild Hunt"]
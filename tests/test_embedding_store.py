@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+
+from backend.embedding_store import EmbeddingStore, normalize_rows
+from backend.vector_file import open_vector_file, read_manifest, write_vector_file, writer_lock
+
+DIM = 16
+
+
+def vectors(n, seed):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32))
+
+
+def mapped_store(path, monkeypatch, new_vectors):
+    store = EmbeddingStore(dim=DIM, vector_file=path)
+    store.load(None, version=1)
+    assert store.memory_stats()["matrix_mapped"]
+    monkeypatch.setattr(store, "read_from_db", lambda db, appids=None: (np.array(sorted(appids), dtype=np.int64), new_vectors))
+    return store
+
+
+def test_incremental_update_keeps_the_matrix_memory_mapped(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.npy"
+    write_vector_file(path, np.arange(1, 101), vectors(100, 0), catalog_version=1)
+    new_vectors = vectors(2, 1)
+
+    store = mapped_store(path, monkeypatch, new_vectors)
+    store.apply_changes(None, 2, upserted={5, 200}, deleted={7})
+
+    assert store.memory_stats()["matrix_mapped"]
+    assert read_manifest(path)["catalog_version"] == 2
+    assert len(store) == 100
+    assert store.get_vector(7) is None
+    np.testing.assert_array_equal(store.get_vector(200), new_vectors[1])
+
+
+def test_second_worker_maps_the_file_written_by_the_first(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.npy"
+    write_vector_file(path, np.arange(1, 101), vectors(100, 0), catalog_version=1)
+    new_vectors = vectors(1, 1)
+
+    first = mapped_store(path, monkeypatch, new_vectors)
+    second = mapped_store(path, monkeypatch, new_vectors)
+    first.apply_changes(None, 2, upserted={300}, deleted=set())
+
+    writes = []
+    monkeypatch.setattr("backend.embedding_store.write_vector_file", lambda *args, **kwargs: writes.append(args))
+    second.apply_changes(None, 2, upserted={300}, deleted=set())
+
+    assert writes == []
+    assert second.memory_stats()["matrix_mapped"]
+
+
+def test_unwritable_vector_file_falls_back_to_a_private_copy(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.npy"
+    write_vector_file(path, np.arange(1, 101), vectors(100, 0), catalog_version=1)
+    store = mapped_store(path, monkeypatch, vectors(1, 1))
+
+    def fail(*args, **kwargs):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr("backend.embedding_store.write_vector_file", fail)
+    store.apply_changes(None, 2, upserted={300}, deleted=set())
+
+    assert not store.memory_stats()["matrix_mapped"]
+    assert store.get_vector(300) is not None
+
+
+def test_waiting_worker_maps_the_file_published_by_the_lock_holder(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.npy"
+    base = vectors(100, 0)
+    write_vector_file(path, np.arange(1, 101), base, catalog_version=1)
+    new_vectors = vectors(1, 1)
+    store = mapped_store(path, monkeypatch, new_vectors)
+
+    writes = []
+    monkeypatch.setattr("backend.embedding_store.write_vector_file", lambda *args, **kwargs: writes.append(args))
+
+    with writer_lock(path):
+        worker = threading.Thread(target=store.apply_changes, args=(None, 2, {300}, set()))
+        worker.start()
+        time.sleep(0.2)
+        write_vector_file(path, np.append(np.arange(1, 101), 300), np.concatenate([base, new_vectors]), catalog_version=2)
+    worker.join()
+
+    assert writes == []
+    assert store.memory_stats()["matrix_mapped"]
+    np.testing.assert_array_equal(store.get_vector(300), new_vectors[0])
+
+
+def test_publishing_switches_every_file_at_once(tmp_path):
+    path = tmp_path / "embeddings.npy"
+    write_vector_file(path, np.arange(1, 101), vectors(100, 0), catalog_version=1)
+    old_appids, old_matrix = open_vector_file(path)
+
+    write_vector_file(path, np.arange(1, 51), vectors(50, 1), catalog_version=2)
+    appids, matrix = open_vector_file(path, expected_version=2, verify_checksum=True)
+
+    assert len(appids) == len(matrix) == 50
+    # The old version is unlinked but stays readable for processes that still map it.
+    assert len(list(tmp_path.glob("embeddings.*.npy"))) == 2
+    assert old_matrix.shape == (100, DIM) and float(old_matrix[99] @ old_matrix[99]) > 0.99
+
+
+def test_metadata_only_change_keeps_the_vectors_and_the_data_files(tmp_path, monkeypatch):
+    path = tmp_path / "embeddings.npy"
+    write_vector_file(path, np.arange(1, 101), vectors(100, 0), catalog_version=1)
+    data_files = sorted(tmp_path.glob("embeddings.*.npy"))
+    store = mapped_store(path, monkeypatch, vectors(1, 1))
+    before = store.get_vector(5).copy()
+
+    store.apply_changes(None, 2, upserted=set(), deleted=set(), metadata_only={5})
+
+    assert store.version == 2
+    assert store.memory_stats()["matrix_mapped"]
+    assert read_manifest(path)["catalog_version"] == 2
+    assert sorted(tmp_path.glob("embeddings.*.npy")) == data_files
+    np.testing.assert_array_equal(store.get_vector(5), before)
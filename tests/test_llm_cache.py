@@ -0,0 +1,50 @@
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend import llm_cache
+from backend.llm_cache import RecommendationCache
+from database.tables import LLMCacheEntry
+
+
+def persistent_cache(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    LLMCacheEntry.__table__.create(engine)
+    monkeypatch.setattr(llm_cache, "SessionLocal", sessionmaker(bind=engine))
+
+    writes = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: writes.append(statement) if statement.startswith("UPDATE") else None)
+    return RecommendationCache(), writes
+
+
+def test_db_hits_are_counted_without_writing_on_the_request_path(tmp_path, monkeypatch):
+    cache, writes = persistent_cache(tmp_path, monkeypatch)
+    cache.set("key", [{"name": "Hades"}], ["Hades | Roguelike"], "en")
+    writes.clear()
+
+    for _ in range(3):
+        cache.clear_memory()
+        assert cache.get("key") == [{"name": "Hades"}]
+
+    assert cache.counters["db_hits"] == 3
+    assert writes == []
+    assert cache.most_requested(1)[0]["hits"] == 3
+
+
+def test_pending_hits_are_flushed_in_the_background(tmp_path, monkeypatch):
+    cache, writes = persistent_cache(tmp_path, monkeypatch)
+    cache.FLUSH_EVERY = 5
+    cache.set("key", [{"name": "Hades"}], ["Hades | Roguelike"], "en")
+
+    for _ in range(5):
+        cache.get("key")
+
+    deadline = time.monotonic() + 5
+    while cache._flushing or cache._pending_count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert len(writes) == 1
+    assert cache.most_requested(1)[0]["hits"] == 5
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from backend.llm_client import CircuitBreaker, LLMUnavailable, call_with_resilience
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def test_cancelled_half_open_probe_releases_the_probe():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hanging_call():
+            started.set()
+            await asyncio.sleep(3600)
+
+        probe = asyncio.create_task(call_with_resilience(hanging_call, deadline=3600, breaker=breaker))
+        await started.wait()
+        assert not breaker.allow()  # probe in flight
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def ok():
+            return "ok"
+
+        return await call_with_resilience(ok, deadline=1, breaker=breaker)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_failed_half_open_probe_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+
+    async def failing_call():
+        raise RuntimeError("boom")
+
+    with pytest.raises(LLMUnavailable):
+        asyncio.run(call_with_resilience(failing_call, deadline=1, retries=0, breaker=breaker))
+    assert breaker.state == "open"
+
+
+def test_release_probe_keeps_the_circuit_state():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release_probe()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
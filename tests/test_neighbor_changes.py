@@ -0,0 +1,20 @@
+from backend import crud
+
+
+class ClearedByAnotherThread(dict):
+    """Another request clears the cache right after this one stored its entry."""
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.clear()
+
+
+def test_changes_since_survives_a_concurrent_clear(monkeypatch):
+    monkeypatch.setattr(crud, "_neighbor_changes", ClearedByAnotherThread())
+    monkeypatch.setattr(crud, "get_catalog_changes", lambda db, since, until: ({5}, set(), {6}))
+    monkeypatch.setattr(crud.embedding_store, "get_vector", lambda appid: None)
+
+    upserted, present, matrix = crud._changes_since(None, 1, 2)
+
+    assert upserted == frozenset({5})
+    assert len(present) == 0 and matrix.shape == (0, crud.EMBEDDING_DIM)
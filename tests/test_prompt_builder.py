@@ -0,0 +1,22 @@
+import json
+
+from backend.fake_llm import FakeGeminiModel
+from backend.prompt_builder import compact_candidate
+
+
+def test_candidate_name_is_kept_verbatim():
+    name = 'Duck | Cover: "Redux"'
+    record = compact_candidate(name, "Action", "Co-op, Shooter", "Hide | seek.")
+
+    quoted = json.dumps(name, ensure_ascii=False)
+    assert record.startswith(quoted + " | ")
+    assert record[len(quoted):].count(" | ") == 3
+
+
+def test_fake_model_echoes_the_exact_names():
+    names = ['Duck | Cover: "Redux"', "Çay Ocağı", "Plain"]
+    prompt = "\n".join(f"{i}. {compact_candidate(name, 'RPG', 'Indie', 'Text.')}" for i, name in enumerate(names, start=1))
+
+    answer = json.loads(FakeGeminiModel(latency=0).generate_content(prompt).text)
+
+    assert [item["game_name"] for item in answer["recommendations"]] == names
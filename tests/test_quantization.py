@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from backend.embedding_store import EmbeddingStore
+from backend.quantization import QUANTIZATION_KINDS, PQVectors, QuantizedVectors, quantize
+from benchmarks.synthetic import clustered_embeddings
+
+
+def unit_rows(n, dim=48, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        QuantizedVectors()
+
+    class Incomplete(QuantizedVectors):
+        kind = "incomplete"
+
+        def _block_scores(self, start, end, queries):
+            return queries
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize("kind", QUANTIZATION_KINDS)
+def test_empty_matrix_gives_no_codes(kind):
+    codebooks = PQVectors.build(unit_rows(300), m=8)
+    assert quantize(np.empty((0, 48), dtype=np.float32), kind, codebooks) is None
+
+
+def test_pq_is_never_trained_at_serving_time():
+    assert quantize(unit_rows(300), "pq") is None
+
+
+def test_unknown_kind_is_rejected_even_when_empty():
+    with pytest.raises(ValueError):
+        quantize(np.empty((0, 48), dtype=np.float32), "int4")
+
+
+def test_pq_build_rejects_empty_matrix():
+    with pytest.raises(ValueError):
+        PQVectors.build(np.empty((0, 48), dtype=np.float32), m=8)
+
+
+def test_pq_codes_file_round_trip(tmp_path):
+    appids, vectors = np.arange(1, 301, dtype=np.int64), unit_rows(300)
+    built = PQVectors.build(vectors, m=8)
+    built.save(tmp_path / "pq.npz", appids, version=3)
+
+    store = EmbeddingStore(dim=48, quantization="pq", pq_path=tmp_path / "pq.npz")
+    store.load_arrays(appids, vectors, version=3)
+    assert np.array_equal(store._snapshot.codes.codes, built.codes)
+
+    # Another order or version is re-encoded with the stored codebooks, not retrained.
+    store.load_arrays(appids[::-1], vectors[::-1], version=4)
+    assert np.array_equal(store._snapshot.codes.codes, built.codes[::-1])
+    assert np.array_equal(store._snapshot.codes.codebooks, built.codebooks)
+
+
+@pytest.mark.parametrize("kind", QUANTIZATION_KINDS)
+def test_store_opened_empty_builds_codes_on_first_sync(kind, monkeypatch, tmp_path):
+    PQVectors.build(unit_rows(300, seed=1), m=8).save(tmp_path / "pq.npz", np.empty(0, dtype=np.int64))
+    store = EmbeddingStore(dim=48, quantization=kind, pq_path=tmp_path / "pq.npz")
+    store.load_arrays(np.empty(0, dtype=np.int64), np.empty((0, 48), dtype=np.float32), version=1)
+    assert store.memory_stats()["codes_bytes"] == 0
+
+    appids, vectors = np.arange(1, 301, dtype=np.int64), unit_rows(300)
+    monkeypatch.setattr(store, "read_from_db", lambda db, appids=None: (np.fromiter(appids, dtype=np.int64), vectors))
+    store.apply_changes(None, 2, set(appids.tolist()), set())
+
+    assert store.memory_stats()["codes_bytes"] > 0
+    found, _ = store.most_similar(1, top_n=5)
+    assert len(found) == 5
+
+
+@pytest.mark.parametrize("kind", QUANTIZATION_KINDS)
+def test_default_shortlist_keeps_recall(kind, tmp_path):
+    # 50k is the catalogue size the defaults are tuned for; at 20k even a fixed 100-candidate
+    # shortlist passes, so a smaller test would not catch a regression.
+    n, k = 50_000, 20
+    vectors = clustered_embeddings(n, seed=0)
+    appids = np.arange(n, dtype=np.int64)
+    if kind == "pq":
+        PQVectors.build(vectors, m=48, sample_size=5_000).save(tmp_path / "pq.npz", appids)
+
+    exact = EmbeddingStore(dim=384)
+    exact.load_arrays(appids, vectors)
+    store = EmbeddingStore(dim=384, quantization=kind, pq_path=tmp_path / "pq.npz")
+    store.load_arrays(appids, vectors)
+
+    queries = np.random.default_rng(1).choice(n, 40, replace=False)
+    hits = sum(len(set(exact.most_similar(int(q), top_n=k)[0]) & set(store.most_similar(int(q), top_n=k)[0]))
+               for q in queries)
+    assert hits / (k * len(queries)) >= 0.95